@@ -0,0 +1,127 @@
+# fake_vision_server.py
+# 목적:
+#  - Vision API images:annotate(랜드마크 인식)를 흉내 내는 로컬 서버 (표준 라이브러리만 사용)
+#  - google_vision_api.py 전체 경로(배치, 동시 호출, 초당 한도, 할당량 초과 재시도)를
+#    네트워크/비용 없이 테스트하고 벤치마크하기 위함
+#  - 이미지 내용 해시로 결과를 정함 → 같은 사진이면 항상 같은 결과
+#  - 요청마다 지연(--latency), 초당 이미지 한도(--qps) 초과 시 429 RESOURCE_EXHAUSTED
+#
+# 사용:
+#   python fake_vision_server.py --port 8085 --latency 0.4 --qps 30
+#   python google_vision_api.py --endpoint http://127.0.0.1:8085/v1/images:annotate --root <사진 폴더>
+
+import argparse, base64, hashlib, json, threading, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LANDMARKS = [
+    ("Gyeongbokgung", 37.579617, 126.977041),
+    ("N Seoul Tower", 37.551169, 126.988227),
+    ("Haeundae Beach", 35.158698, 129.160384),
+    ("Tokyo Tower", 35.658581, 139.745433),
+    ("Eiffel Tower", 48.858370, 2.294481),
+    ("Statue of Liberty", 40.689247, -74.044502),
+    ("Golden Gate Bridge", 37.819929, -122.478255),
+    ("Sydney Opera House", -33.856784, 151.215297),
+]
+
+def fake_response(content, landmark_ratio):
+    h = hashlib.sha1(content).digest()
+    if h[0] / 256.0 >= landmark_ratio:
+        return {}
+    name, lat, lng = LANDMARKS[h[1] % len(LANDMARKS)]
+    return {"landmarkAnnotations": [{
+        "mid": "/m/fake" + h[:3].hex(), "description": name, "score": round(0.5 + h[2] / 512.0, 4),
+        "locations": [{"latLng": {"latitude": lat, "longitude": lng}}]}]}
+
+class RateWindow:
+    """최근 1초 동안 처리한 이미지 수"""
+    def __init__(self, qps):
+        self.qps = qps
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def try_take(self, n):
+        now = time.monotonic()
+        with self.lock:
+            while self.events and now - self.events[0][0] > 1.0:
+                self.events.popleft()
+            used = sum(k for _, k in self.events)
+            if self.qps and used + n > self.qps:
+                return False
+            self.events.append((now, n))
+            return True
+
+def make_handler(latency, window, landmark_ratio, counters):
+    counters_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, obj):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.split("?", 1)[0].endswith("/images:annotate"):
+                self._send(404, {"error": {"code": 404, "message": "not found"}})
+                return
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            requests = data.get("requests", [])
+            if len(requests) > 16:
+                self._send(400, {"error": {"code": 400, "message": "too many images (max 16)"}})
+                return
+            if not window.try_take(len(requests)):
+                with counters_lock:
+                    counters["throttled"] += 1
+                self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}})
+                return
+            time.sleep(latency)
+            out = []
+            for r in requests:
+                try:
+                    out.append(fake_response(base64.b64decode(r["image"]["content"]), landmark_ratio))
+                except (KeyError, ValueError):
+                    out.append({"error": {"code": 3, "message": "bad image"}})
+            with counters_lock:
+                counters["requests"] += 1
+                counters["images"] += len(requests)
+            self._send(200, {"responses": out})
+
+        def log_message(self, fmt, *args):
+            pass
+    return Handler
+
+def serve(port=8085, bind="127.0.0.1", latency=0.4, qps=30, landmark_ratio=0.3):
+    """서버를 만들어 돌려줌 (serve_forever는 호출하는 쪽에서). counters로 요청/이미지/거절 수 확인"""
+    counters = {"requests": 0, "images": 0, "throttled": 0}
+    server = ThreadingHTTPServer((bind, port), make_handler(latency, RateWindow(qps), landmark_ratio, counters))
+    server.daemon_threads = True
+    server.counters = counters
+    return server
+
+def main():
+    ap = argparse.ArgumentParser(description="로컬 가짜 Vision API (images:annotate)")
+    ap.add_argument("--port", type=int, default=8085)
+    ap.add_argument("--bind", default="127.0.0.1")
+    ap.add_argument("--latency", type=float, default=0.4, help="요청당 지연 (초)")
+    ap.add_argument("--qps", type=float, default=30, help="초당 이미지 한도 (0 = 무제한)")
+    ap.add_argument("--landmark-ratio", type=float, default=0.3, help="랜드마크가 나오는 사진 비율")
+    args = ap.parse_args()
+    server = serve(args.port, args.bind, args.latency, args.qps, args.landmark_ratio)
+    print(f"가짜 Vision API: http://{args.bind}:{args.port}/v1/images:annotate (Ctrl+C 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"요청 {server.counters['requests']}회, 이미지 {server.counters['images']}장, "
+              f"한도 초과 {server.counters['throttled']}회")
+
+if __name__ == "__main__":
+    main()
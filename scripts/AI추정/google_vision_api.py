@@ -1,9 +1,25 @@
 # ai_landmark_scan_skip_v2_fixed.py
-import os, io, csv, json, time
+# 옛날 사진(위치 없음)을 Vision API 랜드마크 인식으로 위치 추정
+#  - 여러 장을 한 요청으로 묶어(batch_annotate_images) WORKERS개 스레드로 동시에 보냄
+#  - 초당 이미지 수는 최근 1초 창으로 MAX_QPS에 맞춤, 할당량 초과는 백오프 후 재시도 (vision_client.py)
+#  - 결과는 내용 해시 + 모델 설정으로 캐시(vision_cache.py) → 중단돼도 이어서, 재실행은 새 사진만 업로드
+#  - 연사/보정본/복사본은 dHash로 묶어(near_dup.py) 대표 한 장만 Vision 호출 + 좌표 출력
+#  - 업로드는 긴 변 MAX_EDGE로 줄여서 (JPEG는 draft로 디코딩 단계에서 축소) → 전송량/응답 시간 감소
+#  - --endpoint 로 로컬 가짜 서버(fake_vision_server.py)에 보내면 비용/네트워크 없이 테스트/벤치마크
+import os, io, csv, json, sys, time, argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from PIL import Image, ExifTags
-from google.cloud import vision
+from PIL import Image, ImageOps, ExifTags
+
+# scripts/ 폴더의 공용 모듈(exif_reader 등) 사용
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from exif_reader import read_exif_basic
+from photo_scanner import iter_photos
+from scan_store import path_key
+from vision_client import BATCH_SIZE, MAX_RESULTS, make_annotator, pick_best_landmark
+import vision_cache, near_dup
 
 
 # ====== 설정 ======
@@ -11,17 +27,24 @@ ROOT = Path(r"C:\Users\b_jin\OneDrive - KIF\4. backup_folder\old_photos")
 OUT_DIR = ROOT
 SKIP_FOLDER = "외장하드 백업"  # 이 폴더는 제외
 EXTS = {".jpg", ".jpeg", ".png"}  # 필요한 확장자만
-MAX_QPS = 3
-SLEEP_BETWEEN = 1.0 / MAX_QPS
+MAX_QPS = 3           # 초당 이미지 수 (Vision 할당량에 맞춰 올리세요)
+WORKERS = 8           # 동시에 보내는 요청 수 (응답 대기 시간 동안 다른 요청을 보냄)
+MAX_EDGE = 1024       # 업로드 이미지 긴 변 최대 픽셀 (0 = 원본 그대로). 랜드마크 인식엔 이 정도로 충분
+JPEG_QUALITY = 85
+DUP_RADIUS = near_dup.DUP_RADIUS  # dHash 해밍 거리 이하면 같은 사진 (-1 = 완전히 같은 파일만 묶음)
+CACHE_NAME = "oldphotos_ai_cache.sqlite"  # 결과 폴더에 저장
+VISION_ENDPOINT = None  # None = google-cloud-vision 라이브러리, 예: "http://127.0.0.1:8085/v1/images:annotate" (가짜 서버)
 
-# 서비스 계정 키 경로 - 환경변수로 설정
+# 서비스 계정 키 경로 - 환경변수로 설정 (라이브러리 백엔드만 사용)
 CRED_PATH = r"C:\Users\b_jin\OneDrive - KIF\4. backup_folder\old_photos\photo-geo-ai-a378cd1f19fb.json"
-os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = CRED_PATH
-client = vision.ImageAnnotatorClient()
 
 
 # ====== EXIF 시간 추출 ======
 def get_exif_time_str(path: Path):
+    # JPEG/TIFF는 헤더만 읽어서 처리
+    res = read_exif_basic(path)
+    if res is not None:
+        return res[2]
     try:
         with Image.open(path) as im:
             exif = im._getexif() or {}
@@ -37,96 +60,220 @@ def get_exif_time_str(path: Path):
                 return None
     return None
 
-# ====== Vision API 호출 ======
-def detect_landmark_bytes(content: bytes):
+# ====== 업로드용 축소 ======
+def shrink_for_upload(content: bytes, max_edge=MAX_EDGE):
+    """긴 변이 max_edge보다 크면 줄여서 JPEG로 다시 인코딩. 못 읽는 형식이면 원본 그대로"""
+    if not max_edge:
+        return content
     try:
-        image = vision.Image(content=content)
-        resp = client.landmark_detection(image=image, max_results=3)
-        if resp.error.message:
-            raise RuntimeError(resp.error.message)
-        return resp
-    except Exception as e:
-        print(f"Vision API 에러: {type(e).__name__}: {e}")
-        raise
-
-def pick_best_landmark(annotations):
-    best = None
-    for ann in annotations:
-        desc = ann.description
-        score = getattr(ann, "score", 0.0)
-        if ann.locations:
-            latlng = ann.locations[0].lat_lng
-            lat, lng = latlng.latitude, latlng.longitude
-            if best is None or score > best[1]:
-                best = (desc, float(score), float(lat), float(lng))
-    return best
-
-# ====== 메인 ======
-def main():
-    with_loc, no_landmark, rows = [], [], []
-    total = 0
-
-    for p in ROOT.rglob("*"):
-        if not p.is_file() or p.suffix.lower() not in EXTS:
-            continue
-
-        # 상위 경로에 "외장하드 백업" 포함 시 스킵
-        if any(part == SKIP_FOLDER for part in p.parts):
-            continue
-
-        total += 1
-        rel = p.relative_to(ROOT).as_posix()
+        with Image.open(io.BytesIO(content)) as im:
+            if max(im.size) <= max_edge:
+                return content
+            im.draft("RGB", (max_edge, max_edge))  # JPEG: 1/2~1/8 크기로 바로 디코딩
+            im = ImageOps.exif_transpose(im).convert("RGB")
+            im.thumbnail((max_edge, max_edge), reducing_gap=2.0)  # reduce()로 먼저 정수배 축소 후 리샘플
+            buf = io.BytesIO()
+            im.save(buf, "JPEG", quality=JPEG_QUALITY)
+    except Exception:
+        return content
+    out = buf.getvalue()
+    return out if len(out) < len(content) else content
 
-        print(f"[{total}] 처리 중: {rel}")
+def model_params(max_edge=MAX_EDGE):
+    """캐시 키에 들어가는 모델 설정 (바뀌면 다시 받음)"""
+    return f"landmark/max_results={MAX_RESULTS}/max_edge={max_edge}"
 
+# ====== 1단계: 내용 해시 / 촬영시각 / dHash ======
+def fingerprint_batch(cache, batch):
+    """
+    [(경로, 상대경로), ...] → [(경로, 상대경로, sha1, 촬영시각, dHash), ...]
+    안 바뀐 파일은 캐시에서, 새 파일만 읽어서 계산 후 기록. 읽기 실패한 파일은 결과에서 빠짐
+    """
+    out, file_rows = [], []
+    for p, rel in batch:
+        key = path_key(p)
         try:
-            content = p.read_bytes()
+            st = p.stat()
+            known = vision_cache.lookup_file(cache, key, st.st_size, st.st_mtime)
+            if known and known[2] is not None:
+                h, time_str, dh = known[0], known[1], near_dup.from_signed(known[2])
+            else:
+                content = p.read_bytes()
+                h, time_str = vision_cache.content_hash(content), get_exif_time_str(p)
+                dh = near_dup.dhash(content)
+                file_rows.append((key, st.st_size, st.st_mtime, h, time_str, near_dup.to_signed(dh)))
         except Exception as e:
             print(f"[SKIP] 읽기 실패: {p} / {e}")
             continue
+        out.append((p, rel, h, time_str, dh))
+    if file_rows:
+        vision_cache.save(cache, file_rows, [], None)
+    return out
 
+# ====== 2단계: Vision API 호출 (배치 하나) ======
+def scan_batch(annotate, cache, params, max_edge, batch):
+    """
+    [(경로, 상대경로, sha1), ...] → [(상대경로, best 또는 None, 에러 메시지 또는 None, 캐시 사용 여부), ...]
+    캐시에 있는 사진은 업로드하지 않음. 같은 내용의 사진이 배치 안에 여러 장이면 한 번만 업로드
+    """
+    items = []
+    uploads, slot_of = [], {}  # 업로드할 내용, 해시 → uploads 번호
+    for p, rel, h in batch:
+        cached = vision_cache.lookup_result(cache, h, params)
+        if cached is None and h not in slot_of:
+            try:
+                content = shrink_for_upload(p.read_bytes(), max_edge)
+            except Exception as e:
+                print(f"[SKIP] 읽기 실패: {p} / {e}")
+                continue
+            slot_of[h] = len(uploads)
+            uploads.append(content)
+        items.append((rel, h, cached))
+
+    responses = []
+    if uploads:
         try:
-            resp = detect_landmark_bytes(content)
+            responses = annotate(uploads)
         except Exception as e:
-            print(f"[ERR] Vision 호출 실패: {p} / {e}")
-            no_landmark.append({"file": rel})
-            time.sleep(SLEEP_BETWEEN)  # 실패해도 rate limiting
-            continue
+            print(f"[ERR] Vision 호출 실패: {items[0][0]} 외 {len(uploads) - 1}장 / {type(e).__name__}: {e}")
+            responses = [{"error": {"message": str(e)}}] * len(uploads)
 
-        anns = resp.landmark_annotations
-        best = pick_best_landmark(anns)
-        time_str = get_exif_time_str(p)
+    fresh = {}
+    for h, slot in slot_of.items():
+        resp = responses[slot] if slot < len(responses) else {"error": {"message": "응답 없음"}}
+        err = (resp.get("error") or {}).get("message")
+        fresh[h] = (None if err else pick_best_landmark(resp), err)
+    vision_cache.save(cache, [], [(h, best) for h, (best, err) in fresh.items() if not err], params)
 
+    out = []
+    for rel, h, cached in items:
+        if cached is not None:
+            out.append((rel, cached or None, None, True))
+        elif h in fresh:
+            best, err = fresh[h]
+            out.append((rel, best, err, False))
+    return out
+
+def iter_batches(root, size):
+    batch = []
+    for p in iter_photos(root, EXTS, {SKIP_FOLDER}):
+        batch.append((p, p.relative_to(root).as_posix()))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ====== 메인 ======
+def main():
+    ap = argparse.ArgumentParser(description="옛날 사진 Vision 랜드마크 스캔")
+    ap.add_argument("--root", type=Path, default=ROOT)
+    ap.add_argument("--out", type=Path, default=None, help="결과 폴더 (기본: 사진 폴더)")
+    ap.add_argument("--endpoint", default=VISION_ENDPOINT, help="REST 엔드포인트 (가짜 서버 등)")
+    ap.add_argument("--qps", type=float, default=MAX_QPS, help="초당 이미지 수")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--dup-radius", type=int, default=DUP_RADIUS, help="비슷한 사진 dHash 거리 (-1 = 완전히 같은 파일만 묶음)")
+    ap.add_argument("--max-edge", type=int, default=MAX_EDGE, help="업로드 긴 변 최대 픽셀 (0 = 원본)")
+    args = ap.parse_args()
+    root = args.root
+    out_dir = args.out or (OUT_DIR if root == ROOT else root)
+
+    if not args.endpoint:
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = CRED_PATH
+    params = model_params(args.max_edge)
+    cache = vision_cache.open_cache(out_dir / CACHE_NAME)
+    annotate = make_annotator(args.endpoint, max_qps=args.qps, api_key=os.environ.get("VISION_API_KEY"))
+
+    t0 = time.perf_counter()
+
+    # 1) 전체 사진 해시 (상위 경로에 "외장하드 백업" 포함 시 스킵)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        photos = [ph for part in pool.map(lambda b: fingerprint_batch(cache, b), iter_batches(root, BATCH_SIZE))
+                  for ph in part]
+    # 내용이 완전히 같은 사진(sha1)은 항상 묶고, 나머지는 dHash로
+    first = {}
+    exact = [first.setdefault(ph[2], i) for i, ph in enumerate(photos)]
+    hashes = [ph[4] if exact[i] == i and args.dup_radius >= 0 else None for i, ph in enumerate(photos)]
+    rep_of = near_dup.group_near_duplicates(hashes, max(args.dup_radius, 0))
+    rep_of = [rep_of[e] for e in exact]
+    reps = [ph for i, ph in enumerate(photos) if rep_of[i] == i]
+    print(f"사진 {len(photos)}장 → 대표 {len(reps)}장 (비슷한 사진 {len(photos) - len(reps)}장 생략, "
+          f"{time.perf_counter() - t0:.1f}초)")
+
+    # 2) 대표 사진만 Vision 호출
+    # 진행 중인 배치는 WORKERS * 2개까지만 (파일 내용을 한꺼번에 메모리에 올리지 않도록)
+    results = {}  # 상대경로 → (best, 에러 메시지, 캐시 사용 여부)
+    done = from_cache = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = deque()
+        size = annotate.batch_size  # 요청 하나 = 초당 한도 이하
+        batches = (reps[k:k + size] for k in range(0, len(reps), size))
+        while True:
+            while len(pending) < args.workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                pending.append(pool.submit(scan_batch, annotate, cache, params, args.max_edge,
+                                           [(p, rel, h) for p, rel, h, _, _ in batch]))
+            if not pending:
+                break
+            for rel, best, err, hit in pending.popleft().result():
+                done += 1
+                from_cache += hit
+                results[rel] = (best, err, hit)
+                tag = " (캐시)" if hit else ""
+                if err:
+                    print(f"[{done}/{len(reps)}] {rel} -> 실패: {err}")
+                elif best:
+                    print(f"[{done}/{len(reps)}] {rel} -> 랜드마크 발견: {best[0]} (점수: {best[1]:.3f}){tag}")
+                else:
+                    print(f"[{done}/{len(reps)}] {rel} -> 랜드마크 없음{tag}")
+    elapsed = time.perf_counter() - t0
+    cache.close()
+
+    # 3) 입력 순서대로 정리. 비슷한 사진은 CSV에만 (dup_of = 대표 사진)
+    with_loc, no_landmark, rows = [], [], []
+    for i, (p, rel, h, time_str, dh) in enumerate(photos):
+        rep_rel = photos[rep_of[i]][1]
+        if rep_rel not in results:
+            continue
+        best, err, _ = results[rep_rel]
+        dup_of = rep_rel if rep_of[i] != i else ""
+        if err:
+            if not dup_of:
+                no_landmark.append({"file": rel})
+            continue
         if best:
             desc, score, lat, lng = best
-            print(f"  -> 랜드마크 발견: {desc} (점수: {score:.3f})")
-            with_loc.append({
-                "file": rel,
-                "lat": round(lat, 7),
-                "lng": round(lng, 7),
-                "time": time_str
-            })
+            if not dup_of:
+                with_loc.append({
+                    "file": rel,
+                    "lat": round(lat, 7),
+                    "lng": round(lng, 7),
+                    "time": time_str
+                })
             rows.append({
                 "path": rel,
                 "landmark": desc,
                 "score": f"{score:.4f}",
                 "lat": lat,
                 "lng": lng,
-                "time": time_str or ""
+                "time": time_str or "",
+                "dup_of": dup_of
             })
         else:
-            print(f"  -> 랜드마크 없음")
-            no_landmark.append({"file": rel})
+            if not dup_of:
+                no_landmark.append({"file": rel})
             rows.append({
                 "path": rel,
                 "landmark": "",
                 "score": "",
                 "lat": "",
                 "lng": "",
-                "time": time_str or ""
+                "time": time_str or "",
+                "dup_of": dup_of
             })
-
-        time.sleep(SLEEP_BETWEEN)
+    total = len(photos)
 
     # 중복 제거
     seen, dedup = set(), []
@@ -138,24 +285,29 @@ def main():
         dedup.append(rec)
 
     # 저장
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    (OUT_DIR / "oldphotos_ai_with.json").write_text(
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "oldphotos_ai_with.json").write_text(
         json.dumps(dedup, ensure_ascii=False, indent=2), encoding="utf-8"
     )
-    (OUT_DIR / "oldphotos_ai_nolandmark.json").write_text(
+    (out_dir / "oldphotos_ai_nolandmark.json").write_text(
         json.dumps(no_landmark, ensure_ascii=False, indent=2), encoding="utf-8"
     )
 
-    with open(OUT_DIR / "oldphotos_ai_landmarks.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["path","landmark","score","lat","lng","time"])
+    with open(out_dir / "oldphotos_ai_landmarks.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["path","landmark","score","lat","lng","time","dup_of"])
         writer.writeheader()
         writer.writerows(rows)
 
     print("\n=== 완료 ===")
-    print(f"총 처리 파일: {total}")
+    print(f"총 처리 파일: {total} ({elapsed:.1f}초, {total / elapsed if elapsed else 0:.1f}장/초, "
+          f"요청 {annotate.stats['requests']}회, 재시도 {annotate.stats['retries']}회)")
+    print(f"Vision 대상: {len(reps)} (캐시 사용: {from_cache} | 새로 조회: {done - from_cache}) | "
+          f"비슷한 사진으로 생략: {total - len(reps)}")
     print(f"랜드마크 인식됨: {len(dedup)} | 미검출: {len(no_landmark)}")
-    print(f"- JSON 저장: {OUT_DIR/'oldphotos_ai_with.json'}")
-    print(f"- JSON 저장: {OUT_DIR/'oldphotos_ai_nolandmark.json'}")
-    print(f"- CSV 저장 : {OUT_DIR/'oldphotos_ai_landmarks.csv'}")
+    print(f"- JSON 저장: {out_dir/'oldphotos_ai_with.json'}")
+    print(f"- JSON 저장: {out_dir/'oldphotos_ai_nolandmark.json'}")
+    print(f"- CSV 저장 : {out_dir/'oldphotos_ai_landmarks.csv'}")
+    print(f"- 캐시     : {out_dir/CACHE_NAME}")
 
-if __name__ == "__main__":
\ No newline at end of file
+if __name__ == "__main__":
+    main()
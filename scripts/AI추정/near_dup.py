@@ -0,0 +1,71 @@
+# near_dup.py
+# 목적:
+#  - 연사/보정본/백업 복사본처럼 거의 같은 사진을 묶어서 대표 한 장만 Vision 호출 + 좌표로 출력
+#  - dHash: 9x8 흑백 썸네일에서 가로로 이웃한 픽셀 밝기 비교 → 64비트
+#    (JPEG는 draft로 1/8 크기 디코딩이라 원본 전체를 풀지 않음, 해상도/압축률/약한 보정에 강함)
+#  - 해밍 거리 r 이내 검색은 multi-index 해시 테이블
+#      64비트를 r+1개 조각(r=4면 13비트씩)으로 나눠 조각마다 dict(조각 값 → 사진 번호)
+#      거리 ≤ r이면 비둘기집 원리로 적어도 한 조각은 완전히 같음 → 같은 조각 버킷만 후보로 보고 실제 거리 확인
+#      조각이 넓을수록 버킷이 작아서 후보가 적음 (수십만 장도 해시 조회 몇 번)
+#  - 묶기: 입력 순서대로 보면서 가까운 대표가 있으면 그 그룹, 없으면 새 대표
+#    (대표끼리만 비교 → 조금씩 달라지는 사진이 사슬처럼 한 그룹으로 이어지지 않음)
+
+import io
+import numpy as np
+from PIL import Image, ImageOps
+
+# === 설정 ===
+DUP_RADIUS = 4      # 이 해밍 거리 이하면 같은 사진으로 봄
+MIN_BITS = 8        # 1(또는 0) 비트가 이보다 적은 해시(거의 단색 사진)는 묶지 않음
+
+def dhash(content: bytes):
+    """이미지 바이트 → 64비트 dHash (0 ~ 2^64-1) / 못 읽으면 None"""
+    try:
+        with Image.open(io.BytesIO(content)) as im:
+            im.draft("L", (72, 64))
+            im = ImageOps.exif_transpose(im).convert("L")
+            g = np.asarray(im.resize((9, 8), Image.BILINEAR, reducing_gap=2.0), dtype=np.int16)
+    except Exception:
+        return None
+    return int.from_bytes(np.packbits(g[:, 1:] > g[:, :-1]).tobytes(), "big")
+
+def to_signed(h):
+    """SQLite INTEGER(부호 있는 64비트)에 넣기 위한 변환"""
+    return None if h is None else (h - (1 << 64) if h >= 1 << 63 else h)
+
+def from_signed(v):
+    return None if v is None else v & ((1 << 64) - 1)
+
+def _bits(x):
+    return bin(x).count("1")
+
+if hasattr(int, "bit_count"):  # Python 3.10+
+    _bits = int.bit_count
+
+def group_near_duplicates(hashes, radius=DUP_RADIUS):
+    """
+    해시 목록(None 허용) → rep_of: 사진마다 대표 사진 번호 (대표/단독 사진은 자기 번호)
+    대표는 그룹에서 입력 순서가 가장 앞선 사진
+    """
+    if not 0 <= radius < 64:
+        raise ValueError("radius는 0 ~ 63")
+    m = radius + 1
+    cuts = [(64 * k // m, (1 << (64 * (k + 1) // m - 64 * k // m)) - 1) for k in range(m)]  # (시작 비트, 마스크)
+    buckets = [{} for _ in range(m)]
+    rep_of = list(range(len(hashes)))
+    for i, h in enumerate(hashes):
+        if h is None or not MIN_BITS <= _bits(h) <= 64 - MIN_BITS:
+            continue
+        parts = [(h >> lo) & mask for lo, mask in cuts]
+        best, best_d = None, radius + 1
+        for c, v in enumerate(parts):
+            for j in buckets[c].get(v, ()):
+                d = _bits(h ^ hashes[j])
+                if d < best_d or (d == best_d and best is not None and j < best):  # 같은 거리면 앞선 대표
+                    best, best_d = j, d
+        if best is not None:
+            rep_of[i] = best
+            continue
+        for c, v in enumerate(parts):
+            buckets[c].setdefault(v, []).append(i)
+    return rep_of
@@ -0,0 +1,88 @@
+# vision_cache.py
+# 목적:
+#  - Vision 랜드마크 결과를 SQLite(WAL) 단일 파일에 저장 → 중단된 스캔은 이어서, 재실행은 새 파일만 업로드
+#  - 결과 키: 사진 내용 해시(sha1) + 모델 설정(PARAMS: max_results, 업로드 최대 변 길이 등)
+#      → 파일을 옮기거나 이름을 바꿔도 다시 보내지 않음, 설정을 바꾸면 그 설정으로 새로 받음
+#      → "랜드마크 없음"도 결과로 저장 (landmark = NULL), 호출 실패는 저장하지 않음 (다음 실행에서 재시도)
+#  - 경로별 size/mtime → 해시/촬영시각/dHash(near_dup.py)도 기록 → 안 바뀐 파일은 읽지도 않음
+#  - 스캐너 스레드 여러 개가 같이 쓰므로 연결 하나 + 잠금
+
+import hashlib, sqlite3, threading
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key     TEXT PRIMARY KEY,   -- 정규화 경로 (소문자 posix)
+    size    INTEGER,
+    mtime   REAL,
+    hash    TEXT NOT NULL,      -- 원본 파일 내용 sha1
+    time    TEXT,               -- EXIF 촬영시각 또는 NULL
+    dhash   INTEGER             -- 지각 해시 (부호 있는 64비트) 또는 NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    hash     TEXT NOT NULL,
+    params   TEXT NOT NULL,     -- 모델 설정 문자열
+    landmark TEXT,              -- NULL = 랜드마크 없음
+    score    REAL,
+    lat      REAL,
+    lng      REAL,
+    PRIMARY KEY (hash, params)
+);
+"""
+
+_lock = threading.Lock()
+
+def content_hash(content: bytes):
+    return hashlib.sha1(content).hexdigest()
+
+def open_cache(db_path: Path):
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    if "dhash" not in cols:  # dhash 이전에 만든 캐시
+        conn.execute("ALTER TABLE files ADD COLUMN dhash INTEGER")
+    return conn
+
+def lookup_file(conn, key, size, mtime):
+    """size/mtime이 그대로면 (해시, 촬영시각, dHash), 아니면 None"""
+    with _lock:
+        row = conn.execute("SELECT size, mtime, hash, time, dhash FROM files WHERE key = ?", (key,)).fetchone()
+    if row and row[0] == size and row[1] == mtime:
+        return row[2], row[3], row[4]
+    return None
+
+def lookup_result(conn, h, params):
+    """
+    저장된 결과: (이름, 점수, lat, lng) / 랜드마크 없음: False / 아직 없음: None
+    (pick_best_landmark와 같은 모양, 없음과 미조회를 구분)
+    """
+    with _lock:
+        row = conn.execute("SELECT landmark, score, lat, lng FROM results WHERE hash = ? AND params = ?",
+                           (h, params)).fetchone()
+    if row is None:
+        return None
+    return tuple(row) if row[0] is not None else False
+
+def save(conn, file_rows, result_rows, params):
+    """
+    file_rows: (key, size, mtime, hash, time, dhash) 목록
+    result_rows: (hash, best 또는 None) 목록 → best는 pick_best_landmark 결과
+    """
+    with _lock, conn:
+        conn.executemany("""
+            INSERT INTO files (key, size, mtime, hash, time, dhash) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                size = excluded.size, mtime = excluded.mtime, hash = excluded.hash, time = excluded.time,
+                dhash = excluded.dhash
+        """, file_rows)
+        conn.executemany("""
+            INSERT OR REPLACE INTO results (hash, params, landmark, score, lat, lng) VALUES (?, ?, ?, ?, ?, ?)
+        """, [(h, params) + (tuple(best) if best else (None, None, None, None)) for h, best in result_rows])
+
+def count_results(conn, params):
+    """(저장된 결과 수, 그중 랜드마크 있는 수)"""
+    with _lock:
+        return conn.execute("SELECT COUNT(*), COUNT(landmark) FROM results WHERE params = ?", (params,)).fetchone()
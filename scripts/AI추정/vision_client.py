@@ -0,0 +1,158 @@
+# vision_client.py
+# 목적:
+#  - Vision API 랜드마크 인식을 여러 장씩 묶어서(batch_annotate_images) 호출하는 공용 클라이언트
+#  - 최근 1초 창(sliding window)으로 초당 이미지 수(MAX_QPS)를 지킴 → 여러 스레드가 동시에 호출해도 한도 안에서 꽉 채워 씀
+#    (예전처럼 "호출 + sleep"이 아니라서 응답 대기 시간이 한도를 깎아 먹지 않음)
+#    토큰 버킷은 1초 안에 용량 + 초당 양만큼 몰아 보낼 수 있어서 서버의 초당 한도에 걸림(429) → 서버와 같은 창으로 셈
+#  - 요청 하나의 이미지 수는 min(BATCH_SIZE, 초당 이미지 수) → 한 요청이 1초 한도를 넘지 않음
+#  - 할당량 초과(429 / RESOURCE_EXHAUSTED)와 일시 오류(503 등)는 지수 백오프 + 지터로 재시도
+#  - 백엔드 두 가지
+#      client : google-cloud-vision 라이브러리 (서비스 계정, 실제 사용)
+#      rest   : images:annotate REST 엔드포인트에 JSON POST (표준 라이브러리만 사용)
+#               → fake_vision_server.py(로컬 가짜 서버)로 오프라인 테스트/벤치마크
+#  - 응답은 REST JSON 형식의 dict 목록으로 통일: [{"landmarkAnnotations": [...], "error": {...}}, ...]
+
+import base64, json, random, threading, time
+from collections import deque
+import urllib.error, urllib.request
+
+BATCH_SIZE = 16         # images:annotate 요청 하나에 넣을 수 있는 최대 이미지 수
+MAX_RESULTS = 3
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0      # 초. 재시도마다 2배 (+ 지터)
+BACKOFF_MAX = 60.0
+WINDOW_SLACK = 1.1      # 한도를 세는 창을 이만큼 늘림 (서버에 도착하는 시각은 보낸 시각보다 조금씩 흔들림)
+RETRY_HTTP = {429, 500, 502, 503, 504}
+RETRY_GRPC = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+              "DeadlineExceeded", "GatewayTimeout"}
+
+class SlidingWindow:
+    """최근 window초 동안 보낸 양이 limit을 넘지 않게. acquire(n)은 창에 자리가 날 때까지 기다림"""
+    def __init__(self, limit, window=1.0):
+        self.limit = float(limit)
+        self.window = float(window)
+        self.events = deque()  # (보낸 시각, 양)
+        self.used = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        n = min(float(n), self.limit)  # 한 번에 limit보다 많이 요구하면 영원히 못 받음
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.events and now - self.events[0][0] >= self.window:
+                    self.used -= self.events.popleft()[1]
+                if self.used + n <= self.limit:
+                    self.events.append((now, n))
+                    self.used += n
+                    return
+                # 앞에서부터 빠져서 n만큼 자리가 나는 시각까지
+                free = self.limit - self.used
+                for t, k in self.events:
+                    free += k
+                    if free >= n:
+                        wait = t + self.window - now
+                        break
+            time.sleep(max(wait, 0.001))
+
+class RetryableError(Exception):
+    pass
+
+# === 백엔드 ===
+def _client_backend(max_results):
+    """google-cloud-vision 라이브러리 → 이미지 바이트 목록을 받아 응답 dict 목록을 돌려주는 함수"""
+    from google.cloud import vision
+    client = vision.ImageAnnotatorClient()
+    feature = {"type_": vision.Feature.Type.LANDMARK_DETECTION, "max_results": max_results}
+
+    def call(contents):
+        try:
+            resp = client.batch_annotate_images(
+                requests=[{"image": {"content": c}, "features": [feature]} for c in contents])
+        except Exception as e:
+            if type(e).__name__ in RETRY_GRPC:
+                raise RetryableError(f"{type(e).__name__}: {e}") from e
+            raise
+        out = []
+        for r in resp.responses:
+            anns = [{"description": a.description, "score": float(getattr(a, "score", 0.0)),
+                     "locations": [{"latLng": {"latitude": l.lat_lng.latitude, "longitude": l.lat_lng.longitude}}
+                                   for l in a.locations]}
+                    for a in r.landmark_annotations]
+            item = {"landmarkAnnotations": anns}
+            if r.error.message:
+                item["error"] = {"code": r.error.code, "message": r.error.message}
+            out.append(item)
+        return out
+    return call
+
+def _rest_backend(endpoint, max_results, api_key=None, timeout=60):
+    """images:annotate REST 엔드포인트 (실제 API는 api_key 필요, 로컬 가짜 서버는 불필요)"""
+    url = endpoint + (("&" if "?" in endpoint else "?") + "key=" + api_key if api_key else "")
+
+    def call(contents):
+        body = json.dumps({"requests": [
+            {"image": {"content": base64.b64encode(c).decode("ascii")},
+             "features": [{"type": "LANDMARK_DETECTION", "maxResults": max_results}]}
+            for c in contents]}).encode("utf-8")
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                data = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            if e.code in RETRY_HTTP:
+                raise RetryableError(f"HTTP {e.code}") from e
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
+        return data.get("responses", [])
+    return call
+
+def make_annotator(endpoint=None, max_qps=3, max_results=MAX_RESULTS, api_key=None):
+    """
+    이미지 바이트 목록 → 응답 dict 목록 (입력 순서). 스레드 여러 개에서 같이 써도 됨
+    endpoint가 있으면 REST 백엔드, 없으면 google-cloud-vision 라이브러리
+    한도는 이미지 단위로 셈 (Vision 할당량도 이미지 단위)
+    annotate.batch_size개보다 많이 주면 그만큼씩 나눠서 요청
+    """
+    call = _rest_backend(endpoint, max_results, api_key) if endpoint else _client_backend(max_results)
+    batch_size = max(1, min(BATCH_SIZE, int(max_qps)))
+    # 초당 1장 미만이면 창을 늘려서 한 장씩 (예: 0.5 → 2초에 1장)
+    limiter = SlidingWindow(max(1.0, max_qps), max(1.0, 1.0 / max_qps) * WINDOW_SLACK)
+    stats = {"requests": 0, "retries": 0, "lock": threading.Lock()}
+
+    def annotate(contents):
+        return [r for k in range(0, len(contents), batch_size) for r in _annotate(contents[k:k + batch_size])]
+
+    def _annotate(contents):
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire(len(contents))
+            try:
+                with stats["lock"]:
+                    stats["requests"] += 1
+                return call(contents)
+            except RetryableError as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random())
+                with stats["lock"]:
+                    stats["retries"] += 1
+                print(f"  ⏳ 재시도 {attempt + 1}/{MAX_RETRIES} ({e}) - {delay:.1f}초 후")
+                time.sleep(delay)
+    annotate.stats = stats
+    annotate.batch_size = batch_size
+    return annotate
+
+def pick_best_landmark(response):
+    """응답 dict 하나 → (이름, 점수, lat, lng) / 위치 있는 랜드마크가 없으면 None"""
+    best = None
+    for ann in response.get("landmarkAnnotations") or []:
+        locs = ann.get("locations") or []
+        if not locs:
+            continue
+        latlng = locs[0].get("latLng") or {}
+        score = float(ann.get("score", 0.0))
+        if best is None or score > best[1]:
+            best = (ann.get("description", ""), score,
+                    float(latlng.get("latitude", 0.0)), float(latlng.get("longitude", 0.0)))
+    return best
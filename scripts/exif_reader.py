@@ -0,0 +1,161 @@
+# exif_reader.py
+# 목적:
+#  - Pillow로 이미지를 열지 않고 JPEG APP1 / TIFF 헤더의 IFD 바이트만 읽어서
+#    GPS 좌표와 촬영시각만 뽑아내는 경량 EXIF 리더
+#  - JPEG: 마커를 따라가며 "Exif\0\0" APP1 세그먼트(최대 64KB)만 읽음
+#  - TIFF: mmap으로 열어서 필요한 IFD 엔트리만 참조
+#  - 그 외 형식(PNG/HEIC 등)은 None을 반환 → 호출 측에서 Pillow로 폴백
+
+import mmap, struct
+from pathlib import Path
+from datetime import datetime
+
+# 필요한 태그만
+TAG_DATETIME = 0x0132           # IFD0 DateTime
+TAG_EXIF_IFD = 0x8769           # ExifIFD 포인터
+TAG_GPS_IFD = 0x8825            # GPS IFD 포인터
+TAG_DATETIME_ORIGINAL = 0x9003  # ExifIFD DateTimeOriginal
+GPS_LAT_REF, GPS_LAT, GPS_LNG_REF, GPS_LNG = 1, 2, 3, 4
+
+# TIFF 타입별 바이트 크기
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+EXIF_HEADER = b"Exif\x00\x00"
+TIFF_MAGICS = (b"II*\x00", b"MM\x00*")
+
+def _read_ifd(buf, offset, endian):
+    """IFD 하나를 {tag: (type, count, value_offset)} 로 읽기 (값은 필요할 때만 해석)"""
+    entries = {}
+    if offset <= 0 or offset + 2 > len(buf):
+        return entries, 0
+    (n,) = struct.unpack_from(endian + "H", buf, offset)
+    pos = offset + 2
+    for _ in range(n):
+        if pos + 12 > len(buf):
+            break
+        tag, typ, count = struct.unpack_from(endian + "HHI", buf, pos)
+        size = TYPE_SIZES.get(typ, 1) * count
+        if size <= 4:
+            value_off = pos + 8  # 4바이트 이하는 엔트리 안에 값이 들어있음
+        else:
+            (value_off,) = struct.unpack_from(endian + "I", buf, pos + 8)
+        entries[tag] = (typ, count, value_off)
+        pos += 12
+    return entries, n
+
+def _ascii(buf, entry):
+    typ, count, off = entry
+    raw = bytes(buf[off:off + count])
+    return raw.split(b"\x00", 1)[0].decode("ascii", "ignore").strip()
+
+def _long(buf, entry, endian):
+    typ, count, off = entry
+    fmt = endian + ("H" if typ == 3 else "I")
+    return struct.unpack_from(fmt, buf, off)[0]
+
+def _rationals(buf, entry, endian):
+    """RATIONAL/SRATIONAL 배열 -> float 리스트 (분모 0이면 None)"""
+    typ, count, off = entry
+    if typ not in (5, 10) or off + 8 * count > len(buf):
+        return None
+    fmt = endian + ("ii" if typ == 10 else "II")
+    out = []
+    for i in range(count):
+        num, den = struct.unpack_from(fmt, buf, off + 8 * i)
+        out.append(num / den if den else None)
+    return out
+
+def _dms_to_deg(dms, ref):
+    if not dms or len(dms) < 3 or None in dms[:3]:
+        return None
+    d, m, s = dms[:3]
+    deg = d + (m / 60.0) + (s / 3600.0)
+    if ref in ("S", "W"):
+        deg = -deg
+    return deg
+
+def _parse_time(s):
+    # 예: "2019:01:23 18:30:22"
+    try:
+        return datetime.strptime(s, "%Y:%m:%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return None
+
+def parse_tiff(buf):
+    """TIFF 구조(bytes/mmap)에서 (lat, lng, time_str) 추출"""
+    if len(buf) < 8 or bytes(buf[:4]) not in TIFF_MAGICS:
+        return None, None, None
+    endian = "<" if bytes(buf[:2]) == b"II" else ">"
+    (ifd0_off,) = struct.unpack_from(endian + "I", buf, 4)
+    ifd0, _ = _read_ifd(buf, ifd0_off, endian)
+
+    time_str = None
+    if TAG_EXIF_IFD in ifd0:
+        exif_ifd, _ = _read_ifd(buf, _long(buf, ifd0[TAG_EXIF_IFD], endian), endian)
+        if TAG_DATETIME_ORIGINAL in exif_ifd:
+            time_str = _parse_time(_ascii(buf, exif_ifd[TAG_DATETIME_ORIGINAL]))
+    if time_str is None and TAG_DATETIME in ifd0:
+        time_str = _parse_time(_ascii(buf, ifd0[TAG_DATETIME]))
+
+    lat = lng = None
+    if TAG_GPS_IFD in ifd0:
+        gps, _ = _read_ifd(buf, _long(buf, ifd0[TAG_GPS_IFD], endian), endian)
+        lat_ref = _ascii(buf, gps[GPS_LAT_REF]) if GPS_LAT_REF in gps else "N"
+        lng_ref = _ascii(buf, gps[GPS_LNG_REF]) if GPS_LNG_REF in gps else "E"
+        if GPS_LAT in gps:
+            lat = _dms_to_deg(_rationals(buf, gps[GPS_LAT], endian), lat_ref)
+        if GPS_LNG in gps:
+            lng = _dms_to_deg(_rationals(buf, gps[GPS_LNG], endian), lng_ref)
+    return lat, lng, time_str
+
+def _find_jpeg_app1(f):
+    """JPEG 마커를 따라가며 EXIF APP1 페이로드(TIFF 부분)만 반환. 없으면 None"""
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        b = f.read(1)
+        if not b:
+            return None
+        if b != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # 채움 바이트
+            marker = f.read(1)
+        if not marker:
+            return None
+        m = marker[0]
+        if m in (0xD8, 0x01) or 0xD0 <= m <= 0xD7:
+            continue  # 길이 없는 마커
+        if m in (0xDA, 0xD9):
+            return None  # 이미지 데이터 시작/끝 → EXIF 없음
+        seg_len = f.read(2)
+        if len(seg_len) < 2:
+            return None
+        (length,) = struct.unpack(">H", seg_len)
+        if length < 2:
+            return None  # 길이에 자기 자신(2바이트)도 안 들어감 → 깨진 파일, 더 진행할 수 없음
+        if m == 0xE1:
+            payload = f.read(length - 2)
+            if payload.startswith(EXIF_HEADER):
+                return payload[len(EXIF_HEADER):]
+            continue  # XMP 등 다른 APP1
+        f.seek(length - 2, 1)
+
+def read_exif_basic(img_path: Path):
+    """
+    헤더만 읽어서 (lat, lng, time_str) 반환
+    JPEG/TIFF가 아니면 None 반환 (호출 측에서 Pillow 폴백)
+    """
+    try:
+        with open(img_path, "rb") as f:
+            head = f.read(4)
+            if head[:2] == b"\xff\xd8":
+                f.seek(0)
+                tiff = _find_jpeg_app1(f)
+                return parse_tiff(tiff) if tiff else (None, None, None)
+            if head in TIFF_MAGICS:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return parse_tiff(mm)
+            return None
+    except (OSError, ValueError, struct.error):
+        return None, None, None
@@ -0,0 +1,90 @@
+# flight_detect.py
+# 목적:
+#  - flight_periods를 손으로 적지 않아도 비행 구간과 GPS 오류를 속도로 찾아냄
+#  - 소스 하나의 사진을 시간순으로 정렬한 뒤, 이웃한 사진 사이 거리/시간 차로 속도를 한 번에 계산 (NumPy)
+#    · 글리치: 앞뒤 사진 모두와 순간이동 속도(TELEPORT_KMH 초과)인데 앞 사진 → 뒤 사진은 가까움
+#      (혼자 튀었다 돌아온 점) → 히트맵에서 제외
+#    · 비행: 글리치를 뺀 뒤 FLIGHT_KMH를 넘는 구간이 이어진 묶음 (총 거리 MIN_FLIGHT_KM 이상)
+#      출발/도착 사진은 그대로 두고 그 사이(기내) 사진만 비행으로 분류 → 공항 근처 사진은 남음
+#      경유지: 사이 사진의 앞뒤 구간 모두 순항 속도(CRUISE_KMH)로 날았다고 쳐도 STOPOVER_SEC 넘게 남으면
+#      땅에 머문 것으로 보고 그 사진에서 비행을 나눔 (경유지 사진은 도착/출발 사진으로 남음)
+#      (짧은 경유 중 사진 한 장은 기내 사진과 구분이 안 됨 → 비행으로 빠질 수 있음)
+#      시간대 혼동으로 속도가 TELEPORT_KMH를 넘는 경우도 돌아오지 않으면 비행으로 봄
+#  - flight_periods(수동 목록)는 감지가 틀린 경우를 위한 선택 사항으로만 사용
+
+import numpy as np
+from geo import haversine_km
+from timestamps import epoch_seconds
+
+# === 설정 ===
+FLIGHT_KMH = 300.0      # 평균 속도가 이보다 빠르면 비행 후보 (고속철도보다 빠르게)
+TELEPORT_KMH = 1200.0   # 여객기로도 불가능한 속도 → 글리치 후보
+MIN_FLIGHT_KM = 300.0   # 이보다 짧은 묶음은 비행으로 보지 않음
+MIN_EDGE_KM = 30.0      # 이보다 가까운 이동은 속도를 보지 않음 (GPS 흔들림)
+MIN_DT_SEC = 60         # 시간 차가 이보다 작으면 이 값으로 계산 (0으로 나누기 방지)
+GLITCH_RATIO = 0.5      # 앞 → 뒤 거리가 튄 거리의 이 비율보다 작으면 "돌아온 것"
+CRUISE_KMH = 900.0      # 여객기 순항 속도 (경유지 체류 시간 어림용)
+STOPOVER_SEC = 2 * 3600 # 사이 사진 앞뒤로 모두 이만큼 넘게 땅에 있었으면 경유지
+
+def _speeds(lats, lngs, secs):
+    d = haversine_km(lats[:-1], lngs[:-1], lats[1:], lngs[1:])
+    dt = np.maximum(np.diff(secs), MIN_DT_SEC)
+    return d, d / dt * 3600.0
+
+def _format(sec):
+    return str(np.datetime64(int(sec), "s")).replace("T", " ")
+
+def detect_flights(lats, lngs, times, flight_kmh=FLIGHT_KMH, teleport_kmh=TELEPORT_KMH,
+                   min_flight_km=MIN_FLIGHT_KM):
+    """
+    한 소스의 사진 좌표/시간(None 허용, 순서 무관) →
+      {"flight": 사진별 비행 이름 또는 None, "glitch": 사진별 bool 배열, "legs": [비행 구간]}
+    비행 구간: {"name", "dep", "arr", "points", "distance_km", "start_time", "end_time"}
+      dep/arr = 출발/도착 사진 번호, points = 기내 사진 번호 목록 (모두 입력 순서 기준)
+    """
+    n = len(times)
+    flight = [None] * n
+    glitch = np.zeros(n, dtype=bool)
+    idx = np.array([i for i, t in enumerate(times) if t is not None], dtype=np.int64)
+    if len(idx) < 3:
+        return {"flight": flight, "glitch": glitch, "legs": []}
+    secs = np.asarray(epoch_seconds([times[i] for i in idx]), dtype=np.int64)
+    order = np.argsort(secs, kind="stable")
+    idx, secs = idx[order], secs[order]
+    lats = np.asarray(lats, dtype=np.float64)[idx]
+    lngs = np.asarray(lngs, dtype=np.float64)[idx]
+
+    # 1) 글리치: 혼자 튀었다 돌아온 점
+    d, v = _speeds(lats, lngs, secs)
+    skip = haversine_km(lats[:-2], lngs[:-2], lats[2:], lngs[2:])
+    spike = (v[:-1] > teleport_kmh) & (v[1:] > teleport_kmh) & (skip < GLITCH_RATIO * np.minimum(d[:-1], d[1:]))
+    bad = np.zeros(len(idx), dtype=bool)
+    bad[1:-1] = spike
+    glitch[idx[bad]] = True
+
+    # 2) 글리치를 뺀 나머지에서 빠른 구간이 이어진 묶음 = 비행
+    idx, secs, lats, lngs = idx[~bad], secs[~bad], lats[~bad], lngs[~bad]
+    d, v = _speeds(lats, lngs, secs)
+    fast = (v > flight_kmh) & (d > MIN_EDGE_KM)
+    # 구간마다 순항 속도로 날고 남는 시간 = 출발/도착 쪽에서 땅에 있던 시간 (최소 어림)
+    ground = np.diff(secs) - d / CRUISE_KMH * 3600.0
+    stop = np.zeros(len(idx), dtype=bool)
+    stop[1:-1] = np.minimum(ground[:-1], ground[1:]) > STOPOVER_SEC
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], fast.astype(np.int8), [0]])))
+    runs = []
+    for a, b in zip(edges[::2], edges[1::2]):  # 빠른 구간 a..b-1 → 경유지 사진에서 나눔
+        cuts = [a] + (np.flatnonzero(stop[a + 1:b]) + a + 1).tolist() + [b]
+        runs.extend(zip(cuts[:-1], cuts[1:]))
+    legs = []
+    for a, b in runs:  # 구간 a..b-1 → 사진 a(출발) .. b(도착)
+        dist = float(d[a:b].sum())
+        if dist < min_flight_km:
+            continue
+        name = f"자동 감지 {_format(secs[a])[:16]} ({dist:,.0f}km)"
+        inside = idx[a + 1:b].tolist()
+        for i in inside:
+            flight[i] = name
+        legs.append({"name": name, "dep": int(idx[a]), "arr": int(idx[b]), "points": inside,
+                     "distance_km": round(dist, 1),
+                     "start_time": _format(secs[a]), "end_time": _format(secs[b])})
+    return {"flight": flight, "glitch": glitch, "legs": legs}
@@ -0,0 +1,85 @@
+# flight_index.py
+# 목적:
+#  - flight_periods(비행기 탑승 시간 목록)를 버퍼 적용 후 한 번만 파싱해서
+#    시작시각 기준 정렬 + 겹치는 구간 병합 → 이분탐색으로 조회
+#  - 정렬된 시각 배열 전체를 한 번의 병합(merge) 패스로 분류하는 배치 API
+#  - 기존 is_during_flight(photo_time, flight_periods)와 결과 동일
+#    (겹치는 비행이 있으면 목록에서 먼저 나온 비행 이름 반환)
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+def compile_flights(periods, buffer=timedelta(0)):
+    """
+    flight_periods → 조회용 인덱스
+      {"starts": [병합구간 시작], "ends": [병합구간 끝], "members": [[(순번, 시작, 끝, 이름), ...]]}
+    """
+    spans = []
+    for order, f in enumerate(periods):
+        try:
+            start = datetime.strptime(f["start"], TIME_FMT) - buffer
+            end = datetime.strptime(f["end"], TIME_FMT) + buffer
+            name = f["name"]
+        except (KeyError, ValueError) as e:
+            print(f"⚠️  비행기 시간 형식 오류: {f}, 에러: {e}")
+            continue
+        spans.append((start, end, order, name))
+    spans.sort()
+
+    starts, ends, members = [], [], []
+    for start, end, order, name in spans:
+        if ends and start <= ends[-1]:
+            # 앞 구간과 겹침 → 병합
+            ends[-1] = max(ends[-1], end)
+            members[-1].append((order, start, end, name))
+        else:
+            starts.append(start)
+            ends.append(end)
+            members.append([(order, start, end, name)])
+    for group in members:
+        group.sort()  # 목록 순서 (기존 선형 탐색과 같은 우선순위)
+    return {"starts": starts, "ends": ends, "members": members}
+
+def _name_in_group(group, t):
+    for _, start, end, name in group:
+        if start <= t <= end:
+            return name
+    return None
+
+def is_during_flight(photo_time, index):
+    """사진 촬영 시간이 비행기 탑승 시간 중인지 → (True/False, 비행 이름)"""
+    if not photo_time:
+        return False, None
+    i = bisect_right(index["starts"], photo_time) - 1
+    if i < 0 or photo_time > index["ends"][i]:
+        return False, None
+    name = _name_in_group(index["members"][i], photo_time)
+    return (name is not None), name
+
+def classify_sorted(times, index):
+    """
+    오름차순 정렬된 시각 배열 → 각 시각의 비행 이름(해당 없으면 None) 리스트
+    시각 배열과 구간 목록을 한 번씩만 훑음 (O(사진 + 비행))
+    """
+    starts, ends, members = index["starts"], index["ends"], index["members"]
+    out = []
+    j, n = 0, len(starts)
+    for t in times:
+        while j < n and ends[j] < t:
+            j += 1
+        if j < n and starts[j] <= t:
+            out.append(_name_in_group(members[j], t))
+        else:
+            out.append(None)
+    return out
+
+def classify(times, index):
+    """정렬 안 된 시각 배열(None 허용)도 처리 → 입력 순서대로 비행 이름 또는 None"""
+    order = sorted((i for i, t in enumerate(times) if t is not None), key=lambda i: times[i])
+    names = classify_sorted([times[i] for i in order], index)
+    out = [None] * len(times)
+    for i, name in zip(order, names):
+        out[i] = name
+    return out
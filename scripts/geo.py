@@ -0,0 +1,28 @@
+# geo.py
+# 목적:
+#  - 여러 스크립트에서 쓰는 구면 거리 계산을 NumPy 배열 단위로 한 곳에 모음
+#  - haversine_km: 좌표 배열끼리 거리 (루프 없이 한 번에)
+#  - unit_xyz / chord: 위경도 → 단위 구 3차원 좌표, 지표 거리 → 직선(현) 거리 (격자 인덱스용)
+
+import numpy as np
+
+EARTH_KM = 6371.0088
+
+def unit_xyz(lats, lngs):
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    c = np.cos(lat)
+    return np.stack([c * np.cos(lng), c * np.sin(lng), np.sin(lat)], axis=-1)
+
+def chord(km):
+    """지표 거리(km) → 단위 구 위 직선 거리"""
+    return 2.0 * np.sin(np.asarray(km, dtype=np.float64) / (2.0 * EARTH_KM))
+
+def chord_to_km(c):
+    return 2.0 * EARTH_KM * np.arcsin(np.clip(np.asarray(c, dtype=np.float64) / 2.0, 0.0, 1.0))
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """두 좌표(배열) 사이 거리 km (브로드캐스트 가능)"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lng1, lat2, lng2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2.0 * EARTH_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
@@ -1,13 +1,25 @@
-import os, re, json
-from pathlib import Path
+import os, re, json, zipfile
+from pathlib import Path, PurePosixPath
+from concurrent.futures import ProcessPoolExecutor
+import photo_identity
 
 # Json 파일을 저장할 폴더로 설정하세요.
-os.chdir(r"C:\Users\jsbae\My_Drive\github\travel_map\scripts")
-print("현재 작업 디렉토리:", os.getcwd())
+OUT_DIR = r"C:\Users\jsbae\My_Drive\github\travel_map\scripts"
 
 # → 압축을 푼 Google Photos 최상위 폴더로 바꾸세요
 ROOT = Path(r"C:\Users\jsbae\OneDrive - KIF\g_phto\Takeout\Google Photos")
 
+# → 압축을 풀지 않고 읽을 경우: takeout-*.zip 파일들이 있는 폴더 (None이면 ROOT 폴더 사용)
+#    zip 안의 *.json 사이드카만 읽으므로 수십 GB를 풀 필요가 없음
+ZIP_DIR = Path(r"C:\Users\jsbae\OneDrive - KIF\g_phto")
+ZIP_GLOB = "takeout-*.zip"
+
+# 병렬 처리 (zip 하나 / 연도 폴더 하나가 작업 1개)
+WORKERS = os.cpu_count() or 1
+
+# 카메라 앨범(newphotos)에 있는 사진은 빼기 (photo_identity.sqlite, 소스 우선순위 newphotos > takeout > oldphotos)
+IDENTITY = True
+
 # "Photos from 2015", "Photos from 2016" 등 연도별 폴더만 처리
 YEAR_DIR_RE = re.compile(r"^Photos from (\d{4})$")
 
@@ -16,54 +28,109 @@ def is_valid_coordinate(lat, lng):
     # None 체크
     if lat is None or lng is None:
         return False
-    
+
     # 정확한 (0,0) 좌표만 제외
     if lat == 0.0 and lng == 0.0:
         return False
-    
+
     # 위도 범위 체크 (-90 ~ 90)
     if lat < -90 or lat > 90:
         return False
-    
+
     # 경도 범위 체크 (-180 ~ 180)
     if lng < -180 or lng > 180:
         return False
-    
+
     return True
 
-with_location = []
-without_location = []
+def to_record(name, data):
+    """사이드카 JSON 하나 → (with 레코드, None) 또는 (None, without 레코드)"""
+    geo = data.get("geoData") or {}
+    lat = geo.get("latitude")
+    lng = geo.get("longitude")
+    file = name.replace(".json", ".jpg")
 
-for child in ROOT.iterdir():
-    if not child.is_dir(): continue
-    if not YEAR_DIR_RE.match(child.name):  # 연도 폴더가 아니면 건너뜀
-        continue
+    # 유효한 좌표인지 확인
+    if is_valid_coordinate(lat, lng):
+        return {
+            "file": file,
+            "lat":  lat,
+            "lng":  lng,
+            "time": data.get("photoTakenTime",{}).get("formatted")
+        }, None
+    return None, {"file": file}
 
-    print(f"▶ {child.name} 폴더 검사 중...")
-    for js in child.rglob("*.json"):
+def parse_year_dir(year_dir):
+    """압축 푼 연도 폴더 하나 처리 → (with, without)"""
+    with_location, without_location = [], []
+    for js in sorted(Path(year_dir).rglob("*.json")):
         data = json.loads(js.read_text(encoding="utf-8"))
-        geo = data.get("geoData") or {}
-        lat = geo.get("latitude")
-        lng = geo.get("longitude")
-        
-        # 유효한 좌표인지 확인
-        if is_valid_coordinate(lat, lng):
-            with_location.append({
-                "file": js.name.replace(".json", ".jpg"),
-                "lat":  lat,
-                "lng":  lng,
-                "time": data.get("photoTakenTime",{}).get("formatted")
-            })
-        else:
-            without_location.append({
-                "file": js.name.replace(".json", ".jpg")
-            })
-
-# 결과 저장
-with open("takeout_with_location.json",   "w", encoding="utf-8") as f:
-    json.dump(with_location,   f, ensure_ascii=False, indent=2)
-with open("takeout_without_location.json","w", encoding="utf-8") as f:
-    json.dump(without_location,f, ensure_ascii=False, indent=2)
-
-print(f"\n완료! 위치 있는 사진: {len(with_location)}장")
-print(f"위치 없는 사진: {len(without_location)}장")
\ No newline at end of file
+        w, wo = to_record(js.name, data)
+        (with_location if w else without_location).append(w or wo)
+    return with_location, without_location
+
+def is_year_member(name):
+    """zip 멤버 경로가 연도 폴더 아래의 *.json 인지"""
+    p = PurePosixPath(name)
+    return p.suffix == ".json" and any(YEAR_DIR_RE.match(part) for part in p.parts[:-1])
+
+def parse_zip(zip_path):
+    """takeout zip 하나에서 연도 폴더의 *.json 멤버만 읽어서 처리 → (with, without)"""
+    with_location, without_location = [], []
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in sorted(zf.infolist(), key=lambda i: i.filename):
+            if info.is_dir() or not is_year_member(info.filename):
+                continue
+            try:
+                data = json.loads(zf.read(info).decode("utf-8"))
+            except (ValueError, zipfile.BadZipFile) as e:
+                print(f"[SKIP] {zip_path.name}:{info.filename} / {e}")
+                continue
+            w, wo = to_record(PurePosixPath(info.filename).name, data)
+            (with_location if w else without_location).append(w or wo)
+    return with_location, without_location
+
+def main():
+    os.chdir(OUT_DIR)
+    print("현재 작업 디렉토리:", os.getcwd())
+
+    zips = sorted(ZIP_DIR.glob(ZIP_GLOB)) if ZIP_DIR and ZIP_DIR.exists() else []
+    if zips:
+        func, tasks = parse_zip, zips
+        print(f"▶ zip {len(zips)}개에서 직접 읽기")
+    else:
+        func = parse_year_dir
+        tasks = sorted(c for c in ROOT.iterdir()
+                       if c.is_dir() and YEAR_DIR_RE.match(c.name))  # 연도 폴더가 아니면 건너뜀
+        print(f"▶ 연도 폴더 {len(tasks)}개 검사")
+
+    with_location = []
+    without_location = []
+
+    # 작업 순서대로 결과를 이어붙이므로 출력 순서가 항상 같음
+    with ProcessPoolExecutor(max_workers=max(1, WORKERS)) as ex:
+        for task, (w, wo) in zip(tasks, ex.map(func, tasks)):
+            print(f"  - {task.name}: 위치 {len(w)} / 위치없음 {len(wo)}")
+            with_location.extend(w)
+            without_location.extend(wo)
+
+    # 다른 소스와 중복 제거 (Takeout 시각은 UTC)
+    n_dup = 0
+    if IDENTITY:
+        identity = photo_identity.open_index()
+        with_location, n_dup = photo_identity.drop_duplicates(identity, "takeout", with_location, basis="utc")
+        photo_identity.close_index(identity)
+
+    # 결과 저장
+    with open("takeout_with_location.json",   "w", encoding="utf-8") as f:
+        json.dump(with_location,   f, ensure_ascii=False, indent=2)
+    with open("takeout_without_location.json","w", encoding="utf-8") as f:
+        json.dump(without_location,f, ensure_ascii=False, indent=2)
+
+    print(f"\n완료! 위치 있는 사진: {len(with_location)}장")
+    print(f"위치 없는 사진: {len(without_location)}장")
+    if IDENTITY:
+        print(f"다른 소스와 중복이라 뺀 사진: {n_dup}장")
+
+if __name__ == "__main__":
+    main()
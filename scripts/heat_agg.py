@@ -0,0 +1,129 @@
+# heat_agg.py
+# 목적:
+#  - 히트맵 좌표 집계 공용 엔진 (heat_data_gen.py, *_to_heat.py 에서 사용)
+#  - 좌표를 NumPy 배열로 받아 소수점 자리수 기준 정수 격자 셀로 양자화
+#  - (연도, 셀)을 int64 하나로 묶은 키에 np.unique → 중복 제거 + 연도별 그룹을 한 번에
+#  - 셀마다 점(사진) 수를 세어서 [lat, lng, count] 로 내보냄 (weighted=False면 [lat, lng])
+#    count는 원본 건수 그대로 → 병합 시 더하면 됨. 로그/상한 적용은 지도(my_travel_map.html)에서
+#  - 결과는 기존과 같은 {"all": [...], "2019": [...], ...} 구조
+
+import numpy as np
+
+DECIMALS = 2  # 소수점 둘째 자리 (약 1km, 도시 수준)
+
+def _grid(decimals):
+    scale = 10 ** decimals
+    n_lat = 180 * scale + 1
+    n_lng = 360 * scale + 1
+    return scale, n_lat, n_lng
+
+def quantize(lats, lngs, decimals=DECIMALS):
+    """위경도 배열 → 정수 격자 좌표 (round(x, decimals) * 10**decimals)"""
+    scale, _, _ = _grid(decimals)
+    qlat = np.rint(np.asarray(lats, dtype=np.float64) * scale).astype(np.int64)
+    qlng = np.rint(np.asarray(lngs, dtype=np.float64) * scale).astype(np.int64)
+    return qlat, qlng
+
+def cell_keys(lats, lngs, decimals=DECIMALS):
+    """위경도 배열 → 셀 키(int64). 같은 셀이면 같은 키"""
+    scale, _, n_lng = _grid(decimals)
+    qlat, qlng = quantize(lats, lngs, decimals)
+    return (qlat + 90 * scale) * n_lng + (qlng + 180 * scale)
+
+def keys_to_points(keys, decimals=DECIMALS, counts=None):
+    """셀 키 배열 → [[lat, lng], ...] 또는 counts가 있으면 [[lat, lng, count], ...]"""
+    scale, _, n_lng = _grid(decimals)
+    keys = np.asarray(keys, dtype=np.int64)
+    lat = ((keys // n_lng - 90 * scale) / scale).tolist()
+    lng = ((keys % n_lng - 180 * scale) / scale).tolist()
+    if counts is None:
+        return [list(p) for p in zip(lat, lng)]
+    return [list(p) for p in zip(lat, lng, np.asarray(counts, dtype=np.int64).tolist())]
+
+def _unique_counts(keys, weights=None, combine="sum"):
+    """
+    키 배열 → (고유 키, 키별 값). weights가 없으면 건수
+    combine="max"면 합 대신 최댓값 (같은 소스를 두 번 병합해도 결과가 같음)
+    """
+    if weights is None:
+        return np.unique(keys, return_counts=True)
+    uniq, inv = np.unique(keys, return_inverse=True)
+    if combine == "max":
+        out = np.zeros(len(uniq), dtype=np.float64)
+        np.maximum.at(out, inv, weights)
+    else:
+        out = np.bincount(inv, weights=weights, minlength=len(uniq))
+    return uniq, np.rint(out).astype(np.int64)
+
+def unique_points(lats, lngs, decimals=DECIMALS, weights=None, weighted=True, combine="sum"):
+    """좌표 배열 → 셀 단위로 중복 제거된 [[lat, lng, count], ...] (weighted=False면 [[lat, lng], ...])"""
+    if len(lats) == 0:
+        return []
+    uniq, counts = _unique_counts(cell_keys(lats, lngs, decimals),
+                                  np.asarray(weights, dtype=np.float64) if weights is not None else None,
+                                  combine)
+    return keys_to_points(uniq, decimals, counts if weighted else None)
+
+def heat_by_year(lats, lngs, years, decimals=DECIMALS, weights=None, weighted=True):
+    """
+    좌표 + 연도(int, 0이면 연도 없음) 배열 → {"all": [...], "YYYY": [...]}
+    all에는 모든 점, 연도별에는 연도가 있는 점만
+    weights: 점별 가중치(기존 셀의 count 등), 없으면 1
+    """
+    _, n_lat, n_lng = _grid(decimals)
+    n_cells = n_lat * n_lng
+    keys = cell_keys(lats, lngs, decimals)
+    years = np.asarray(years, dtype=np.int64)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+
+    result = {"all": []}
+    if len(keys):
+        uniq, counts = _unique_counts(keys, weights)
+        result["all"] = keys_to_points(uniq, decimals, counts if weighted else None)
+
+    has_year = years > 0
+    packed, counts = _unique_counts(years[has_year] * n_cells + keys[has_year],
+                                    weights[has_year] if weights is not None else None)
+    if len(packed):
+        # 연도 → 셀 순으로 정렬되어 있으므로 연도가 바뀌는 지점에서 자름
+        bounds = np.flatnonzero(np.diff(packed // n_cells)) + 1
+        for chunk, cnt in zip(np.split(packed, bounds), np.split(counts, bounds)):
+            result[str(int(chunk[0] // n_cells))] = keys_to_points(
+                chunk % n_cells, decimals, cnt if weighted else None)
+    return result
+
+def cell_counts(lats, lngs, years, decimals=DECIMALS, weights=None):
+    """
+    좌표 + 연도 배열 → (연도, qlat, qlng, count) 배열 4개. (연도, 셀)별로 합친 결과
+    heat_store.py에 저장할 때 사용 (all은 저장하지 않고 내보낼 때 연도를 합쳐서 만듦)
+    """
+    scale, n_lat, n_lng = _grid(decimals)
+    n_cells = n_lat * n_lng
+    years = np.asarray(years, dtype=np.int64)
+    packed, counts = _unique_counts(years * n_cells + cell_keys(lats, lngs, decimals),
+                                    np.asarray(weights, dtype=np.float64) if weights is not None else None)
+    cells = packed % n_cells
+    return (packed // n_cells, cells // n_lng - 90 * scale, cells % n_lng - 180 * scale,
+            np.asarray(counts, dtype=np.int64))
+
+def merge_heat(*heats, decimals=DECIMALS, weighted=True, combine="sum"):
+    """
+    여러 연도별 히트맵 dict를 셀 단위로 합침
+      combine="sum": 같은 셀의 count를 더함 (새로 추가된 사진만 병합할 때)
+      combine="max": 큰 값을 취함 (소스 전체를 다시 병합할 때, 중복 집계 방지)
+    [lat, lng] 형식(예전 데이터)은 count 1로 취급
+    """
+    merged = {}
+    keys = set()
+    for h in heats:
+        keys |= set(h)
+    for key in keys:
+        lats, lngs, ws = [], [], []
+        for h in heats:
+            for p in h.get(key) or []:
+                lats.append(p[0])
+                lngs.append(p[1])
+                ws.append(p[2] if len(p) > 2 else 1)
+        merged[key] = unique_points(lats, lngs, decimals, ws, weighted, combine)
+    return merged
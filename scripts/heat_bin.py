@@ -0,0 +1,79 @@
+# heat_bin.py
+# 목적:
+#  - heat_data.js(JSON 텍스트)를 대신할 수 있는 바이너리 히트맵 파일(heat_data.bin) 쓰기/읽기
+#  - 지도는 fetch → ArrayBuffer → Int32Array/Uint32Array 뷰로 바로 사용 (JS 파싱 없음)
+#
+# 형식 (리틀엔디언, 모든 배열은 4바이트 정렬):
+#   0  : b"HEAT"
+#   4  : u8 버전(1), u8 decimals, u8 flags(bit0 = 가중치 있음), u8 예약
+#   8  : u32 키 개수 K
+#   12 : u32 전체 셀 수 N
+#   16 : K x 16바이트 [키 8바이트 ASCII(남는 곳 0) | u32 시작 위치(셀 단위) | u32 셀 수]
+#   이후: int32 lat[N], int32 lng[N], (가중치 있으면) uint32 count[N]
+#   lat/lng = round(좌표 * 10**decimals). 키("all", "2019", ...)별 셀은 연속 구간
+
+import struct
+import numpy as np
+from heat_agg import DECIMALS, quantize
+
+MAGIC = b"HEAT"
+VERSION = 1
+FLAG_WEIGHTED = 1
+_HEADER = struct.Struct("<4sBBBBII")
+_ENTRY = struct.Struct("<8sII")
+
+def write_heat_bin(heat, path, decimals=DECIMALS):
+    """
+    heat: {"all": [[lat,lng(,count)],...], "YYYY": [...]} → 바이너리 파일
+    키 순서는 all 먼저, 나머지는 정렬. 하나라도 [lat,lng]만 있으면 가중치 없이 저장
+    """
+    keys = sorted(heat, key=lambda k: ('0' if k == 'all' else k))
+    weighted = all(len(p) > 2 for k in keys for p in heat[k])
+
+    entries, lats, lngs, ws = [], [], [], []
+    offset = 0
+    for k in keys:
+        pts = heat[k]
+        entries.append(_ENTRY.pack(k.encode("ascii")[:8], offset, len(pts)))
+        for p in pts:
+            lats.append(p[0])
+            lngs.append(p[1])
+            ws.append(p[2] if weighted else 0)
+        offset += len(pts)
+
+    qlat, qlng = quantize(lats, lngs, decimals)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, decimals, FLAG_WEIGHTED if weighted else 0, 0,
+                             len(keys), offset))
+        f.write(b"".join(entries))
+        f.write(qlat.astype("<i4").tobytes())
+        f.write(qlng.astype("<i4").tobytes())
+        if weighted:
+            f.write(np.asarray(ws, dtype="<u4").tobytes())
+    return offset
+
+def read_heat_bin(path):
+    """heat_data.bin → heat_data.js와 같은 구조의 dict (검증/변환용)"""
+    with open(path, "rb") as f:
+        buf = f.read()
+    magic, version, decimals, flags, _, n_keys, n = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"heat_data.bin 형식이 아님: {path}")
+    pos = _HEADER.size
+    entries = []
+    for _ in range(n_keys):
+        name, off, cnt = _ENTRY.unpack_from(buf, pos)
+        entries.append((name.rstrip(b"\0").decode("ascii"), off, cnt))
+        pos += _ENTRY.size
+    scale = 10 ** decimals
+    lat = np.frombuffer(buf, "<i4", n, pos) / scale
+    lng = np.frombuffer(buf, "<i4", n, pos + 4 * n) / scale
+    w = np.frombuffer(buf, "<u4", n, pos + 8 * n) if flags & FLAG_WEIGHTED else None
+
+    heat = {}
+    for name, off, cnt in entries:
+        cols = [lat[off:off + cnt].tolist(), lng[off:off + cnt].tolist()]
+        if w is not None:
+            cols.append(w[off:off + cnt].tolist())
+        heat[name] = [list(p) for p in zip(*cols)]
+    return heat
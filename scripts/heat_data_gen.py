@@ -2,6 +2,12 @@
 import os
 import json
 from datetime import datetime
+from flight_index import compile_flights, classify
+from flight_detect import detect_flights
+from timestamps import parse_many, format_stats
+from heat_tiles import MAX_ZOOM
+from heat_store import (open_store, replace_source, has_source, drop_source, list_sources, export_all,
+                        label_points, source_cell_counts)
 
 # locatin 정보가 있는 Json 파일 위치를 넣으세요. 같은 폴더에 heat_map이 만들어 집니다.
 # os.chdir(r"C:\Users\jsbae\My_Drive\github\travel_map\scripts")
@@ -13,7 +19,8 @@ os.chdir(target_dir)
 
 print("현재 작업 디렉토리:", os.getcwd())
 # =============================================================================
-# 🛫 비행기 탑승 시간 설정 (여기에 추가/수정하세요)
+# 🛫 비행기 탑승 시간 (선택) - 비행/GPS 오류는 속도로 자동 감지 (flight_detect.py)
+#    자동 감지가 놓치거나 틀린 구간만 여기에 추가/수정하세요 (이 목록이 우선)
 # =============================================================================
 flight_periods = [
     {
@@ -49,92 +56,30 @@ flight_periods = [
     # },
 ]
 
-def parse_timestamp(timestamp_str):
-    """다양한 형식의 타임스탬프를 파싱"""
-    try:
-        # 보이지 않는 특수 문자들 제거 (Google Takeout 형식)
-        timestamp_str = timestamp_str.replace('\u202f', ' ')  # narrow no-break space
-        timestamp_str = timestamp_str.replace('\u00a0', ' ')  # non-breaking space
-        timestamp_str = timestamp_str.strip()
-        
-        # Unix timestamp (초 단위)
-        if timestamp_str.isdigit():
-            return datetime.fromtimestamp(int(timestamp_str))
-        
-        # Unix timestamp (밀리초 단위)
-        if len(timestamp_str) == 13 and timestamp_str.isdigit():
-            return datetime.fromtimestamp(int(timestamp_str) / 1000)
-        
-        # Google Takeout 형식 우선 처리: "May 1, 2025, 2:27:42 AM UTC"
-        if ' UTC' in timestamp_str:
-            # UTC 제거
-            timestamp_str = timestamp_str.replace(' UTC', '').strip()
-            # 파싱 시도
-            try:
-                return datetime.strptime(timestamp_str, "%b %d, %Y, %I:%M:%S %p")
-            except ValueError:
-                try:
-                    return datetime.strptime(timestamp_str, "%B %d, %Y, %I:%M:%S %p")  # 전체 월 이름
-                except ValueError:
-                    pass
-        
-        # ISO 형식 (Google Takeout 처리 후)
-        if 'T' in timestamp_str:
-            try:
-                return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            except ValueError:
-                pass
-        
-        # 기타 일반적인 형식들
-        formats = [
-            "%Y-%m-%d %H:%M:%S",
-            "%Y/%m/%d %H:%M:%S",
-            "%Y-%m-%d",
-            "%Y/%m/%d",
-            "%b %d, %Y, %I:%M:%S %p",  # Google Takeout 형식 (UTC 제거된 후)
-            "%B %d, %Y, %I:%M:%S %p",  # 전체 월 이름
-            "%m/%d/%Y %I:%M:%S %p",
-            "%d/%m/%Y %H:%M:%S",
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(timestamp_str, fmt)
-            except ValueError:
-                continue
-                
-        # 파싱 실패 시 None 반환 (오류 메시지 제거)
-        return None
-        
-    except Exception as e:
-        # 오류 발생 시 None 반환
-        return None
-
 from datetime import datetime, timedelta
 # 버퍼 시간 (예: 6시간, 이건 지역별로 타임존이 다르기 때문에 생길 수 있는 현상을 제거하고, 비행시간 전후를 확실히 제거하기 위함.)
+# 위 수동 목록에만 적용 (자동 감지 구간은 출발/도착 사진 사이만 제외)
 BUFFER = timedelta(hours=6)
-def is_during_flight(photo_time, flight_periods):
-    """사진 촬영 시간이 비행기 탑승 시간 중인지 확인"""
-    if not photo_time:
-        return False, None
 
-    for flight in flight_periods:
-        try:
-            # 기존 start/end 파싱
-            start = datetime.strptime(flight["start"], "%Y-%m-%d %H:%M:%S")
-            end   = datetime.strptime(flight["end"],   "%Y-%m-%d %H:%M:%S")
-            
-            # 버퍼 적용
-            buffered_start = start - BUFFER
-            buffered_end   = end   + BUFFER
+# 히트맵 저장소(heat_store.sqlite)에서 이 스크립트가 채우는 출처 이름
+# heat_data.js 등은 저장소의 모든 출처(새 사진/옛날 사진 병합분 포함)를 합쳐서 내보냄
+SOURCE = "takeout"
+
+# 히트맵 셀에 사진 수(가중치)를 포함할지 ([lat, lng, count]). False면 예전처럼 [lat, lng]
+WEIGHTED = True
+
+# 지도가 화면에 보이는 부분만 받아가도록 z/x/y 타일 피라미드도 생성 (heat_tiles/)
+WRITE_TILES = True
 
-            if buffered_start <= photo_time <= buffered_end:
-                return True, flight["name"]
-        except ValueError as e:
-            print(f"⚠️  비행기 시간 형식 오류: {flight}, 에러: {e}")
-            continue
+# 바이너리 히트맵(heat_data.bin, 정수 좌표 + 사진 수) - 지도에서 JS 파싱 없이 바로 로드
+WRITE_BINARY = True
 
-    return False, None
+# 연도별 파일(heat_years/<연도>.<해시>.json + manifest.json) - 지도는 고른 연도만 받고, 바뀌지 않은 연도는 캐시 사용
+# 타일과 함께 생성 (지도는 타일을 먼저 찾고, 타일을 끄거나(USE_HEAT_TILES) 타일이 없으면 이 파일들을 받음)
+WRITE_SPLIT = True
+
+# 월별 누적 인덱스(heat_months.json) - 지도에서 임의 날짜 범위 히트맵
+WRITE_MONTHS = True
 
 # 원본 위치 JSON 로드
 try:
@@ -148,44 +93,64 @@ except json.JSONDecodeError:
     print("❌ JSON 파일 형식이 잘못되었습니다.")
     exit(1)
 
-# 비행기 시간 파싱 (설정 검증)
-print("\n🛫 설정된 비행기 탑승 시간:")
+# 비행기 시간 파싱 (설정 검증) - 버퍼 적용 후 정렬/병합된 구간 인덱스로 한 번만 변환
+print("\n🛫 설정된 비행기 탑승 시간 (수동):")
 for i, flight in enumerate(flight_periods, 1):
     print(f"  {i}. {flight['name']}: {flight['start']} ~ {flight['end']}")
+flight_idx = compile_flights(flight_periods, BUFFER)
 
-# 데이터 필터링
-heat_pts = []
-heat_pts_by_year = {}  # 연도별 데이터 저장
+# 데이터 필터링 (좌표/연도는 평평한 배열로 모은 뒤 heat_agg에서 한 번에 양자화 + 중복 제거)
+heat_lat, heat_lng, heat_year = [], [], []  # 연도 0 = 시간 정보 없음 (전체에만 포함)
+heat_month = []  # YYYYMM (날짜 범위 조회용), 0 = 시간 정보 없음
 flight_data = []  # 비행기 노선 데이터 별도 저장
 flight_filtered_count = 0
+glitch_count = 0
 invalid_time_count = 0
 
 print("\n🔍 데이터 필터링 시작...")
 
+# 시간 정보 파싱 (한 소스는 형식이 같으므로 한 번에 일괄 파싱)
+raw_times = []
+for p in pts:
+    raw = None
+    for time_key in ['timestamp', 'time', 'date', 'taken_time', 'photo_taken_time']:
+        if time_key in p and p[time_key]:
+            raw = str(p[time_key])
+            break
+    raw_times.append(raw)
+parsed_times, time_stats = parse_many(raw_times)
+print(f"  ⏱ 시간 파싱: {format_stats(time_stats)}")
+
+# 비행/GPS 오류 판별: 수동 구간(우선) + 속도 기반 자동 감지 (위치 있는 사진만, 시간순 한 번에)
+located_times = [t if 'lat' in p and 'lng' in p else None for p, t in zip(pts, parsed_times)]
+manual_flights = classify(located_times, flight_idx)
+motion = detect_flights([p.get('lat', 0) for p in pts], [p.get('lng', 0) for p in pts], located_times)
+print(f"  ✈️ 자동 감지: 비행 {len(motion['legs'])}개 구간, GPS 오류 {int(motion['glitch'].sum())}개")
+
 for i, p in enumerate(pts):
     # 위치 정보 확인
     if 'lat' not in p or 'lng' not in p:
         continue
     
-    # 시간 정보 확인 및 파싱
-    photo_time = None
-    for time_key in ['timestamp', 'time', 'date', 'taken_time', 'photo_taken_time']:
-        if time_key in p and p[time_key]:
-            photo_time = parse_timestamp(str(p[time_key]))
-            break
+    photo_time = parsed_times[i]
     
     if not photo_time:
         invalid_time_count += 1
         # 시간 정보가 없으면 전체 데이터에만 포함
-        lat = round(p['lat'], 2)
-        lng = round(p['lng'], 2)
-        heat_pts.append([lat, lng])
+        heat_lat.append(p['lat'])
+        heat_lng.append(p['lng'])
+        heat_year.append(0)
+        heat_month.append(0)
         continue
     
-    # 비행기 탑승 시간 확인
-    is_flight, flight_name = is_during_flight(photo_time, flight_periods)
+    # 비행기 탑승 시간 확인 (수동 목록 → 자동 감지 순)
+    flight_name = manual_flights[i] or motion["flight"][i]
+    
+    if motion["glitch"][i] and not flight_name:
+        glitch_count += 1  # 혼자 튄 좌표 → 제외
+        continue
     
-    if is_flight:
+    if flight_name:
         flight_filtered_count += 1
         # 🛫 비행기 데이터 별도 저장
         flight_point = {
@@ -201,39 +166,33 @@ for i, p in enumerate(pts):
             print(f"  🛫 비행기 데이터 수집: {photo_time} ({flight_name})")
         continue
     
-    # 정상 데이터 추가
-    lat = round(p['lat'], 2)   # 소수점 둘째 자리까지
-    lng = round(p['lng'], 2)
-    heat_pts.append([lat, lng])
-    
-    # 연도별 데이터 분류
-    year = str(photo_time.year)
-    if year not in heat_pts_by_year:
-        heat_pts_by_year[year] = []
-    heat_pts_by_year[year].append([lat, lng])
-
-# 중복 제거 (도시 수준)
-original_count = len(heat_pts)
-heat_pts = [[lat, lng] for lat, lng in {(lat, lng) for lat, lng in heat_pts}]
-deduplicated_count = original_count - len(heat_pts)
+    # 정상 데이터 추가 (연도별 분류 포함)
+    heat_lat.append(p['lat'])
+    heat_lng.append(p['lng'])
+    heat_year.append(photo_time.year)
+    heat_month.append(photo_time.year * 100 + photo_time.month)
 
-# 연도별 데이터도 중복 제거
-for year in heat_pts_by_year:
-    heat_pts_by_year[year] = [[lat, lng] for lat, lng in {(lat, lng) for lat, lng in heat_pts_by_year[year]}]
-
-# 전체 데이터와 연도별 데이터 통합
-heat_data_combined = {
-    "all": heat_pts,
-    **heat_pts_by_year  # 연도별 데이터 추가
-}
+# 히트맵 저장소에 이 출처만 교체 저장 (다른 출처는 그대로 유지)
+# 소수점 둘째 자리 격자로 양자화 + 중복 제거는 저장소에서 (연도, 셀)별 사진 수로
+# 각 셀은 [lat, lng, 사진 수] → 지도에서 방문 빈도에 따라 강도 표시
+conn = open_store()
+replace_source(conn, SOURCE, heat_lat, heat_lng, heat_year, months=heat_month)
+cells_by_year = source_cell_counts(conn, SOURCE)  # 통계용 (이 출처의 셀 수)
+heat_cell_count = cells_by_year.pop("all")
+original_count = len(heat_lat)
+deduplicated_count = original_count - heat_cell_count
+if has_source(conn, 'legacy'):
+    # 저장소 도입 전 heat_data.js를 가져온 것 → 예전처럼 takeout 기준으로 다시 시작
+    drop_source(conn, 'legacy')
+    print("\n⚠ 저장소의 'legacy'(예전 heat_data.js) 출처를 takeout으로 대체했습니다. "
+          "새/옛날 사진 병합 스크립트를 한 번씩 다시 실행하세요.")
 
 # 연도별 통계 출력
-available_years = sorted([year for year in heat_pts_by_year.keys() if year.isdigit()])
+available_years = sorted(cells_by_year)
 if available_years:
     print(f"\n📅 연도별 데이터:")
     for year in available_years:
-        count = len(heat_pts_by_year[year])
-        print(f"  • {year}년: {count}개 지점")
+        print(f"  • {year}년: {cells_by_year[year]}개 지점")
 
 # 비행기 데이터 시간순 정렬 및 노선별 그룹화
 flight_routes = {}
@@ -247,12 +206,23 @@ for flight_point in flight_data:
 for flight_name in flight_routes:
     flight_routes[flight_name].sort(key=lambda x: x["time"])
 
+# 자동 감지 구간의 출발/도착 사진 (기내 사진이 없어도 라인은 그림)
+def _route_point(i, name):
+    return {"lat": round(pts[i]['lat'], 4), "lng": round(pts[i]['lng'], 4),
+            "time": parsed_times[i].isoformat(), "flight_name": name, "altitude": pts[i].get('altitude', None)}
+flight_ends = {}
+for leg in motion["legs"]:
+    if manual_flights[leg["dep"]] or manual_flights[leg["arr"]]:
+        continue  # 수동 구간과 겹치면 수동 목록 우선
+    flight_ends[leg["name"]] = (_route_point(leg["dep"], leg["name"]), _route_point(leg["arr"], leg["name"]))
+
 print("\n📊 필터링 결과:")
 print(f"  • 원본 포인트: {len(pts)}개")
 print(f"  • 비행기 시간 제외: {flight_filtered_count}개")
+print(f"  • GPS 오류 제외: {glitch_count}개")
 print(f"  • 시간 정보 없음: {invalid_time_count}개")
 print(f"  • 중복 제거: {deduplicated_count}개")
-print(f"  • 최종 히트맵: {len(heat_pts)}개 도시 단위 좌표")
+print(f"  • 최종 히트맵: {heat_cell_count}개 도시 단위 좌표")
 print(f"  • 수집된 연도: {', '.join(available_years) if available_years else '없음'}")
 print(f"  • 비행기 노선: {len(flight_routes)}개 노선, {len(flight_data)}개 포인트")
 
@@ -266,33 +236,41 @@ if flight_routes:
 
 # JS용 파일들 저장
 try:
-    # 1. 연도별 히트맵 데이터 (전체 + 연도별) - 연도별 구분
-    with open('heat_data.js', 'w', encoding='utf-8') as f:
-        f.write('var heatDataByYear = {\n')
-        
-        # 각 연도별로 한 줄씩
-        for i, (year, data) in enumerate(heat_data_combined.items()):
-            comma = ',' if i < len(heat_data_combined) - 1 else ''
-            compact_data = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
-            f.write(f'  "{year}": {compact_data}{comma}\n')
-        
-        f.write('};')
-    print("\n✅ heat_data.js 생성 완료!")
+    # 1. 연도별 히트맵 데이터 (전체 + 연도별) - 저장소의 모든 출처 합
+    #    + 줌 레벨별 타일 (heat_tiles/<연도>.<해시>/<z>/<x>/<y>.json, 바뀐 연도만 다시 만듦), 바이너리 히트맵 (heat_data.bin),
+    #      연도별 파일 (heat_years/), 월별 누적 인덱스 (heat_months.json)
+    heat_data_combined = export_all(conn, '.', weighted=WEIGHTED, tiles=WRITE_TILES,
+                                    binary=WRITE_BINARY, split=WRITE_SPLIT, months=WRITE_MONTHS)
+    print("\n✅ heat_data.js 생성 완료! (출처: "
+          + ", ".join(f"{source} {photos}장" for source, _, photos, _ in list_sources(conn)) + ")")
+    if WRITE_TILES:
+        print(f"✅ heat_tiles/ 생성 완료! (z0~z{MAX_ZOOM})")
+    if WRITE_BINARY:
+        print(f"✅ heat_data.bin 생성 완료! ({os.path.getsize('heat_data.bin'):,} bytes, "
+              f"heat_data.js {os.path.getsize('heat_data.js'):,} bytes)")
+    if WRITE_SPLIT:
+        print("✅ heat_years/ 생성 완료! (연도별 파일 + manifest.json)")
+    if WRITE_MONTHS:
+        print("✅ heat_months.json 생성 완료! (월별 누적 인덱스)")
     
     # 2. 호환성을 위한 기존 형태 데이터도 생성
     with open('heat_data_legacy.js', 'w', encoding='utf-8') as f:
-        f.write('var heatData = ' + json.dumps(heat_pts, ensure_ascii=False) + ';')
+        f.write('var heatData = ' + json.dumps(heat_data_combined['all'], ensure_ascii=False) + ';')
     print("✅ heat_data_legacy.js 생성 완료!")
     
     # 3. 비행기 노선 데이터 (시간순 정렬된 포인트들)
-    if flight_data:
+    if flight_data or flight_ends:
         with open('flight_routes.js', 'w', encoding='utf-8') as f:
             f.write('var flightRoutes = ' + json.dumps(flight_routes, ensure_ascii=False, separators=(',', ':')) + ';')
         print("✅ flight_routes.js 생성 완료!")
         
         # 4. 비행기 경로를 라인으로 표시할 수 있는 형태로도 저장
         flight_lines = []
-        for flight_name, points in flight_routes.items():
+        for flight_name in list(flight_routes) + [n for n in flight_ends if n not in flight_routes]:
+            points = flight_routes.get(flight_name, [])
+            if flight_name in flight_ends:
+                dep, arr = flight_ends[flight_name]
+                points = [dep] + points + [arr]
             if len(points) >= 2:  # 최소 2개 포인트가 있어야 라인
                 line_coords = [[p["lat"], p["lng"]] for p in points]
                 flight_lines.append({
@@ -303,11 +281,20 @@ try:
                     "points_count": len(points)
                 })
         
+        # 출발/도착 지점 이름 (나라/도시, 셀 단위 캐시) - 경계 데이터가 없으면 생략
+        ends = [line["coordinates"][k] for line in flight_lines for k in (0, -1)]
+        if ends:
+            countries, _, cities = label_points(conn, [e[0] for e in ends], [e[1] for e in ends])
+            names = [", ".join(x for x in (ci, c) if x) or None for c, ci in zip(countries, cities)]
+            for k, line in enumerate(flight_lines):
+                line["from"], line["to"] = names[2 * k], names[2 * k + 1]
+        
         with open('flight_lines.js', 'w', encoding='utf-8') as f:
             f.write('var flightLines = ' + json.dumps(flight_lines, ensure_ascii=False, separators=(',', ':')) + ';')
         print("✅ flight_lines.js 생성 완료!")
     
-    # 샘플 데이터 미리보기 (처음 5개)
+    # 샘플 데이터 미리보기 (처음 5개, 저장소의 모든 출처 합)
+    heat_pts = heat_data_combined['all']
     if heat_pts:
         print("\n🔍 전체 히트맵 샘플 데이터:")
         for i, point in enumerate(heat_pts[:5]):
@@ -319,7 +306,7 @@ try:
     if available_years:
         print("\n📅 연도별 샘플 데이터:")
         for year in available_years[:3]:  # 처음 3개 연도만
-            year_data = heat_pts_by_year[year]
+            year_data = heat_data_combined.get(year, [])
             print(f"  {year}년: {len(year_data)}개 지점")
             if year_data:
                 print(f"    예시: [{year_data[0][0]}, {year_data[0][1]}]")
@@ -337,6 +324,14 @@ print("\n🎉 처리 완료!")
 print("📁 생성된 파일:")
 print("  • heat_data.js - 연도별 히트맵 데이터")
 print("  • heat_data_legacy.js - 기존 호환 데이터")
+if WRITE_TILES:
+    print("  • heat_tiles/ - 줌 레벨별 히트맵 타일")
+if WRITE_BINARY:
+    print("  • heat_data.bin - 바이너리 히트맵 데이터")
+if WRITE_SPLIT:
+    print("  • heat_years/ - 연도별 히트맵 파일 (내용 해시 이름) + manifest.json")
+if WRITE_MONTHS:
+    print("  • heat_months.json - 날짜 범위 조회용 월별 누적 인덱스")
 print("  • flight_routes.js - 비행기 노선별 포인트")
 print("  • flight_lines.js - 비행기 경로 라인")
 print("💡 이제 연도별 히트맵 표시가 가능합니다!")
\ No newline at end of file
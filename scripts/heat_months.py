@@ -0,0 +1,66 @@
+# heat_months.py
+# 목적:
+#  - 월(YYYYMM)별 셀 사진 수로 날짜 범위 [from, to] 히트맵을 바로 계산할 수 있는 인덱스(heat_months.json)
+#  - 셀마다 (월, 누적 사진 수) 목록을 월 순서로 저장 (셀별 누적합)
+#    → 범위 안 사진 수 = 누적(to까지) - 누적(from 전까지). 셀마다 이진 탐색 2번이면 끝
+#  - 사진별 시간 목록은 내보내지 않음 (월 단위로 합친 값만)
+#
+# heat_months.json:
+#   decimals : 좌표 격자 자리수 (lat = lat_q / 10**decimals)
+#   months   : 데이터에 있는 월 목록 (정렬된 YYYYMM)
+#   cells    : [lat_q0, lng_q0, lat_q1, lng_q1, ...]
+#   start    : 셀 i의 항목은 m/cum[start[i]:start[i+1]]
+#   m        : 항목의 월 (months 인덱스)
+#   cum      : 셀 안에서 그 월까지의 누적 사진 수
+
+import json, os
+from bisect import bisect_left
+from pathlib import Path
+
+MONTHS_FILE = "heat_months.json"
+
+def build_month_index(rows, decimals):
+    """rows: (lat_q, lng_q, ym, count) 목록, 셀 → 월 순으로 정렬된 상태"""
+    months = sorted({r[2] for r in rows})
+    month_idx = {ym: i for i, ym in enumerate(months)}
+    cells, start, m, cum = [], [], [], []
+    prev = None
+    total = 0
+    for lat_q, lng_q, ym, count in rows:
+        if (lat_q, lng_q) != prev:
+            cells += [lat_q, lng_q]
+            start.append(len(m))
+            prev = (lat_q, lng_q)
+            total = 0
+        total += count
+        m.append(month_idx[ym])
+        cum.append(total)
+    start.append(len(m))
+    return {"decimals": decimals, "months": months, "cells": cells, "start": start, "m": m, "cum": cum}
+
+def _cum_before(index, lo, hi, month_i):
+    """셀 항목 [lo, hi)에서 month_i 이전(미포함)까지의 누적 사진 수"""
+    k = bisect_left(index["m"], month_i, lo, hi)
+    return index["cum"][k - 1] if k > lo else 0
+
+def range_counts(index, from_ym, to_ym):
+    """[from_ym, to_ym] (YYYYMM, 양 끝 포함) 기간의 셀별 사진 수 → [[lat, lng, count], ...]"""
+    months = index["months"]
+    a = bisect_left(months, from_ym)
+    b = bisect_left(months, to_ym + 1)
+    scale = 10 ** index["decimals"]
+    cells, start = index["cells"], index["start"]
+    out = []
+    for i in range(len(start) - 1):
+        lo, hi = start[i], start[i + 1]
+        n = _cum_before(index, lo, hi, b) - _cum_before(index, lo, hi, a)
+        if n > 0:
+            out.append([cells[2 * i] / scale, cells[2 * i + 1] / scale, n])
+    return out
+
+def write_month_index(index, out_dir):
+    path = Path(out_dir) / MONTHS_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
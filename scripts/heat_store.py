@@ -0,0 +1,445 @@
+# heat_store.py
+# 목적:
+#  - 히트맵의 원본 저장소 (SQLite 단일 파일 heat_store.sqlite)
+#  - 출처(source)별로 (연도, 셀) → 사진 수를 저장. 연도 0 = 시간 없음
+#      takeout    : heat_data_gen.py (Google Takeout)
+#      newphotos  : new_photos_to_heat.py
+#      oldphotos  : old_photos_to_heat.py
+#      oldphotos_ai : old_photos_AI_to_heat.py.py
+#      legacy     : 저장소 도입 전 heat_data.js (최초 1회 가져옴)
+#  - 시간이 있는 출처는 월(YYYYMM)별 셀도 따로 저장 → 날짜 범위 조회용 (heat_months.py)
+#  - 병합 = 해당 출처만 교체(replace_source) 또는 추가분 더하기(add_to_source)
+#    레코드 로그처럼 같은 파일의 새 레코드가 이전 것을 대신하는 출처는 파일별 기여(file_points)를 기록하고
+#    merge_files로 이전 기여를 빼고 새로 더함 (좌표가 없어진 레코드 = 삭제)
+#  - 셀별 나라/행정구역/도시 이름 캐시 (cell_labels) → 새로 생긴 셀만 역지오코딩 (reverse_geocode.py)
+#  - heat_data.js / heat_data.bin / heat_tiles/ / heat_years/ / heat_months.json / heat_labels.json 은
+#    저장소에서 만드는 결과물 (export_all)
+#    → 스크립트를 어떤 순서로 몇 번 실행해도 결과가 같음
+
+import json, os, sqlite3
+from datetime import datetime
+from pathlib import Path
+from heat_agg import DECIMALS, cell_counts, quantize
+from heat_tiles import build_tiles, load_heat_js
+from heat_bin import write_heat_bin
+from heat_years import write_year_files, remove_year_files
+from heat_months import build_month_index, write_month_index
+import reverse_geocode
+
+STORE_PATH = Path("heat_store.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    source  TEXT NOT NULL,      -- 출처
+    year    INTEGER NOT NULL,   -- 0 = 시간 없음 (all에만 포함)
+    lat_q   INTEGER NOT NULL,   -- round(lat * 10**decimals)
+    lng_q   INTEGER NOT NULL,
+    count   INTEGER NOT NULL,   -- 사진 수
+    PRIMARY KEY (source, year, lat_q, lng_q)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS month_cells (
+    source  TEXT NOT NULL,
+    ym      INTEGER NOT NULL,   -- YYYYMM (시간 없는 사진은 저장하지 않음)
+    lat_q   INTEGER NOT NULL,
+    lng_q   INTEGER NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (source, ym, lat_q, lng_q)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS file_points (
+    source  TEXT NOT NULL,
+    file    TEXT NOT NULL,      -- 레코드 로그의 file
+    year    INTEGER NOT NULL,   -- 0 = 시간 없음
+    ym      INTEGER NOT NULL,   -- YYYYMM, 0 = 시간 없음
+    lat_q   INTEGER NOT NULL,
+    lng_q   INTEGER NOT NULL,
+    PRIMARY KEY (source, file)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    source  TEXT PRIMARY KEY,
+    photos  INTEGER,            -- 반영된 사진 수 합
+    updated TEXT                -- 마지막 반영 시각
+);
+CREATE TABLE IF NOT EXISTS cell_labels (
+    lat_q   INTEGER NOT NULL,
+    lng_q   INTEGER NOT NULL,
+    country TEXT,               -- 모르면(바다 등) NULL, 한 번 계산한 셀은 다시 계산하지 않음
+    admin   TEXT,
+    city    TEXT,
+    PRIMARY KEY (lat_q, lng_q)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT                -- JSON
+);
+"""
+
+def open_store(db_path=STORE_PATH, decimals=DECIMALS):
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    stored = get_meta(conn, "decimals")
+    if stored is None:
+        with conn:
+            set_meta(conn, "decimals", decimals)
+    elif stored != decimals:
+        raise ValueError(f"{db_path}는 소수점 {stored}자리 격자로 만들어짐 (요청: {decimals})")
+    return conn
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+def set_meta(conn, key, value):
+    """트랜잭션은 호출하는 쪽에서 (셀 갱신과 같이 커밋되도록)"""
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+def _rows(source, lats, lngs, years, weights):
+    if len(lats) == 0:
+        return [], 0
+    ys, qlat, qlng, counts = cell_counts(lats, lngs, years, weights=weights)
+    rows = list(zip([source] * len(ys), ys.tolist(), qlat.tolist(), qlng.tolist(), counts.tolist()))
+    return rows, int(counts.sum())
+
+def _month_rows(source, lats, lngs, months, weights):
+    """months: YYYYMM 배열 (0 = 시간 없음 → 제외)"""
+    if months is None:
+        return []
+    keep = [i for i, m in enumerate(months) if m]
+    rows, _ = _rows(source, [lats[i] for i in keep], [lngs[i] for i in keep], [months[i] for i in keep],
+                    [weights[i] for i in keep] if weights is not None else None)
+    return rows
+
+def _touch_source(conn, source, photos, add):
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.execute(f"""
+        INSERT INTO sources (source, photos, updated) VALUES (?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET
+            photos = {'photos + ' if add else ''}excluded.photos, updated = excluded.updated
+    """, (source, photos, now))
+
+def _file_point_rows(conn, source, files, lats, lngs, years, months):
+    """점마다 (source, file, year, ym, lat_q, lng_q)"""
+    if len(files) == 0:
+        return []
+    qlat, qlng = quantize(lats, lngs, get_meta(conn, "decimals", DECIMALS))
+    months = months if months is not None else [0] * len(files)
+    return list(zip([source] * len(files), files, [int(y) for y in years], [int(m) for m in months],
+                    qlat.tolist(), qlng.tolist()))
+
+def replace_source(conn, source, lats, lngs, years, weights=None, meta=None, months=None, files=None):
+    """
+    출처 하나의 셀을 통째로 교체 (소스 전체를 다시 읽었을 때). 같은 입력이면 몇 번 실행해도 같은 결과
+    meta: {키: 값} - 같은 트랜잭션에서 함께 저장 (체크포인트 등)
+    months: 점별 YYYYMM (0 = 시간 없음). 주면 월별 셀도 교체
+    files: 점별 파일 이름. 주면 파일별 기여(file_points)도 교체 → 이후 merge_files로 증분 병합
+    """
+    rows, photos = _rows(source, lats, lngs, years, weights)
+    month_rows = _month_rows(source, lats, lngs, months, weights)
+    point_rows = _file_point_rows(conn, source, files, lats, lngs, years, months) if files is not None else None
+    with conn:
+        conn.execute("DELETE FROM cells WHERE source = ?", (source,))
+        conn.executemany("INSERT INTO cells (source, year, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("DELETE FROM month_cells WHERE source = ?", (source,))
+        conn.executemany("INSERT INTO month_cells (source, ym, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)",
+                         month_rows)
+        if point_rows is not None:
+            conn.execute("DELETE FROM file_points WHERE source = ?", (source,))
+            conn.executemany("INSERT INTO file_points (source, file, year, ym, lat_q, lng_q) VALUES (?, ?, ?, ?, ?, ?)",
+                             point_rows)
+        _touch_source(conn, source, photos, add=False)
+        for k, v in (meta or {}).items():
+            set_meta(conn, k, v)
+    return len(rows)
+
+def add_to_source(conn, source, lats, lngs, years, weights=None, meta=None, months=None):
+    """출처에 추가분만 더함 (로그 꼬리만 읽었을 때). 셀이 있으면 count += 추가분"""
+    rows, photos = _rows(source, lats, lngs, years, weights)
+    month_rows = _month_rows(source, lats, lngs, months, weights)
+    with conn:
+        conn.executemany("""
+            INSERT INTO cells (source, year, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, year, lat_q, lng_q) DO UPDATE SET count = count + excluded.count
+        """, rows)
+        conn.executemany("""
+            INSERT INTO month_cells (source, ym, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, ym, lat_q, lng_q) DO UPDATE SET count = count + excluded.count
+        """, month_rows)
+        _touch_source(conn, source, photos, add=True)
+        for k, v in (meta or {}).items():
+            set_meta(conn, k, v)
+    return len(rows)
+
+def merge_files(conn, source, files, lats, lngs, years, months=None, meta=None):
+    """
+    파일 단위 증분 병합 (레코드 로그 꼬리만 읽었을 때)
+    파일마다 이전 기여(file_points)를 빼고 새 점을 더함. lats[i]가 None이면 삭제만
+    (GPS가 없어졌거나, 다른 소스의 중복이거나, 비행/GPS 오류로 빠진 레코드)
+    같은 파일이 여러 번 있으면 마지막 것만. 반환: (더한 점 수, 뺀 점 수)
+    """
+    latest = {}
+    for i, f in enumerate(files):
+        latest[f] = i
+    keep = [i for i in latest.values() if lats[i] is not None and lngs[i] is not None]
+    new_rows = _file_point_rows(conn, source, [files[i] for i in keep], [lats[i] for i in keep],
+                                [lngs[i] for i in keep], [years[i] for i in keep],
+                                [months[i] for i in keep] if months is not None else None)
+    old_rows = []
+    for f in latest:
+        row = conn.execute("SELECT year, ym, lat_q, lng_q FROM file_points WHERE source = ? AND file = ?",
+                           (source, f)).fetchone()
+        if row:
+            old_rows.append(row)
+
+    cell_delta, month_delta = {}, {}
+    for rows, sign in ((old_rows, -1), ([r[2:] for r in new_rows], 1)):
+        for year, ym, a, b in rows:
+            cell_delta[(year, a, b)] = cell_delta.get((year, a, b), 0) + sign
+            if ym:
+                month_delta[(ym, a, b)] = month_delta.get((ym, a, b), 0) + sign
+    with conn:
+        conn.executemany("""
+            INSERT INTO cells (source, year, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, year, lat_q, lng_q) DO UPDATE SET count = count + excluded.count
+        """, [(source, y, a, b, d) for (y, a, b), d in cell_delta.items() if d])
+        conn.executemany("""
+            INSERT INTO month_cells (source, ym, lat_q, lng_q, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, ym, lat_q, lng_q) DO UPDATE SET count = count + excluded.count
+        """, [(source, m, a, b, d) for (m, a, b), d in month_delta.items() if d])
+        conn.execute("DELETE FROM cells WHERE source = ? AND count <= 0", (source,))
+        conn.execute("DELETE FROM month_cells WHERE source = ? AND count <= 0", (source,))
+        conn.executemany("DELETE FROM file_points WHERE source = ? AND file = ?", [(source, f) for f in latest])
+        conn.executemany("INSERT INTO file_points (source, file, year, ym, lat_q, lng_q) VALUES (?, ?, ?, ?, ?, ?)",
+                         new_rows)
+        _touch_source(conn, source, len(new_rows) - len(old_rows), add=True)
+        for k, v in (meta or {}).items():
+            set_meta(conn, k, v)
+    return len(new_rows), len(old_rows)
+
+def drop_source(conn, source):
+    with conn:
+        n = conn.execute("DELETE FROM cells WHERE source = ?", (source,)).rowcount
+        conn.execute("DELETE FROM month_cells WHERE source = ?", (source,))
+        conn.execute("DELETE FROM file_points WHERE source = ?", (source,))
+        conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+    return n
+
+def has_source(conn, source):
+    return conn.execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone() is not None
+
+def list_sources(conn):
+    """[(출처, 셀 수, 사진 수, 마지막 반영 시각), ...]"""
+    return conn.execute("""
+        SELECT s.source, COUNT(c.source), s.photos, s.updated
+        FROM sources s LEFT JOIN cells c ON c.source = s.source
+        GROUP BY s.source ORDER BY s.source
+    """).fetchall()
+
+def source_cell_counts(conn, source):
+    """출처 하나의 셀 수 → {"all": 셀 수, "YYYY": 그 연도 셀 수} (연도 0 = 시간 없음은 all에만)"""
+    out = {"all": conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT lat_q, lng_q FROM cells WHERE source = ?)",
+                               (source,)).fetchone()[0]}
+    for year, n in conn.execute("SELECT year, COUNT(*) FROM cells WHERE source = ? AND year > 0 "
+                                "GROUP BY year ORDER BY year", (source,)):
+        out[str(year)] = n
+    return out
+
+def import_heat(conn, source, heat):
+    """
+    heat_data.js 형식 dict → 출처 하나로 저장
+    연도별 셀은 그대로, all에만 있는 사진 수(연도 합보다 많은 만큼)는 연도 0으로
+    [lat, lng] 형식(예전 데이터)은 셀당 1장
+    """
+    lats, lngs, years, ws = [], [], [], []
+    per_cell = {}  # 셀 → 연도별 사진 수 합
+    for key, pts in heat.items():
+        if key == "all" or not key.isdigit():
+            continue
+        for p in pts:
+            w = p[2] if len(p) > 2 else 1
+            cell = (round(p[0], DECIMALS), round(p[1], DECIMALS))
+            per_cell[cell] = per_cell.get(cell, 0) + w
+            lats.append(p[0]); lngs.append(p[1]); years.append(int(key)); ws.append(w)
+    for p in heat.get("all") or []:
+        rest = (p[2] if len(p) > 2 else 1) - per_cell.get((round(p[0], DECIMALS), round(p[1], DECIMALS)), 0)
+        if rest > 0:
+            lats.append(p[0]); lngs.append(p[1]); years.append(0); ws.append(rest)
+    return replace_source(conn, source, lats, lngs, years, ws)
+
+def ensure_migrated(conn, heat_js="heat_data.js"):
+    """저장소가 비어 있고 예전 heat_data.js가 있으면 'legacy' 출처로 한 번만 가져옴"""
+    if conn.execute("SELECT 1 FROM sources LIMIT 1").fetchone() or not Path(heat_js).exists():
+        return False
+    heat = load_heat_js(heat_js)
+    if not heat:
+        return False
+    n = import_heat(conn, "legacy", heat)
+    print(f"기존 {heat_js} → {STORE_PATH} 'legacy' 출처로 가져옴: {n}개 셀")
+    return True
+
+def export_heat(conn, weighted=True):
+    """저장소 전체(모든 출처 합) → {"all": [...], "YYYY": [...]} (heat_agg.heat_by_year와 같은 순서)"""
+    scale = 10 ** get_meta(conn, "decimals", DECIMALS)
+    def pts(rows):
+        return [[a / scale, b / scale, c] if weighted else [a / scale, b / scale] for a, b, c in rows]
+    heat = {"all": pts(conn.execute("""
+        SELECT lat_q, lng_q, SUM(count) FROM cells GROUP BY lat_q, lng_q ORDER BY lat_q, lng_q
+    """))}
+    cur = conn.execute("""
+        SELECT year, lat_q, lng_q, SUM(count) FROM cells WHERE year > 0
+        GROUP BY year, lat_q, lng_q ORDER BY year, lat_q, lng_q
+    """)
+    by_year = {}
+    for year, a, b, c in cur:
+        by_year.setdefault(str(year), []).append((a, b, c))
+    for year, rows in by_year.items():
+        heat[year] = pts(rows)
+    return heat
+
+def export_month_rows(conn):
+    """월별 셀(모든 출처 합) → [(lat_q, lng_q, ym, count), ...] 셀 → 월 순서"""
+    return conn.execute("""
+        SELECT lat_q, lng_q, ym, SUM(count) FROM month_cells
+        GROUP BY lat_q, lng_q, ym ORDER BY lat_q, lng_q, ym
+    """).fetchall()
+
+# === 셀 이름 (역지오코딩 캐시) ===
+_geocoder = None
+
+def _get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = reverse_geocode.load_geocoder() or False
+    return _geocoder
+
+def ensure_cell_labels(conn, cells=None):
+    """
+    셀 [(lat_q, lng_q), ...] 중 이름이 없는 것만 역지오코딩해서 cell_labels에 저장
+    cells=None이면 저장소의 모든 셀. 경계 데이터가 바뀌었으면 캐시를 비우고 다시 계산
+    반환: 새로 계산한 셀 수 (경계 데이터가 없으면 None)
+    """
+    fingerprint = reverse_geocode.geo_fingerprint()
+    if not fingerprint:
+        return None
+    if get_meta(conn, "geo_fingerprint") != fingerprint:
+        with conn:
+            conn.execute("DELETE FROM cell_labels")
+            set_meta(conn, "geo_fingerprint", fingerprint)
+    if cells is None:
+        missing = conn.execute("""
+            SELECT DISTINCT c.lat_q, c.lng_q FROM cells c
+            LEFT JOIN cell_labels l ON l.lat_q = c.lat_q AND l.lng_q = c.lng_q
+            WHERE l.lat_q IS NULL
+        """).fetchall()
+    else:
+        known = set(conn.execute("SELECT lat_q, lng_q FROM cell_labels").fetchall())
+        missing = sorted({c for c in cells if c not in known})
+    if not missing:
+        return 0
+    geocoder = _get_geocoder()
+    if not geocoder:
+        return None
+    scale = 10 ** get_meta(conn, "decimals", DECIMALS)
+    country, admin, city = reverse_geocode.label_points(
+        geocoder, [a / scale for a, _ in missing], [b / scale for _, b in missing])
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO cell_labels (lat_q, lng_q, country, admin, city) VALUES (?, ?, ?, ?, ?)",
+                         [(a, b, c, ad, ci) for (a, b), c, ad, ci in zip(missing, country, admin, city)])
+    return len(missing)
+
+def label_points(conn, lats, lngs):
+    """좌표 배열 → (나라, 행정구역, 도시) 리스트 3개. 셀 단위로 캐시를 거침 (없으면 None)"""
+    qlat, qlng = quantize(lats, lngs, get_meta(conn, "decimals", DECIMALS))
+    cells = list(zip(qlat.tolist(), qlng.tolist()))
+    ensure_cell_labels(conn, cells)
+    known = {(a, b): (c, ad, ci) for a, b, c, ad, ci in conn.execute("SELECT * FROM cell_labels")}
+    rows = [known.get(c, (None, None, None)) for c in cells]
+    return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+def export_labels(conn):
+    """
+    셀 이름 + 연도별 나라/도시 사진 수 → heat_labels.json 내용 (이름이 하나도 없으면 None)
+      names: 이름 목록, cells: [lat_q, lng_q, 나라, 행정구역, 도시, ...] (이름 번호, -1 = 없음)
+      years: {"all"/"YYYY": {"countries": [[이름, 사진 수], ...], "cities": [...]}} 사진 수 많은 순
+    """
+    rows = conn.execute("SELECT lat_q, lng_q, country, admin, city FROM cell_labels ORDER BY lat_q, lng_q").fetchall()
+    if not any(r[2] for r in rows):
+        return None
+    names, name_idx, cells = [], {}, []
+    def idx(name):
+        if name is None:
+            return -1
+        if name not in name_idx:
+            name_idx[name] = len(names)
+            names.append(name)
+        return name_idx[name]
+    for a, b, c, ad, ci in rows:
+        cells += [a, b, idx(c), idx(ad), idx(ci)]
+
+    years = {}
+    for col, out_key in (("country", "countries"), ("city", "cities")):
+        cur = conn.execute(f"""
+            SELECT c.year, l.{col}, SUM(c.count) FROM cells c
+            JOIN cell_labels l ON l.lat_q = c.lat_q AND l.lng_q = c.lng_q
+            WHERE l.{col} IS NOT NULL GROUP BY c.year, l.{col}
+        """)
+        for year, name, n in cur:
+            for key in ("all", str(year)) if year > 0 else ("all",):
+                bucket = years.setdefault(key, {"countries": {}, "cities": {}})[out_key]
+                bucket[name] = bucket.get(name, 0) + n
+    for v in years.values():
+        for k in v:
+            v[k] = sorted(v[k].items(), key=lambda x: (-x[1], x[0]))
+    return {"decimals": get_meta(conn, "decimals", DECIMALS), "names": names, "cells": cells, "years": years}
+
+def write_heat_js(heat, path="heat_data.js"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('var heatDataByYear = {\n')
+        for i, (year, data) in enumerate(heat.items()):
+            comma = ',' if i < len(heat) - 1 else ''
+            f.write(f'  "{year}": {json.dumps(data, ensure_ascii=False, separators=(",", ":"))}{comma}\n')
+        f.write('};')
+
+def export_all(conn, out_dir=".", weighted=True, tiles=True, binary=True, split=True, months=True, labels=True):
+    """
+    저장소 → heat_data.js (+ heat_tiles/, heat_data.bin, heat_years/, heat_months.json, heat_labels.json)
+    heat_years/는 타일과 함께 생성 (지도는 타일 → 연도별 파일 순서로 찾음), split=False면 예전 파일 삭제
+    내보낸 dict 반환
+    """
+    out_dir = Path(out_dir)
+    heat = export_heat(conn, weighted)
+    write_heat_js(heat, out_dir / "heat_data.js")
+    if tiles:
+        build_tiles(heat, out_dir)
+    if binary:
+        write_heat_bin(heat, out_dir / "heat_data.bin")
+    if split:
+        write_year_files(heat, out_dir)
+    else:
+        remove_year_files(out_dir)
+    if months:
+        write_month_index(build_month_index(export_month_rows(conn), get_meta(conn, "decimals", DECIMALS)),
+                          out_dir)
+    if labels:
+        n = ensure_cell_labels(conn)
+        data = export_labels(conn)
+        if n:
+            print(f"역지오코딩: 새 셀 {n}개")
+        if data:
+            path = out_dir / "heat_labels.json"
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+    return heat
+
+if __name__ == "__main__":
+    # 저장소 현황 출력 + 결과 파일 다시 내보내기
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    conn = open_store()
+    ensure_migrated(conn)
+    for source, cells, photos, updated in list_sources(conn):
+        print(f"  • {source}: {cells}개 셀, {photos}장 ({updated})")
+    heat = export_all(conn)
+    print(f"✅ heat_data.js / heat_data.bin / heat_tiles/ / heat_months.json 내보내기 완료: 전체 {len(heat['all'])}개 셀, "
+          f"{len(heat) - 1}개 연도")
@@ -0,0 +1,137 @@
+# heat_tiles.py
+# 목적:
+#  - 연도별 히트맵 셀({"all": [[lat,lng,count],...], "2019": [...]})을
+#    z/x/y 타일 피라미드로 미리 집계해서 저장 → 지도는 화면에 보이는 타일만 받아옴
+#  - 낮은 줌: 타일 하나를 BINS x BINS 칸으로 나눠 칸마다 셀을 합침 (가중 평균 위치 + count 합)
+#  - 높은 줌(MAX_ZOOM): 원래 0.01° 셀 그대로. 지도 줌이 더 커지면 MAX_ZOOM 타일을 확대해서 사용
+#  - 결과: heat_tiles/<연도>.<내용 해시>/<z>/<x>/<y>.json + heat_tiles/index.json(연도별 폴더 이름, 줌별 타일 목록, 최대 count)
+#    연도 폴더 이름에 셀 내용 해시가 들어감 → 내용이 그대로인 연도는 다시 만들지 않고 URL도 그대로 (서버가 1년 캐시)
+#    사진 한 장을 병합하면 그 연도와 all만 다시 만들고, index.json에서 빠진 예전 폴더는 지움
+#
+# 단독 실행하면 heat_data.js를 읽어서 타일을 다시 만듦 (병합 스크립트 실행 후 등)
+
+import hashlib, json, os, re, shutil
+from pathlib import Path
+import numpy as np
+
+TILES_DIR = "heat_tiles"
+MAX_ZOOM = 9    # z9 타일 한 칸 ≈ 0.7° → 0.01° 셀이 이미 충분히 촘촘함
+BINS = 64       # 타일 한 변을 나누는 칸 수 (256px 타일 기준 4px)
+MAX_LAT = 85.05112878  # Web Mercator 한계
+HASH_LEN = 10
+YEAR_INDEX = "index.json"  # 연도 폴더 안의 줌별 타일 목록 (다음 실행에서 그대로 재사용)
+
+def _tile_coords(lat, lng, z):
+    """위경도 배열 → 타일 안의 실수 좌표 (fx, fy), 범위 [0, 2^z)"""
+    n = 2 ** z
+    lat = np.radians(np.clip(lat, -MAX_LAT, MAX_LAT))
+    fx = (lng + 180.0) / 360.0 * n
+    fy = (1.0 - np.arcsinh(np.tan(lat)) / np.pi) / 2.0 * n
+    return np.clip(fx, 0, n - 1e-9), np.clip(fy, 0, n - 1e-9)
+
+def build_level(lat, lng, w, z, bins=BINS, max_zoom=MAX_ZOOM):
+    """
+    한 줌 레벨 집계 → {(x, y): [[lat, lng, count], ...]}
+    z < max_zoom 이면 타일 칸 단위로 합치고, z == max_zoom 이면 셀 그대로
+    """
+    n = 2 ** z
+    fx, fy = _tile_coords(lat, lng, z)
+    tx, ty = fx.astype(np.int64), fy.astype(np.int64)
+    tile = tx * n + ty
+    if z >= max_zoom:
+        order = np.argsort(tile, kind="stable")
+        tile, plat, plng, pw = tile[order], lat[order], lng[order], w[order]
+    else:
+        bx = ((fx - tx) * bins).astype(np.int64)
+        by = ((fy - ty) * bins).astype(np.int64)
+        key = tile * (bins * bins) + bx * bins + by
+        uniq, inv = np.unique(key, return_inverse=True)
+        pw = np.bincount(inv, weights=w)
+        plat = np.round(np.bincount(inv, weights=lat * w) / pw, 2)
+        plng = np.round(np.bincount(inv, weights=lng * w) / pw, 2)
+        tile = uniq // (bins * bins)
+
+    out = {}
+    if len(tile) == 0:
+        return out
+    bounds = np.flatnonzero(np.diff(tile)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(tile)]])
+    for s, e in zip(starts, ends):
+        t = int(tile[s])
+        out[(t // n, t % n)] = [[a, b, int(c)] for a, b, c in
+                                zip(plat[s:e].tolist(), plng[s:e].tolist(), np.rint(pw[s:e]).tolist())]
+    return out
+
+def year_dir_name(year, body, max_zoom=MAX_ZOOM, bins=BINS):
+    digest = hashlib.sha1(body + f"|{max_zoom}|{bins}".encode("ascii")).hexdigest()[:HASH_LEN]
+    return f"{year}.{digest}"
+
+def _build_year(pts, target, max_zoom, bins):
+    """연도 하나의 타일을 target 폴더에 만들고 줌별 목록 반환 → (year_index, 파일 수)"""
+    arr = np.asarray([(p[0], p[1], p[2] if len(p) > 2 else 1) for p in pts], dtype=np.float64)
+    lat, lng, w = arr[:, 0], arr[:, 1], arr[:, 2]
+    year_index, n_files = {}, 0
+    for z in range(max_zoom + 1):
+        level = build_level(lat, lng, w, z, bins, max_zoom)
+        max_w = 0
+        for (x, y), cells in level.items():
+            path = target / str(z) / str(x)
+            path.mkdir(parents=True, exist_ok=True)
+            (path / f"{y}.json").write_text(json.dumps(cells, separators=(",", ":")), encoding="utf-8")
+            max_w = max(max_w, max(c[2] for c in cells))
+            n_files += 1
+        year_index[str(z)] = {"tiles": sorted(f"{x}/{y}" for x, y in level), "max": max_w}
+    (target / YEAR_INDEX).write_text(json.dumps(year_index, separators=(",", ":")), encoding="utf-8")
+    return year_index, n_files
+
+def build_tiles(heat, out_dir, max_zoom=MAX_ZOOM, bins=BINS):
+    """
+    heat: {"all": [[lat,lng(,count)],...], "YYYY": [...]}
+    내용이 바뀐 연도만 임시 폴더에 만든 뒤 교체, index.json도 임시 파일 → 교체 (중간에 실패해도 기존 타일 유지)
+    반환: 새로 쓴 타일 파일 수
+    """
+    final = Path(out_dir) / TILES_DIR
+    final.mkdir(parents=True, exist_ok=True)
+    index = {"minZoom": 0, "maxZoom": max_zoom, "bins": bins, "years": {}}
+    n_files = 0
+    for year, pts in heat.items():
+        if not pts:
+            continue
+        name = year_dir_name(year, json.dumps(pts, separators=(",", ":")).encode("utf-8"), max_zoom, bins)
+        target = final / name
+        try:
+            year_index = json.loads((target / YEAR_INDEX).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            tmp = final / (name + ".tmp")
+            if tmp.exists():
+                shutil.rmtree(tmp)
+            year_index, n = _build_year(pts, tmp, max_zoom, bins)
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(tmp, target)
+            n_files += n
+        index["years"][year] = {"dir": name, **year_index}
+
+    tmp = final / "index.json.tmp"
+    tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, final / "index.json")
+
+    keep = {v["dir"] for v in index["years"].values()} | {"index.json"}
+    for p in final.iterdir():
+        if p.name not in keep:
+            shutil.rmtree(p) if p.is_dir() else p.unlink()
+    return n_files
+
+def load_heat_js(path="heat_data.js"):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    m = re.search(r'var heatDataByYear = ({.*?});', content, re.DOTALL)
+    return json.loads(m.group(1)) if m else {}
+
+if __name__ == "__main__":
+    # heat_data.js가 있는 폴더에서 실행
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    heat = load_heat_js()
+    n = build_tiles(heat, ".")
+    print(f"✅ {TILES_DIR}/ 생성 완료: {len(heat)}개 키, 새로 만든 타일 {n}개 (z0~z{MAX_ZOOM})")
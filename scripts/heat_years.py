@@ -0,0 +1,57 @@
+# heat_years.py
+# 목적:
+#  - 히트맵을 연도(와 all)별 파일로 나눠서 저장: heat_years/<연도>.<내용 해시>.json
+#  - heat_years/manifest.json 에 연도 → 파일 이름 매핑
+#  - 내용이 그대로인 연도는 파일 이름(URL)도 그대로 → 브라우저/CDN 캐시를 계속 사용
+#  - 지도는 manifest만 먼저 받고, 연도 파일은 그 연도를 처음 선택할 때 받음
+#  - 지도는 타일(heat_tiles/)을 먼저 쓰므로 타일을 만들지 않을 때만 생성 (heat_store.export_all)
+
+import hashlib, json, os
+from pathlib import Path
+
+YEARS_DIR = "heat_years"
+MANIFEST = "manifest.json"
+HASH_LEN = 10
+
+def year_file_name(year, body):
+    return f"{year}.{hashlib.sha1(body).hexdigest()[:HASH_LEN]}.json"
+
+def write_year_files(heat, out_dir):
+    """
+    heat: {"all": [...], "YYYY": [...]} → heat_years/ 아래 연도별 파일 + manifest.json
+    이미 있는 파일은 다시 쓰지 않고, manifest에서 빠진 예전 파일은 지움
+    반환: (manifest dict, 새로 쓴 파일 수)
+    """
+    target = Path(out_dir) / YEARS_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    manifest, written = {}, 0
+    for year, data in heat.items():
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        name = year_file_name(year, body)
+        path = target / name
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+            written += 1
+        manifest[year] = name
+
+    tmp = target / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, target / MANIFEST)
+
+    keep = set(manifest.values()) | {MANIFEST}
+    for p in target.iterdir():
+        if p.is_file() and p.name not in keep:
+            p.unlink()
+    return manifest, written
+
+def remove_year_files(out_dir):
+    """heat_years/ 삭제 (연도별 파일을 끄고 내보낼 때 예전 파일이 남지 않게)"""
+    target = Path(out_dir) / YEARS_DIR
+    if not target.is_dir():
+        return
+    for p in target.iterdir():
+        if p.is_file():
+            p.unlink()
+    target.rmdir()
@@ -1,19 +1,31 @@
-
 # new_photos_to_heat.py
 # 목적:
-#  - newphotos_with.json(누적)을 heat_data.js(연도별 구조)에 병합
-#  - heat_data_gen.py와 동일한 "비행기 탑승시간" 제거 로직 적용 (버퍼 포함)
-#  - 증분 실행에 친화적(기존 heat_data.js 유지 + 좌표 단위 중복 제거)
-
-import json, re, shutil, os
+#  - newphotos.ndjson(레코드 로그)에서 마지막 병합 이후 추가된 레코드만 히트맵 저장소의 'newphotos' 출처에 반영
+#    로그는 파일별 마지막 레코드가 유효 → 파일 단위로 이전 기여를 빼고 새로 더함 (heat_store.merge_files)
+#    좌표가 없어진 레코드(GPS 삭제, 다른 소스 중복 dup_of)나 비행/GPS 오류로 빠진 레코드는 삭제로 처리
+#    (로그가 없거나 처음부터 다시 읽으면 파일별 마지막 레코드로 'newphotos' 출처를 통째로 교체)
+#  - heat_data_gen.py와 동일한 비행/GPS 오류 제거: 속도 기반 자동 감지 + 수동 flight_periods(버퍼 포함)
+#    (추가분만 읽은 경우 감지는 추가분 안에서만)
+#  - 저장 후 heat_data.js / heat_data.bin / heat_tiles/ 다시 내보냄
+#  - 체크포인트는 저장소에 셀과 같은 트랜잭션으로 기록 → 중간에 멈춰도 중복 집계 없음
+
+import json, os
+from pathlib import Path
 from datetime import datetime, timedelta
+import record_log
+from flight_index import compile_flights, classify
+from flight_detect import detect_flights
+from timestamps import parse_many, format_stats
+from heat_store import (open_store, ensure_migrated, get_meta,
+                        replace_source, merge_files, export_all)
 
 # 작업 디렉토리(heat_data.js와 JSON들이 있는 곳)로 변경
 os.chdir(r"C:\Users\jsbae\My_Drive\github\travel_map\scripts")
 print("데이터 병합 시작...")
 
 # =============================================================================
-# 🛫 비행기 탑승 시간 설정 (heat_data_gen.py 포맷과 동일하게 유지)
+# 🛫 비행기 탑승 시간 (선택, heat_data_gen.py 포맷과 동일하게 유지)
+#    비행/GPS 오류는 속도로 자동 감지 - 감지가 놓친 구간만 추가하세요
 # =============================================================================
 flight_periods = [
     # 예시 (필요에 맞게 수정/추가)
@@ -35,124 +47,94 @@ flight_periods = [
 
 BUFFER = timedelta(hours=6)  # 시간대 혼동 및 전후 버퍼 제거
 
-def parse_timestamp(ts):
-    """열린 형식 파서 (heat_data_gen.py와 유사)"""
-    try:
-        s = str(ts).strip().replace('\u202f',' ').replace('\u00a0',' ')
-        if s.isdigit():
-            if len(s) == 13:
-                return datetime.fromtimestamp(int(s)/1000)
-            return datetime.fromtimestamp(int(s))
-        if ' UTC' in s:
-            s2 = s.replace(' UTC','').strip()
-            for fmt in ("%b %d, %Y, %I:%M:%S %p", "%B %d, %Y, %I:%M:%S %p"):
-                try: return datetime.strptime(s2, fmt)
-                except ValueError: pass
-        if 'T' in s:
-            try: return datetime.fromisoformat(s.replace('Z', '+00:00'))
-            except ValueError: pass
-        for fmt in ("%Y-%m-%d %H:%M:%S","%Y/%m/%d %H:%M:%S","%Y-%m-%d","%Y/%m/%d",
-                    "%b %d, %Y, %I:%M:%S %p","%B %d, %Y, %I:%M:%S %p",
-                    "%m/%d/%Y %I:%M:%S %p","%d/%m/%Y %H:%M:%S"):
-            try: return datetime.strptime(s, fmt)
-            except ValueError: continue
-        return None
-    except Exception:
-        return None
-
-def is_during_flight(photo_time, periods):
-    if not photo_time:
-        return False, None
-    for f in periods:
-        try:
-            start = datetime.strptime(f["start"], "%Y-%m-%d %H:%M:%S") - BUFFER
-            end   = datetime.strptime(f["end"],   "%Y-%m-%d %H:%M:%S") + BUFFER
-        except Exception:
-            continue
-        if start <= photo_time <= end:
-            return True, f["name"]
-    return False, None
-
-# 1) heat_data.js (기존) 읽기
-try:
-    with open('heat_data.js','r',encoding='utf-8') as f:
-        content = f.read()
-    m = re.search(r'var heatDataByYear = ({.*?});', content, re.DOTALL)
-    existing = json.loads(m.group(1)) if m else {}
-    print(f"기존 heat_data.js 로드: {len(existing)}개 연도")
-except FileNotFoundError:
-    existing = {}
-    print("기존 heat_data.js 없음 → 새로 생성 예정")
-
-# 2) newphotos_with.json 읽기
-with open('newphotos_with.json','r',encoding='utf-8') as f:
-    photos = json.load(f)
-print(f"newphotos_with.json 로드: {len(photos)}개 사진")
+SOURCE = 'newphotos'
+LOG_PATH = Path('newphotos.ndjson')
+CHECKPOINT_KEY = 'newphotos_checkpoint'  # 저장소 meta에 마지막으로 병합한 로그 위치
+
+# 1) 히트맵 저장소 열기 (처음이면 기존 heat_data.js를 'legacy' 출처로 가져옴)
+conn = open_store()
+ensure_migrated(conn)
+
+# 2) 새 레코드 읽기 (로그의 마지막 체크포인트 이후분만)
+checkpoint = None
+full = True  # 소스 전체를 읽었는지 (False면 마지막 병합 이후 추가분만)
+if LOG_PATH.exists():
+    records, checkpoint, full = record_log.read_tail(LOG_PATH, get_meta(conn, CHECKPOINT_KEY))
+else:
+    with open('newphotos_with.json','r',encoding='utf-8') as f:
+        records = json.load(f)
+# 같은 파일은 마지막 레코드만 (로그에는 다시 스캔한 파일의 레코드가 여러 번 쌓임)
+latest = {}
+for rec in records:
+    latest[rec.get('file')] = rec
+records = list(latest.values())
+print(f"{LOG_PATH if LOG_PATH.exists() else 'newphotos_with.json'} {'전체' if full else '추가분'} 로드: "
+      f"{len(records)}개 파일")
 
 # 3) 변환(+비행기시간 제거)
-all_coords = []
-by_year = {}
+lats, lngs, years = [], [], []  # 연도 0 = 시간 없음 (all에만 포함)
+months = []  # YYYYMM (날짜 범위 조회용), 0 = 시간 없음
 
 flight_filtered = 0
+glitch_filtered = 0
 invalid_time = 0
 
-for rec in photos:
-    lat = rec.get('lat')
-    lng = rec.get('lng')
-    if lat is None or lng is None:
-        continue
-
-    # 좌표 반올림(도시단위)
-    lat_r = round(lat, 2)
-    lng_r = round(lng, 2)
-
-    ts = rec.get('time')
-    dt = parse_timestamp(ts) if ts else None
-    if dt is None and ts:
-        invalid_time += 1
-
+files = []  # 반영할 점의 파일 이름
+removed = []  # 좌표가 없어졌거나 제외된 파일 (추가분 병합 때 이전 기여 삭제)
+photos = []
+for rec in records:
+    if rec.get('lat') is not None and rec.get('lng') is not None:
+        photos.append(rec)
+    else:
+        removed.append(rec.get('file'))
+times, time_stats = parse_many([rec.get('time') or None for rec in photos])
+invalid_time = time_stats['failed']
+print(f"시간 파싱: {format_stats(time_stats)}")
+
+# 비행기 구간: 수동 구간(버퍼 적용/정렬/병합 후 한 번에 분류) + 속도 기반 자동 감지
+flight_names = classify(times, compile_flights(flight_periods, BUFFER))
+motion = detect_flights([rec['lat'] for rec in photos], [rec['lng'] for rec in photos], times)
+
+for rec, dt, flight_name, auto_flight, glitch in zip(photos, times, flight_names, motion['flight'], motion['glitch']):
     # 비행기 제외
-    is_f, _ = is_during_flight(dt, flight_periods)
-    if is_f:
+    if flight_name is not None or auto_flight is not None:
         flight_filtered += 1
+        removed.append(rec.get('file'))
+        continue
+    # GPS 오류(혼자 튄 좌표) 제외
+    if glitch:
+        glitch_filtered += 1
+        removed.append(rec.get('file'))
         continue
 
-    # 전체/연도 분배
-    all_coords.append([lat_r, lng_r])
-    if dt:
-        year = str(dt.year)
-        by_year.setdefault(year, []).append([lat_r, lng_r])
-
-print(f"변환: 전체 {len(all_coords)}개 / 연도 {len(by_year)}개, "
-      f"비행기제외 {flight_filtered}개, 시간파싱실패 {invalid_time}개")
-
-# 4) 중복 제거 helper
-def dedupe(coords):
-    return list({(a,b): [a,b] for a,b in coords}.values())
-
-# 5) 기존 데이터와 병합
-merged = {}
-merged['all'] = dedupe(existing.get('all', []) + all_coords)
-
-all_years = set(existing.keys()) | set(by_year.keys())
-all_years.discard('all')
-for y in all_years:
-    merged[y] = dedupe(existing.get(y, []) + by_year.get(y, []))
-
-# 6) 백업 및 쓰기
-if os.path.exists('heat_data.js'):
-    shutil.copy2('heat_data.js','heat_data_backup.js')
-    print("기존 heat_data.js 백업 완료 → heat_data_backup.js")
-
-with open('heat_data.js','w',encoding='utf-8') as f:
-    f.write('var heatDataByYear = {\n')
-    items = sorted(merged.items(), key=lambda x: ('0' if x[0]=='all' else x[0]))
-    for i, (year, data) in enumerate(items):
-        comma = ',' if i < len(items)-1 else ''
-        f.write(f'  "{year}": {json.dumps(data, ensure_ascii=False, separators=(",", ":"))}{comma}\n')
-    f.write('};')
-
-print("✅ heat_data.js 업데이트 완료")
+    # 전체/연도 분배 (반올림은 heat_agg에서 도시단위 격자로)
+    files.append(rec.get('file'))
+    lats.append(rec['lat'])
+    lngs.append(rec['lng'])
+    years.append(dt.year if dt else 0)
+    months.append(dt.year * 100 + dt.month if dt else 0)
+
+print(f"변환: 전체 {len(lats)}개, 비행기제외 {flight_filtered}개 (자동 감지 {len(motion['legs'])}개 구간), "
+      f"GPS오류제외 {glitch_filtered}개, 시간파싱실패 {invalid_time}개")
+
+# 4) 저장소에 반영 (격자 양자화 + 셀별 사진 수)
+#    로그 추가분만 읽었으면 파일 단위로 이전 기여를 빼고 더하고, 처음부터 다시 읽었으면(압축/로그 없음) 출처를 통째로 교체
+#    다음 실행 위치(체크포인트)도 같은 트랜잭션으로 기록
+meta = {CHECKPOINT_KEY: checkpoint} if checkpoint is not None else None
+if full:
+    n_cells = replace_source(conn, SOURCE, lats, lngs, years, meta=meta, months=months, files=files)
+    print(f"'{SOURCE}' 출처 교체: {n_cells}개 셀")
+else:
+    n_add, n_sub = merge_files(conn, SOURCE, files + removed, lats + [None] * len(removed),
+                               lngs + [None] * len(removed), years + [0] * len(removed),
+                               months + [0] * len(removed), meta=meta)
+    print(f"'{SOURCE}' 출처 반영: 점 {n_add}개 추가, 이전 기여 {n_sub}개 제거")
+
+# 5) 결과 파일 다시 내보내기
+merged = export_all(conn)
+
+print("✅ heat_data.js / heat_data.bin / heat_tiles/ 업데이트 완료")
 print(f"  • all: {len(merged['all'])}개 좌표")
 for y in sorted([k for k in merged.keys() if k!='all']):
     print(f"  • {y}: {len(merged[y])}개")
+
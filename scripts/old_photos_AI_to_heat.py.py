@@ -1,23 +1,18 @@
 # old_photos_AI_to_heat.py - oldphotos_ai_with - fixed.json을 heat_data.js에 병합
+#  - heat_store.sqlite의 'oldphotos_ai' 출처를 이 파일 내용으로 교체한 뒤 heat_data.js 등을 다시 내보냄
+#    (몇 번 실행해도 결과가 같음)
 import json
-import re
-import shutil
 import os
-from datetime import datetime
+from heat_store import open_store, ensure_migrated, replace_source, list_sources, export_all
+
+SOURCE = "oldphotos_ai"
 
 os.chdir(r"C:\Users\b_jin\My_Drive\github\travel_map\scripts")
 print("데이터 병합 시작...")
 
-# 1. 기존 heat_data.js 데이터 로드
-try:
-    with open('heat_data.js', 'r', encoding='utf-8') as f:
-        content = f.read()
-    match = re.search(r'var heatDataByYear = ({.*?});', content, re.DOTALL)
-    existing_heat_data = json.loads(match.group(1)) if match else {}
-    print(f"기존 heat_data.js 로드: {len(existing_heat_data)}개 연도")
-except:
-    existing_heat_data = {}
-    print("기존 heat_data.js 없음. 새로 생성")
+# 1. 히트맵 저장소 열기 (처음이면 기존 heat_data.js를 'legacy' 출처로 가져옴)
+conn = open_store()
+ensure_migrated(conn)
 
 # 2. oldphotos_ai_with - fixed.json 로드
 with open('oldphotos_ai_with - fixed.json', 'r', encoding='utf-8') as f:
@@ -25,63 +20,36 @@ with open('oldphotos_ai_with - fixed.json', 'r', encoding='utf-8') as f:
 print(f"oldphotos_ai_with - fixed.json 로드: {len(old_photos)}개 사진")
 
 # 3. 새 데이터 변환
-all_coords = []
-by_year = {}
+lats, lngs, years = [], [], []  # 연도 0 = 시간 없음 (all에만 포함)
+months = []  # YYYYMM (날짜 범위 조회용), 0 = 시간 없음
 
 for photo in old_photos:
     if not photo.get('lat') or not photo.get('lng'):
         continue
     
-    # 좌표 반올림 (기존과 동일)
-    lat = round(photo['lat'], 2)
-    lng = round(photo['lng'], 2)
-    coord = [lat, lng]
-    all_coords.append(coord)
+    lats.append(photo['lat'])
+    lngs.append(photo['lng'])
     
     # 연도별 분류
-    if photo.get('time'):
-        year = photo['time'][:4]  # "2014-01-15 12:53:04" -> "2014"
-        if year not in by_year:
-            by_year[year] = []
-        by_year[year].append(coord)
-
-print(f"변환 완료: {len(all_coords)}개 좌표, {len(by_year)}개 연도")
-
-# 4. 중복 제거
-def remove_dupes(coords):
-    return list({(c[0], c[1]): c for c in coords}.values())
+    time_str = photo.get('time') or ''
+    year = time_str[:4]  # "2014-01-15 12:53:04" -> "2014"
+    years.append(int(year) if year.isdigit() else 0)
+    month = time_str[5:7]
+    months.append(int(year) * 100 + int(month) if year.isdigit() and month.isdigit() else 0)
 
-# 5. 기존 데이터와 병합
-merged = {}
-merged['all'] = remove_dupes(existing_heat_data.get('all', []) + all_coords)
+# 4. 저장소의 이 출처만 교체 (소수점 둘째 자리 격자, 셀별 사진 수)
+n_cells = replace_source(conn, SOURCE, lats, lngs, years, months=months)
+print(f"변환 완료: {len(lats)}개 좌표 → '{SOURCE}' {n_cells}개 셀")
 
-all_years = set(existing_heat_data.keys()) | set(by_year.keys())
-all_years.discard('all')
-
-for year in all_years:
-    existing = existing_heat_data.get(year, [])
-    new = by_year.get(year, [])
-    merged[year] = remove_dupes(existing + new)
+# 5. 결과 파일 다시 내보내기 (heat_data.js, heat_data.bin, heat_tiles/)
+merged = export_all(conn)
 
 # 6. 통계 출력
 print(f"병합 결과:")
-print(f"  전체: {len(existing_heat_data.get('all', []))} + {len(all_coords)} = {len(merged['all'])}개")
+for source, cells, photos, updated in list_sources(conn):
+    print(f"  {source}: {cells}개 셀, {photos}장")
+print(f"  전체: {len(merged['all'])}개")
 for year in sorted([y for y in merged.keys() if y != 'all']):
-    old_count = len(existing_heat_data.get(year, []))
-    new_count = len(by_year.get(year, []))
-    print(f"  {year}년: {old_count} + {new_count} = {len(merged[year])}개")
-
-# 7. 파일 생성
-if os.path.exists('heat_data.js'):
-    shutil.copy2('heat_data.js', 'heat_data_backup.js')
-    print("기존 파일 백업 완료")
-
-with open('heat_data.js', 'w', encoding='utf-8') as f:
-    f.write('var heatDataByYear = {\n')
-    items = sorted(merged.items(), key=lambda x: ('0' if x[0] == 'all' else x[0]))
-    for i, (year, data) in enumerate(items):
-        comma = ',' if i < len(items) - 1 else ''
-        f.write(f'  "{year}": {json.dumps(data, separators=(",", ":"))}{comma}\n')
-    f.write('};')
+    print(f"  {year}년: {len(merged[year])}개")
 
 print("heat_data.js 업데이트 완료!")
\ No newline at end of file
@@ -0,0 +1,225 @@
+# photo_identity.py
+# 목적:
+#  - 같은 사진이 Takeout / 카메라 앨범(newphotos) / 옛날 백업(oldphotos)에 같이 있으면 가져올 때 바로 한 번만 남김
+#    (지금까지는 소스마다 자기 출력 안에서만 중복 제거 → 아래 단계에서 같은 사진이 여러 번 합쳐짐)
+#  - 전역 인덱스(SQLite 단일 파일 photo_identity.sqlite)에 사진마다 정규화 서명을 등록
+#    주인은 실행 순서와 상관없이 고정 우선순위(PRIORITY)로 정함: 원본에 가까운 소스가 주인
+#    → 우선순위가 낮은 소스의 같은 사진은 "중복"으로 빠짐 (먼저 가져왔어도 그 소스를 다음에 실행할 때 빠짐)
+#  - 소스+파일별 마지막 판정(dup_of)도 저장 → 판정이 바뀐 파일만 알려줌 (reclaim, 레코드 로그에 다시 기록용)
+#  - 증분: 이번에 바뀐 파일만 reclaim. 파일의 서명이 바뀌면(추가/삭제/이동) 주변에서 같은 사진으로 보이는
+#    우선순위가 낮은 소스의 서명에 stale 표시 → 그 소스가 다음에 실행될 때 stale_files()로 받아서 다시 판정
+#  - 서명: 좌표(소수 DECIMALS자리 격자 칸) + 촬영시각(초)
+#      Takeout 시각은 UTC, EXIF 시각은 현지 시각 → 시차(15분 단위)만큼 다를 수 있음
+#      → 해시 키 = (격자 칸, 시각 % 15분). 찾을 때는 주변 3x3 칸을 보고 좌표 차이가 COORD_TOL 이내인지 확인
+#         (소스마다 좌표 반올림 자릿수가 달라서 칸 경계에 걸린 사진도 찾도록)
+#      → 같은 시간 기준끼리(현지↔현지)는 시각이 정확히 같을 때,
+#         기준이 다르면(UTC↔현지) 시차가 경도로 어림한 시차(경도/15시간)에서 TZ_SLACK_SEC 이내일 때 같은 사진
+#  - 인덱스 전체를 읽지 않음: reclaim할 레코드의 파일 서명과 주변 3x3 칸만 SQL로 가져옴
+#    (값 목록은 임시 테이블에 넣고 bucket 인덱스 / 기본 키로 조회, 값이 표보다 많을 때(처음 전체 등록)만 표를 한 번 훑음)
+#  - 파일 크기는 Takeout 사이드카에 없고 재인코딩된 복사본이면 달라지므로 서명에 넣지 않음
+#  - 좌표나 시각이 없는 사진은 판별할 수 없으므로 항상 통과
+
+import sqlite3
+from pathlib import Path
+from timestamps import parse_many, epoch_seconds
+
+# === 설정 ===
+STORE_PATH = Path("photo_identity.sqlite")
+DECIMALS = 5               # 격자 칸 크기 (소수 5자리 ≈ 1m)
+COORD_TOL = 1e-5           # 같은 사진으로 볼 좌표 차이 (도, 격자 칸 크기 이하 → 3x3 칸 안에 들어옴)
+TZ_STEP_SEC = 900          # 시차 단위 (15분)
+TZ_SLACK_SEC = 3.5 * 3600  # 실제 시차와 경도로 어림한 시차의 최대 차이 (중국 서부, 스페인 여름 등)
+# 같은 사진이 여러 소스에 있을 때 주인 우선순위 (앞일수록 우선, 목록에 없는 소스는 맨 뒤 → 이름순)
+#   newphotos: 카메라 앨범 원본 EXIF / takeout: 서버 메타데이터(UTC) / oldphotos: 옛날 백업 복사본
+PRIORITY = ("newphotos", "takeout", "oldphotos")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS photos (
+    source  TEXT NOT NULL,      -- 소스 이름 (takeout / oldphotos / newphotos ...)
+    file    TEXT NOT NULL,      -- 소스 안에서의 파일 이름/상대경로
+    basis   TEXT NOT NULL,      -- 시각 기준: 'utc' 또는 'local'
+    bucket  TEXT NOT NULL,      -- '격자 lat,격자 lng,시각%TZ_STEP_SEC'
+    lat     REAL NOT NULL,
+    lng     REAL NOT NULL,
+    sec     INTEGER NOT NULL,   -- 1970-01-01 기준 초 (시간대 정보 없이)
+    dup_of  TEXT,               -- 마지막 판정: NULL = 주인, '소스:파일' = 그 사진의 중복
+    stale   INTEGER NOT NULL DEFAULT 0,  -- 1 = 우선순위가 높은 소스의 같은 사진이 바뀜 → 다시 판정 필요
+    PRIMARY KEY (source, file, bucket, sec)
+);
+CREATE TEMP TABLE IF NOT EXISTS want (v TEXT PRIMARY KEY);
+"""
+
+def open_index(db_path=STORE_PATH):
+    """인덱스 열기 → {"conn"} (조회는 reclaim에서 필요한 칸/파일만)"""
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(photos)")}
+    if "dup_of" not in cols:  # 우선순위 도입 전에 만든 인덱스 (등록된 사진은 모두 주인이었음)
+        conn.execute("ALTER TABLE photos ADD COLUMN dup_of TEXT")
+    if "stale" not in cols:
+        conn.execute("ALTER TABLE photos ADD COLUMN stale INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS photos_bucket ON photos (bucket)")
+    conn.execute("CREATE INDEX IF NOT EXISTS photos_stale ON photos (source) WHERE stale = 1")
+    return {"conn": conn}
+
+def has_source(index, source):
+    return index["conn"].execute("SELECT 1 FROM photos WHERE source = ? LIMIT 1", (source,)).fetchone() is not None
+
+def stale_files(index, source):
+    """우선순위가 높은 소스의 같은 사진이 바뀌어서 다시 reclaim해야 하는 파일 목록"""
+    return [f for (f,) in index["conn"].execute(
+        "SELECT DISTINCT file FROM photos WHERE source = ? AND stale = 1", (source,))]
+
+def dup_files(index, source):
+    """마지막 판정이 다른 소스의 중복인 파일 집합"""
+    return {f for (f,) in index["conn"].execute(
+        "SELECT DISTINCT file FROM photos WHERE source = ? AND dup_of IS NOT NULL", (source,))}
+
+def close_index(index):
+    index["conn"].close()
+
+def _select_in(conn, sql, values, params=()):
+    """values를 임시 테이블 want에 넣고 sql 실행 (sql 안에서 (SELECT v FROM want)로 참조)"""
+    with conn:
+        conn.execute("DELETE FROM want")
+        conn.executemany("INSERT OR IGNORE INTO want (v) VALUES (?)", ((v,) for v in values))
+    return conn.execute(sql, params).fetchall()
+
+def _is_bulk(conn, n):
+    """조회할 값이 표의 행 수(어림)보다 많으면 표를 한 번 훑는 게 더 빠름 (처음 전체 등록할 때)"""
+    return n >= (conn.execute("SELECT MAX(rowid) FROM photos").fetchone()[0] or 0)
+
+def _load_files(conn, source, files):
+    """→ ({(source, file): {서명 튜플: (bucket, dup_of)}}, stale 표시가 있는 (source, file) 집합)"""
+    cols = "SELECT file, basis, bucket, lat, lng, sec, dup_of, stale FROM photos WHERE source = ?"
+    if _is_bulk(conn, len(files)):
+        rows = [row for row in conn.execute(cols, (source,)) if row[0] in files]
+    else:
+        rows = _select_in(conn, cols + " AND file IN (SELECT v FROM want)", files, (source,))
+    out, stale = {}, set()
+    for file, basis, bucket, lat, lng, sec, dup_of, st in rows:
+        out.setdefault((source, file), {})[(source, file, basis, lat, lng, sec)] = (bucket, dup_of)
+        if st:
+            stale.add((source, file))
+    return out, stale
+
+def _load_buckets(conn, keys):
+    """→ {bucket: [(source, file, basis, lat, lng, sec), ...]} (keys에 있는 칸만)"""
+    cols = "SELECT bucket, source, file, basis, lat, lng, sec FROM photos"
+    if _is_bulk(conn, len(keys)):
+        rows = (row for row in conn.execute(cols) if row[0] in keys)
+    else:
+        rows = _select_in(conn, cols + " WHERE bucket IN (SELECT v FROM want)", keys)
+    out = {}
+    for bucket, *entry in rows:
+        out.setdefault(bucket, []).append(tuple(entry))
+    return out
+
+def _cell(v):
+    return int(v * 10 ** DECIMALS // 1)
+
+def _rank(source):
+    return (PRIORITY.index(source) if source in PRIORITY else len(PRIORITY), source)
+
+def _same_time(basis_a, sec_a, basis_b, sec_b, lng):
+    if basis_a == basis_b:
+        return sec_a == sec_b
+    offset = (sec_a - sec_b) if basis_b == "utc" else (sec_b - sec_a)  # 현지 - UTC
+    return abs(offset - lng / 15.0 * 3600) <= TZ_SLACK_SEC
+
+def _around(key):
+    cy, cx, phase = (int(v) for v in key.split(","))
+    return [f"{cy + dy},{cx + dx},{phase}" for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+def _matches(buckets, around, entry):
+    """서명 entry와 같은 사진으로 보이는 다른 소스의 서명들 (around = 주변 3x3 칸 키)"""
+    source, _, basis, lat, lng, sec = entry
+    for k in around:
+        for cand in buckets.get(k, ()):
+            src, _, b, la, ln, s = cand
+            if src != source and abs(la - lat) <= COORD_TOL and abs(ln - lng) <= COORD_TOL \
+                    and _same_time(b, s, basis, sec, lng):
+                yield cand
+
+def reclaim(index, source, records, basis="local", time_key="time"):
+    """
+    레코드 목록({"file", "lat", "lng", time_key}) → (owners, changed)
+      owners : 레코드마다 None(이 소스가 주인) 또는 "다른소스:파일"(우선순위가 더 높은 소스의 중복)
+      changed: 레코드마다 지난 판정(저장된 dup_of)과 달라졌는지 (처음 보는 사진은 중복일 때만 True)
+    목록에 있는 파일은 서명을 이번 레코드 것으로 교체(파일이 바뀌었거나 좌표/시각이 없어지면 예전 서명 삭제)하고
+    판정도 저장. 서명이 바뀐 파일 주변의 우선순위가 낮은 같은 사진에는 stale 표시. 좌표나 시각이 없는 레코드는 통과
+    """
+    conn = index["conn"]
+    my_rank = _rank(source)
+    times, _ = parse_many([r.get(time_key) for r in records])
+    sigs = []  # 레코드마다 (서명, bucket, 주변 칸) 또는 None
+    for r, dt in zip(records, times):
+        lat, lng = r.get("lat"), r.get("lng")
+        if dt is None or lat is None or lng is None:
+            sigs.append(None)
+            continue
+        sec = epoch_seconds([dt])[0]
+        cy, cx, phase = _cell(lat), _cell(lng), sec % TZ_STEP_SEC
+        sigs.append(((source, r["file"], basis, lat, lng, sec), f"{cy},{cx},{phase}",
+                     [f"{cy + dy},{cx + dx},{phase}" for dy in (-1, 0, 1) for dx in (-1, 0, 1)]))
+    files, stale = _load_files(conn, source, {r["file"] for r in records})
+    keys = {k for sig in sigs if sig for k in sig[2]}
+    keys.update(k for old in files.values() for key, _ in old.values() for k in _around(key))
+    buckets = _load_buckets(conn, keys)
+    # 우선순위가 낮은 소스가 주변에 없으면 stale 표시할 것도 없음
+    has_lower = any(_rank(e[0]) > my_rank for cands in buckets.values() for e in cands)
+
+    owners, changed = [], []
+    new_files = {}  # (source, file) → {서명: (bucket, dup_of)}
+    for r, sig in zip(records, sigs):
+        old = files.get((source, r["file"]), {})
+        mine = new_files.setdefault((source, r["file"]), {})
+        if sig is None:
+            owners.append(None)
+            changed.append(any(dup is not None for _, dup in old.values()))
+            continue
+        entry, key, around = sig
+        best = None  # (우선순위, 소스, 파일)
+        for src, file, *_ in _matches(buckets, around, entry):
+            cand = _rank(src) + (file,)
+            if cand[:2] < my_rank and (best is None or cand < best):
+                best = cand
+        owner = f"{best[1]}:{best[2]}" if best is not None else None
+        mine[entry] = (key, owner)
+        owners.append(owner)
+        changed.append(old.get(entry, (None, None))[1] != owner)
+
+    deletes, inserts, lower = [], [], set()
+    for fk, mine in new_files.items():
+        old = files.get(fk, {})
+        if old == mine and fk not in stale:
+            continue
+        deletes.append(fk)
+        inserts.extend((e[0], e[1], e[2], key, e[3], e[4], e[5], owner) for e, (key, owner) in mine.items())
+        if not has_lower or old.keys() == mine.keys():
+            continue
+        # 서명이 바뀜 → 이 사진을 주인으로 봤거나 볼 수 있는 우선순위가 낮은 소스는 다시 판정
+        for entry in old.keys() ^ mine.keys():
+            around = _around((mine.get(entry) or old[entry])[0])
+            lower.update((src, file) for src, file, *_ in _matches(buckets, around, entry) if _rank(src) > my_rank)
+    if deletes or lower:
+        with conn:
+            conn.executemany("DELETE FROM photos WHERE source = ? AND file = ?", deletes)
+            conn.executemany("""
+                INSERT OR REPLACE INTO photos (source, file, basis, bucket, lat, lng, sec, dup_of)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, inserts)
+            conn.executemany("UPDATE photos SET stale = 1 WHERE source = ? AND file = ?", sorted(lower))
+    return owners, changed
+
+def claim(index, source, records, basis="local", time_key="time"):
+    """reclaim()의 판정만 → 레코드마다 None(통과) 또는 "다른소스:파일"(중복)"""
+    return reclaim(index, source, records, basis, time_key)[0]
+
+def drop_duplicates(index, source, records, basis="local", time_key="time"):
+    """claim() 후 다른 소스에 이미 있는 사진을 뺀 목록 → (남은 레코드, 뺀 수)"""
+    owners = claim(index, source, records, basis, time_key)
+    kept = [r for r, o in zip(records, owners) if o is None]
+    return kept, len(records) - len(kept)
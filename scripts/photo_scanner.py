@@ -0,0 +1,366 @@
+# photo_scanner.py
+# 사진 폴더 EXIF 스캐너 공용 코어 (new_photos.py / old_photos.py 가 설정만 바꿔서 사용)
+# 기능:
+#  - 루트/확장자/제외폴더를 받아서 EXIF에서 GPS/촬영시각 추출
+#  - SQLite 인덱스(scan_store)로 mtime/size 기준 증분 처리
+#  - os.scandir 탐색 + 폴더 mtime 기록 → 변경 없는 폴더는 파일 stat 없이 건너뜀
+#    다시 읽은 폴더에서 사라진 파일/하위폴더는 저장소에서 지우고 로그에 삭제 레코드(좌표 없음)를 남김
+#    폴더 mtime은 파일을 덮어쓰기만 하면 바뀌지 않음 → full_check_days마다 한 번은 건너뛰기 없이 전체 확인
+#  - 결과를 <prefix>.ndjson(append-only 레코드 로그) / CSV 보고서로 저장
+#    (write_json=True면 예전 형식의 <prefix>_with.json / <prefix>_without.json도 재생성)
+#  - identity=True면 우선순위가 더 높은 다른 소스(Takeout 등)에 있는 사진은 출력에서 뺌 (photo_identity)
+
+import os, csv, json, sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from PIL import Image, ExifTags
+from exif_reader import read_exif_basic
+import scan_store
+import record_log
+import photo_identity
+
+# 병렬 스캔 기본값 (workers <= 1 이면 순차 처리)
+WORKERS = os.cpu_count() or 1
+CHUNKSIZE = 64  # 프로세스 하나에 한 번에 넘기는 파일 수
+
+# === EXIF 유틸 ===
+GPSTAGS = ExifTags.GPSTAGS
+
+def _rational_to_float(x):
+    try:
+        # Pillow의 IFDRational
+        return float(getattr(x, 'numerator', x[0])) / float(getattr(x, 'denominator', x[1]))
+    except Exception:
+        try:
+            return float(x)
+        except Exception:
+            return None
+
+def _dms_to_deg(dms, ref):
+    """((d_num,d_den),(m_num,m_den),(s_num,s_den)), 'N/E/S/W' -> signed degree"""
+    try:
+        d = _rational_to_float(dms[0])
+        m = _rational_to_float(dms[1])
+        s = _rational_to_float(dms[2])
+        if None in (d, m, s):
+            return None
+        deg = d + (m / 60.0) + (s / 3600.0)
+        if ref in ("S", "W"):
+            deg = -deg
+        return deg
+    except Exception:
+        return None
+
+def extract_exif_basic(img_path: Path):
+    """
+    이미지에서 (lat, lng, time_str) 추출
+    time_str: 'YYYY-MM-DD HH:MM:SS' 또는 None
+    JPEG/TIFF는 헤더만 읽는 exif_reader 사용, 그 외 형식은 Pillow로 폴백
+    """
+    res = read_exif_basic(img_path)
+    if res is not None:
+        return res
+    return extract_exif_pillow(img_path)
+
+def extract_exif_pillow(img_path: Path):
+    """Pillow로 이미지를 열어서 (lat, lng, time_str) 추출 (PNG/HEIC 등 폴백용)"""
+    try:
+        with Image.open(img_path) as im:
+            exif = im._getexif() or {}
+    except Exception:
+        return None, None, None  # 이미지 열기 실패 또는 EXIF 없음
+
+    gps_raw = {}
+    dt_original = None
+
+    for tag_id, value in exif.items():
+        tag = ExifTags.TAGS.get(tag_id, tag_id)
+        if tag == "GPSInfo":
+            for k, v in value.items():
+                gps_tag = GPSTAGS.get(k, k)
+                gps_raw[gps_tag] = v
+        elif tag in ("DateTimeOriginal", "DateTime"):
+            # 예: "2019:01:23 18:30:22"
+            try:
+                dt_original = datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+            except Exception:
+                dt_original = None
+
+    lat = lng = None
+    if gps_raw:
+        lat = _dms_to_deg(gps_raw.get("GPSLatitude"), gps_raw.get("GPSLatitudeRef", "N"))
+        lng = _dms_to_deg(gps_raw.get("GPSLongitude"), gps_raw.get("GPSLongitudeRef", "E"))
+
+    time_str = dt_original.strftime("%Y-%m-%d %H:%M:%S") if dt_original else None
+    return lat, lng, time_str
+
+def scan_exif(paths, workers=WORKERS, chunksize=CHUNKSIZE):
+    """
+    paths 각각에 extract_exif_basic 적용 → 입력 순서 그대로 결과 리스트 반환
+    workers > 1 이면 프로세스 풀에 chunksize 단위로 나눠서 처리
+    """
+    paths = list(paths)
+    if workers <= 1 or len(paths) < 2:
+        return [extract_exif_basic(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        # map은 입력 순서대로 결과를 돌려주므로 순차 실행과 출력이 동일
+        return list(ex.map(extract_exif_basic, paths, chunksize=chunksize))
+
+def is_valid_coord(lat, lng):
+    if lat is None or lng is None: return False
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180): return False
+    if lat == 0.0 and lng == 0.0: return False
+    return True
+
+# === 증분처리 ===
+def need_process(key, sig, index):
+    """sig: {"size", "mtime"} (탐색 중 DirEntry.stat()으로 얻은 값)"""
+    return scan_store.lookup_sig(index, key) != sig
+
+def walk_photos(root: Path, exts, skip_folders=(), known_dirs=None, prune=True):
+    """
+    os.scandir 기반 탐색 → (files, dir_rows, total, seen)
+      files   : [(Path, {"size", "mtime"})] 이번에 확인이 필요한 파일
+      dir_rows: 새로 기록할 폴더 (key, mtime, nfiles, subdirs)
+      total   : 대상 확장자 파일 수 (건너뛴 폴더 포함)
+      seen    : {"dirs": 항목을 다시 읽은 폴더 key, "files": 그 폴더들에서 찾은 파일 key,
+                 "gone": 사라진(또는 제외된) 하위 폴더 key} → scan_store.remove_missing 용
+    prune=True면 mtime이 기록과 같은 폴더는 파일 stat 없이 하위 폴더만 내려감
+    (폴더 mtime은 항목 추가/삭제 때만 바뀌므로, 파일 내용만 덮어쓴 경우는 prune=False로 확인)
+    """
+    known_dirs = known_dirs or {}
+    files, dir_rows = [], []
+    seen = {"dirs": set(), "files": set(), "gone": []}
+    total = 0
+    stack = [(root, os.stat(root).st_mtime)]
+    while stack:
+        d, mtime = stack.pop()
+        key = scan_store.path_key(d)
+        old = known_dirs.get(key)
+        if prune and old and old["mtime"] == mtime:
+            total += old["nfiles"]
+            for name in reversed(old["subdirs"]):
+                try:
+                    stack.append((d / name, os.stat(d / name).st_mtime))
+                except OSError:
+                    seen["gone"].append(scan_store.path_key(d / name))  # 사라진 폴더
+            continue
+
+        nfiles, subdirs = 0, []
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if e.name not in skip_folders:
+                        subdirs.append((e.name, e.stat(follow_symlinks=False).st_mtime))
+                elif e.is_file() and os.path.splitext(e.name)[1].lower() in exts:
+                    st = e.stat()
+                    nfiles += 1
+                    files.append((Path(e.path), {"size": st.st_size, "mtime": st.st_mtime}))
+                    seen["files"].add(scan_store.path_key(Path(e.path)))
+            except OSError:
+                continue
+        total += nfiles
+        seen["dirs"].add(key)
+        names = {name for name, _ in subdirs}
+        seen["gone"].extend(scan_store.path_key(d / name) for name in (old or {}).get("subdirs", ())
+                            if name not in names)
+        dir_rows.append((key, mtime, nfiles, [name for name, _ in subdirs]))
+        for name, sub_mtime in reversed(subdirs):
+            stack.append((d / name, sub_mtime))
+    return files, dir_rows, total, seen
+
+def iter_photos(root: Path, exts, skip_folders=()):
+    """root 하위에서 확장자가 맞고 제외폴더에 속하지 않는 파일만"""
+    for p in root.rglob("*"):
+        if not p.is_file() or p.suffix.lower() not in exts:
+            continue
+        if skip_folders and any(part in skip_folders for part in p.relative_to(root).parts):
+            continue
+        yield p
+
+def mark_identity_dups(records, owners):
+    """다른 소스의 중복인 사진은 좌표를 비우고 dup_of에 주인을 적음 (레코드 로그는 마지막 레코드가 유효)"""
+    return [rec if o is None else {**rec, "lat": None, "lng": None, "dup_of": o}
+            for rec, o in zip(records, owners)]
+
+def dedup_by_position(records):
+    """(lat, lng, time) 기준 중복 제거"""
+    seen, out = set(), []
+    for rec in records:
+        key = (rec["lat"], rec["lng"], rec.get("time"))
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(rec)
+    return out
+
+# === 실행 ===
+def run(root: Path, out_dir: Path, prefix: str, exts, skip_folders=(),
+        legacy_index_path=None, rebuild_csv=False, dedup_position=False,
+        prune_dirs=True, write_json=True, identity=False, workers=WORKERS, chunksize=CHUNKSIZE,
+        full_check_days=None):
+    """
+    root 하위 사진을 증분 스캔해서 out_dir에 저장
+      - <prefix>_index.sqlite : 증분 인덱스 (경로별 size/mtime + lat/lng/time)
+      - <prefix>.ndjson : 레코드 로그 (새로 처리한 파일만 append, 가끔 압축)
+      - <prefix>_with.json / <prefix>_without.json (write_json=True일 때, 변경이 있으면 재생성)
+      - <prefix>_exif_scan_report.csv (rebuild_csv=False면 새 처리분만 추가)
+    dedup_position=True면 with 목록을 (lat, lng, time) 기준으로 중복 제거
+    prune_dirs=True면 항목 구성이 바뀌지 않은 폴더는 통째로 건너뜀
+      (제자리에서 덮어쓴 파일은 못 찾음 → full_check_days를 주면 마지막 전체 탐색 후 그 일수가 지났을 때
+       한 번은 건너뛰기 없이 모든 파일의 size/mtime 확인)
+    다시 읽은 폴더에서 사라진 파일/폴더는 저장소에서 지우고 로그에 좌표 없는 레코드를 남김 (히트맵에서 빠짐)
+    identity=True면 out_dir/photo_identity.sqlite(전역 사진 인덱스)에 prefix 이름으로 등록하고
+    (처음 한 번은 저장소 전체, 이후에는 바뀐 파일만), 우선순위가 더 높은 소스에 있는 사진은 로그/with JSON에서 뺌
+    (판정이 바뀐 파일은 새로 처리하지 않았어도 로그에 다시 기록 → 히트맵에서 이전 기여가 빠지거나 되살아남)
+    """
+    if not root.exists():
+        print(f"경로 없음: {root}")
+        sys.exit(1)
+
+    index_path = out_dir / f"{prefix}_index.sqlite"
+    with_json = out_dir / f"{prefix}_with.json"
+    without_json = out_dir / f"{prefix}_without.json"
+    csv_path = out_dir / f"{prefix}_exif_scan_report.csv"
+    log_path = out_dir / f"{prefix}.ndjson"
+
+    index = scan_store.open_store(index_path)
+    if legacy_index_path is not None:
+        moved = scan_store.migrate_json_index(index, legacy_index_path, root, with_json, without_json)
+        if moved:
+            print(f"기존 JSON 인덱스 이전: {moved}개")
+
+    index_rows = []
+    log_rows = []
+    csv_rows = []
+
+    # 1) 처리 대상 수집 (탐색 순서 유지)
+    prune = prune_dirs
+    last_full = scan_store.get_meta(index, "full_walk")
+    now = datetime.now().timestamp()
+    if prune and full_check_days is not None and (last_full is None or now - last_full > full_check_days * 86400):
+        prune = False
+        print(f"마지막 전체 확인 후 {full_check_days}일 지남 → 모든 폴더 확인")
+    found, dir_rows, total, seen = walk_photos(root, exts, skip_folders, scan_store.load_dirs(index), prune)
+    sigs = {}
+    targets = []
+    for p, sig in found:
+        key = scan_store.path_key(p)
+        if need_process(key, sig, index):
+            sigs[key] = sig
+            targets.append(p)
+
+    # 2) EXIF 추출 (병렬) → 탐색 순서대로 결과 병합
+    touched = len(targets)  # 이번 실행에서 새로 처리한 파일 수
+    for p, (lat, lng, tstr) in zip(targets, scan_exif(targets, workers, chunksize)):
+        rel = p.relative_to(root).as_posix()
+
+        has_gps = is_valid_coord(lat, lng)
+        has_time = tstr is not None
+
+        csv_rows.append({
+            "path": rel,
+            "has_gps": "Y" if has_gps else "N",
+            "lat": lat if has_gps else "",
+            "lng": lng if has_gps else "",
+            "has_time": "Y" if has_time else "N",
+            "time": tstr or ""
+        })
+
+        # 인덱스 업데이트 (좌표/시각도 함께 저장)
+        key = scan_store.path_key(p)
+        index_rows.append((key, rel, sigs[key]["size"], sigs[key]["mtime"],
+                           lat if has_gps else None, lng if has_gps else None, tstr))
+        log_rows.append(scan_store.to_log_record(rel, lat if has_gps else None,
+                                                 lng if has_gps else None, tstr))
+
+    # 인덱스 저장 (변경분만, 파일 → 폴더 순서로 기록해야 중단 시에도 안전)
+    # 사라진 파일은 지우고 로그에는 좌표 없는 레코드로 기록
+    removed = scan_store.remove_missing(index, seen["dirs"], seen["files"], seen["gone"])
+    removed_rows = [scan_store.to_log_record(rel, None, None, None) for rel in removed]
+    log_rows.extend(removed_rows)
+    scan_store.upsert_files(index, index_rows)
+    scan_store.upsert_dirs(index, dir_rows)
+    if not prune:
+        scan_store.set_meta(index, "full_walk", now)
+
+    # 레코드 로그: 처음이면 저장소 전체로 시작, 이후에는 새 처리분만 append
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ident = photo_identity.open_index(out_dir / photo_identity.STORE_PATH.name) if identity else None
+    n_dup = 0
+    dup_files = set()
+    dup_changed = False
+    new_log = not log_path.exists()
+    if ident is not None:
+        # 인덱스에 이 소스가 없거나 로그가 새로 시작되면 한 번만 저장소 전체로 판정 (지난 판정을 모르므로 로그에 전부 기록)
+        # 그 뒤로는 이번에 처리/삭제한 파일 + 우선순위가 높은 소스가 바뀌어서 stale 표시된 파일만 판정
+        backfill = new_log or not photo_identity.has_source(ident, prefix)
+        if backfill:
+            rows = list(scan_store.iter_log_records(index)) + removed_rows  # 사라진 파일은 좌표 없는 레코드로 → 서명도 지움
+        else:
+            rows = list(log_rows)
+            done = {rec["file"] for rec in rows}
+            for rel in photo_identity.stale_files(ident, prefix):
+                if rel not in done:
+                    rec = scan_store.log_record(index, scan_store.path_key(root / rel))
+                    rows.append(rec or scan_store.to_log_record(rel, None, None, None))
+        owners, changed = photo_identity.reclaim(ident, prefix, rows)
+        dup_files = photo_identity.dup_files(ident, prefix)
+        n_dup = len(dup_files)
+        dup_changed = any(changed)
+        touched_files = {rec["file"] for rec in log_rows}
+        log_rows = [rec for rec, c in zip(mark_identity_dups(rows, owners), changed)
+                    if backfill or c or rec["file"] in touched_files]
+    elif new_log:
+        log_rows = list(scan_store.iter_log_records(index))
+    record_log.append(log_path, log_rows)
+    if not new_log and record_log.maybe_compact(log_path) is not None:
+        print(f"레코드 로그 압축: {log_path.name}")
+
+    # with/without JSON은 저장소에서 재생성 (변경이 없으면 그대로 둠)
+    n_with, n_without = scan_store.count_with_without(index)
+    if write_json and (touched or removed or dup_changed or not with_json.exists() or not without_json.exists()):
+        merged_with = list(scan_store.iter_with(index))
+        if dedup_position:
+            merged_with = dedup_by_position(merged_with)
+        if ident is not None:
+            merged_with = [rec for rec in merged_with if rec["file"] not in dup_files]
+        n_with = len(merged_with)
+        with_json.write_text(json.dumps(merged_with, ensure_ascii=False, indent=2), encoding="utf-8")
+        without_json.write_text(json.dumps(list(scan_store.iter_without(index)),
+                                           ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if rebuild_csv:
+        if touched or removed or not csv_path.exists():
+            scan_store.write_csv_report(index, csv_path)
+    else:
+        # CSV는 새 처리분만 추가 기록
+        write_header = not csv_path.exists()
+        with open(csv_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=scan_store.CSV_FIELDS)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(csv_rows)
+    index.close()
+    if ident is not None:
+        photo_identity.close_index(ident)
+
+    print("=== 완료 ===")
+    print(f"전체 파일(탐색): {total}")
+    print(f"이번 실행 처리: {touched}")
+    print(f"사라진 파일 정리: {len(removed)}")
+    print(f"누적 GPS 사진: {n_with}  | 누적 무GPS 사진: {n_without}")
+    if ident is not None:
+        print(f"다른 소스와 중복이라 뺀 사진: {n_dup}")
+    print(f"- LOG : {log_path}")
+    if write_json:
+        print(f"- JSON: {with_json}")
+        print(f"- JSON: {without_json}")
+    print(f"- CSV : {csv_path}")
+    print(f"- INDEX : {index_path}")
@@ -0,0 +1,55 @@
+# photo_sources.py
+# 목적:
+#  - 위치가 있는 사진 소스(takeout / 옛날 사진 / 새 사진)를 한 번에 읽는 공용 로더
+#  - place_stats_gen.py, trips_gen.py 등 "사진 전체"가 필요한 빌드 단계에서 사용
+#  - 소스별로 시간 형식이 같으므로 소스 단위로 parse_many 일괄 파싱
+
+import json
+from pathlib import Path
+import numpy as np
+import record_log
+from timestamps import parse_many, format_stats
+
+# (파일, 시간 키 후보) - 없는 파일은 건너뜀
+PHOTO_SOURCES = [
+    ("takeout_with_location.json", ["timestamp", "time", "date", "taken_time", "photo_taken_time"]),
+    ("oldphotos_with.json", ["time"]),
+    ("oldphotos_ai_with - fixed.json", ["time"]),
+    ("newphotos.ndjson", ["time"]),
+]
+
+def load_photos(path, time_keys):
+    """파일 하나 → (lat 리스트, lng 리스트, 시간 문자열 리스트)"""
+    path = Path(path)
+    if path.suffix == ".ndjson":
+        records = list(record_log.iter_latest(path))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    lats, lngs, raws = [], [], []
+    for r in records:
+        if r.get("lat") is None or r.get("lng") is None:
+            continue
+        lats.append(r["lat"])
+        lngs.append(r["lng"])
+        raws.append(next((str(r[k]) for k in time_keys if r.get(k)), None))
+    return lats, lngs, raws
+
+def load_all(sources=PHOTO_SOURCES, verbose=True):
+    """
+    모든 소스 → (lats, lngs, times, source_ids)
+    times: datetime/None 리스트, source_ids: 소스 번호(PHOTO_SOURCES 순서) int 배열
+    """
+    lats, lngs, times, ids = [], [], [], []
+    for i, (path, keys) in enumerate(sources):
+        if not Path(path).exists():
+            continue
+        la, ln, raws = load_photos(path, keys)
+        parsed, stats = parse_many(raws)
+        if verbose:
+            print(f"  {path}: {len(la)}개 사진, 시간 파싱 {format_stats(stats)}")
+        lats += la
+        lngs += ln
+        times += parsed
+        ids += [i] * len(la)
+    return lats, lngs, times, np.asarray(ids, dtype=np.int64)
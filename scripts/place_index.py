@@ -0,0 +1,160 @@
+# place_index.py
+# 목적:
+#  - markers.js / data/custom_places.json 의 장소를 공간 인덱스(3차원 격자)에 넣고
+#    사진 좌표 전체를 한 번에 "반경 안에서 가장 가까운 장소"에 배정 (NumPy 일괄 처리)
+#  - 위경도를 단위 구 위 3차원 좌표로 바꿔서 반경 크기 격자에 담음 → 경도 180° 경계/고위도도 문제없음
+#  - 반경이 제각각이면 반경 등급(2배 단위)별로 따로 격자를 만듦
+#    (격자 한 칸 = 등급의 가장 큰 반경 → 작은 반경 장소가 큰 칸에 몰려서 후보가 폭증하지 않음)
+#  - 사진마다 주변 27칸만 확인 (칸 조회는 정렬된 키에 searchsorted, 이웃 칸 = 키 + 오프셋)
+#    칸에 든 장소 수만큼 (사진, 후보) 쌍을 펼쳐서 한 번에 거리 계산 → O(n log m + 실제 후보 쌍 수)
+#  - 격자 칸은 MIN_CELL_KM보다 작게 만들지 않음 → 반경이 아주 작아도 칸 키(int64)가 넘치지 않음
+#
+# 장소 형식:
+#   markers.js         : var markers = [{lat, lng, popup, tooltip, link, year}, ...]
+#   custom_places.json : [{"name", "lat", "lng", "radius_km"(선택)}, ...]  (비어 있으면 무시)
+
+import json, math, re
+from itertools import product
+from pathlib import Path
+import numpy as np
+from geo import unit_xyz, chord, chord_to_km
+
+RADIUS_KM = 3.0  # 기본 반경 (장소에 radius_km가 있으면 그 값)
+MIN_CELL_KM = 0.05       # 격자 칸 최소 크기 (칸 수가 한 변 약 25만 → 키 < 2^54)
+PAIR_CHUNK = 2_000_000   # (사진, 후보) 쌍 배열 한 번에 만들 최대 크기
+
+def place_key(lat, lng):
+    """장소 식별자 (지도에서 마커 좌표로 찾을 수 있게)"""
+    return f"{lat:.5f},{lng:.5f}"
+
+# === 장소 읽기 ===
+_FIELD_RE = re.compile(r'(\w+)\s*:\s*("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|-?\d+(?:\.\d+)?)')
+
+def load_markers_js(path):
+    """markers.js(JS 객체 리터럴)에서 {키: 문자열/숫자} 목록 추출. 주석/URL 안의 // 는 건드리지 않음"""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    places = []
+    for block in re.findall(r"\{(.*?)\}", text, re.S):
+        obj = {}
+        for key, val in _FIELD_RE.findall(block):
+            obj[key] = json.loads(val) if val[0] == '"' else val[1:-1] if val[0] == "'" else json.loads(val)
+        if "lat" in obj and "lng" in obj:
+            places.append(obj)
+    return places
+
+def load_custom_places(path):
+    try:
+        text = Path(path).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return []
+    data = json.loads(text) if text else []
+    return [p for p in data if p.get("lat") is not None and p.get("lng") is not None]
+
+# === 공간 인덱스 ===
+def _pack(q, half):
+    side = 2 * half + 1
+    return ((q[:, 0] + half) * side + (q[:, 1] + half)) * side + (q[:, 2] + half)
+
+def _grid(xyz, ids, radius):
+    """반경 등급 하나의 격자 (한 칸 = 등급에서 가장 큰 반경, 최소 MIN_CELL_KM)"""
+    cell = float(chord(max(float(radius.max()), MIN_CELL_KM)))
+    half = int(math.ceil(1.0 / cell)) + 2
+    side = 2 * half + 1
+    keys = _pack(np.floor(xyz / cell).astype(np.int64), half)
+    order = np.argsort(keys, kind="stable")
+    offsets = np.array([(dx * side + dy) * side + dz for dx, dy, dz in product((-1, 0, 1), repeat=3)],
+                       dtype=np.int64)
+    return {"keys": keys[order], "xyz": xyz[order], "ids": ids[order], "r2": chord(radius[order]) ** 2,
+            "cell": cell, "half": half, "offsets": offsets}
+
+def build_place_index(lats, lngs, radius_km=RADIUS_KM):
+    """
+    장소 좌표 → 인덱스 dict
+    radius_km: 숫자 하나 또는 장소별 배열. 반경 등급(2배 단위)마다 격자 하나
+    """
+    xyz = unit_xyz(lats, lngs).reshape(-1, 3)
+    radius = np.broadcast_to(np.asarray(radius_km, dtype=np.float64), (len(xyz),))
+    ids = np.arange(len(xyz))
+    level = np.ceil(np.log2(np.maximum(radius, MIN_CELL_KM))).astype(np.int64)
+    grids = [_grid(xyz[level == c], ids[level == c], radius[level == c]) for c in np.unique(level).tolist()]
+    return {"grids": grids, "size": len(xyz)}
+
+def _chunks(counts, limit=PAIR_CHUNK):
+    """후보 수 배열 → 쌍 수 합이 대략 limit 이하인 [시작, 끝) 구간들 (한 점은 쪼개지 않음)"""
+    csum = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        base = csum[start - 1] if start else 0
+        end = max(start + 1, int(np.searchsorted(csum, base + limit, "right")))
+        yield start, end
+        start = end
+
+def assign_nearest(index, lats, lngs):
+    """
+    사진 좌표 배열 → (장소 번호 배열, 거리 km 배열). 반경 안에 장소가 없으면 -1 / inf
+    장소 번호는 build_place_index에 넣은 순서
+    """
+    p = unit_xyz(lats, lngs).reshape(-1, 3)
+    n = len(p)
+    best = np.full(n, -1, dtype=np.int64)
+    best_d2 = np.full(n, np.inf)
+    for g in index["grids"]:
+        keys, xyz, r2 = g["keys"], g["xyz"], g["r2"]
+        k = _pack(np.floor(p / g["cell"]).astype(np.int64), g["half"])
+        for off in g["offsets"].tolist():
+            lo = np.searchsorted(keys, k + off, "left")
+            cnt = np.searchsorted(keys, k + off, "right") - lo
+            pts = np.flatnonzero(cnt)
+            cnt = cnt[pts]
+            for s, e in _chunks(cnt):
+                c = cnt[s:e]
+                pt = np.repeat(pts[s:e], c)
+                cand = np.repeat(lo[pts[s:e]] - (np.cumsum(c) - c), c) + np.arange(int(c.sum()))
+                d2 = ((p[pt] - xyz[cand]) ** 2).sum(axis=1)
+                ok = np.flatnonzero(d2 <= r2[cand])
+                if len(ok) == 0:
+                    continue
+                # 사진마다 가장 가까운 후보 하나
+                o = ok[np.lexsort((d2[ok], pt[ok]))]
+                o = o[np.r_[True, pt[o][1:] != pt[o][:-1]]]
+                better = o[d2[o] < best_d2[pt[o]]]
+                best[pt[better]] = g["ids"][cand[better]]
+                best_d2[pt[better]] = d2[better]
+    found = best >= 0
+    dist = np.full(n, np.inf)
+    dist[found] = chord_to_km(np.sqrt(best_d2[found]))
+    return best, dist
+
+# === 장소별 통계 ===
+def place_stats(assigned, times, n_places):
+    """
+    assigned: 사진별 장소 번호(-1 = 없음), times: 사진별 datetime/None
+    → 장소별 {"count", "first", "last", "years"} 목록 (사진이 없으면 count 0)
+    """
+    assigned = np.asarray(assigned, dtype=np.int64)
+    count = np.bincount(assigned[assigned >= 0], minlength=n_places)
+    has_t = np.array([t is not None for t in times], dtype=bool) & (assigned >= 0)
+    idx = np.flatnonzero(has_t)
+    days = np.array([times[i].toordinal() for i in idx], dtype=np.int64)
+    years = np.array([times[i].year for i in idx], dtype=np.int64)
+    first = np.full(n_places, np.iinfo(np.int64).max)
+    last = np.full(n_places, -1, dtype=np.int64)
+    np.minimum.at(first, assigned[idx], days)
+    np.maximum.at(last, assigned[idx], days)
+    place_years = {}
+    for packed in np.unique(assigned[idx] * 10000 + years).tolist():
+        place_years.setdefault(packed // 10000, []).append(packed % 10000)
+
+    from datetime import date
+    out = []
+    for i in range(n_places):
+        out.append({
+            "count": int(count[i]),
+            "first": date.fromordinal(int(first[i])).isoformat() if last[i] >= 0 else None,
+            "last": date.fromordinal(int(last[i])).isoformat() if last[i] >= 0 else None,
+            "years": place_years.get(i, []),
+        })
+    return out
@@ -0,0 +1,76 @@
+# place_stats_gen.py
+# 목적:
+#  - 위치가 있는 사진 전체(takeout / 옛날 사진 / 새 사진)를 markers.js, data/custom_places.json 장소에 연결
+#  - 사진마다 반경 안에서 가장 가까운 장소 하나에 배정 (place_index: 격자 인덱스로 한 번에 처리)
+#  - 장소별 사진 수, 처음/마지막 방문 날짜, 방문 연도, 나라/도시 → place_stats.js (지도 마커 팝업에 표시)
+#
+# place_stats.js:
+#   var placeStats = {"<lat>,<lng>": {"name", "count", "first", "last", "years", "country", "city"}, ...}
+#   키는 장소 좌표 소수점 5자리 (지도에서 마커 좌표로 찾음)
+
+import json, os, time
+from pathlib import Path
+from photo_sources import load_all
+from heat_store import open_store, label_points
+from place_index import (RADIUS_KM, place_key, load_markers_js, load_custom_places,
+                         build_place_index, assign_nearest, place_stats)
+
+# 작업 디렉토리(사진 JSON들과 markers.js가 있는 scripts 폴더)로 변경
+home = os.path.expanduser("~")
+os.chdir(os.path.join(home, "My_Drive", "github", "travel_map", "scripts"))
+
+# === 설정 ===
+MARKERS_PATH = Path("markers.js")
+CUSTOM_PLACES_PATH = Path("../data/custom_places.json")
+OUT_PATH = Path("place_stats.js")
+
+def main():
+    # 1) 장소 목록
+    places = []
+    for m in load_markers_js(MARKERS_PATH):
+        places.append({"name": m.get("tooltip") or m.get("popup") or "", "lat": m["lat"], "lng": m["lng"],
+                       "radius_km": RADIUS_KM})
+    for p in load_custom_places(CUSTOM_PLACES_PATH):
+        places.append({"name": p.get("name") or "", "lat": p["lat"], "lng": p["lng"],
+                       "radius_km": p.get("radius_km") or RADIUS_KM})
+    print(f"장소: {len(places)}개 (markers.js + custom_places.json)")
+    if not places:
+        print("❌ 장소가 없습니다.")
+        return
+
+    # 2) 사진 좌표/시간 (photo_sources의 모든 소스)
+    lats, lngs, times, _ = load_all()
+
+    # 3) 일괄 배정
+    t0 = time.perf_counter()
+    index = build_place_index([p["lat"] for p in places], [p["lng"] for p in places],
+                              [p["radius_km"] for p in places])
+    assigned, _ = assign_nearest(index, lats, lngs)
+    stats = place_stats(assigned, times, len(places))
+    print(f"배정: 사진 {len(lats)}개 → 장소 {int((assigned >= 0).sum())}개 연결 "
+          f"({time.perf_counter() - t0:.2f}초)")
+
+    # 4) 장소 나라/도시 이름 (히트맵 저장소의 셀 이름 캐시, 경계 데이터가 없으면 None)
+    countries, _, cities = label_points(open_store(), [p["lat"] for p in places], [p["lng"] for p in places])
+
+    # 5) place_stats.js 저장
+    out = {}
+    for p, s, country, city in zip(places, stats, countries, cities):
+        key = place_key(p["lat"], p["lng"])
+        if key in out:  # 같은 좌표 장소가 둘이면 먼저 나온 것(markers.js)에 모두 배정됨
+            continue
+        out[key] = {"name": p["name"], **s, "country": country, "city": city}
+    tmp = OUT_PATH.with_name(OUT_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("var placeStats = {\n")
+        f.write(",\n".join(f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}" for k, v in out.items()))
+        f.write("\n};\n")
+    os.replace(tmp, OUT_PATH)
+
+    for key, s in out.items():
+        if s["count"]:
+            print(f"  • {s['name'] or key}: {s['count']}장, {s['first']} ~ {s['last']}, {s['years']}")
+    print(f"✅ {OUT_PATH} 저장 완료")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# record_log.py
+# 목적:
+#  - 소스별 사진 레코드를 한 줄에 하나씩(NDJSON) 이어 쓰는 append-only 로그
+#  - 증분 실행은 새 레코드만 append → 기존 JSON 배열 전체를 다시 쓰지 않음
+#  - 같은 key(기본 "file")의 레코드가 여러 번 쌓이면 마지막 것이 유효
+#  - compact(): 유효 레코드만 남겨 다시 씀 (generation 증가)
+#  - read_tail(): 다른 스크립트가 마지막 체크포인트 이후에 추가된 줄만 읽을 때 사용
+#
+# 로그 옆에 <로그이름>.meta.json 으로 {"generation", "lines", "compacted_lines"} 를 보관
+# 체크포인트는 {"generation", "offset"} — generation이 다르면(압축됨) 처음부터 다시 읽음
+
+import json, os
+from pathlib import Path
+
+def meta_path(log_path: Path):
+    return log_path.with_name(log_path.name + ".meta.json")
+
+def read_meta(log_path: Path):
+    try:
+        return json.loads(meta_path(log_path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {"generation": 0, "lines": 0, "compacted_lines": 0}
+
+def _write_meta(log_path: Path, meta):
+    meta_path(log_path).write_text(json.dumps(meta), encoding="utf-8")
+
+def append(log_path: Path, records):
+    """레코드들을 로그 끝에 추가"""
+    records = list(records)
+    if not records:
+        return 0
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    seeded = not log_path.exists()
+    with open(log_path, "a", encoding="utf-8", newline="\n") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    meta = read_meta(log_path)
+    if seeded:
+        # 새 로그: 처음 쓴 줄은 모두 유효 레코드 → 압축 기준으로 삼음 (바로 압축되지 않게)
+        # 예전 meta가 남아 있으면 generation을 올려서 이전 체크포인트로 이어 읽지 않게 함
+        generation = meta["generation"] + 1 if meta_path(log_path).exists() else 0
+        meta = {"generation": generation, "lines": 0, "compacted_lines": len(records)}
+    meta["lines"] += len(records)
+    _write_meta(log_path, meta)
+    return len(records)
+
+def _iter_lines(log_path: Path, offset=0):
+    """(다음 offset, 레코드) 순서대로. 끝의 불완전한 줄(쓰다 중단된 줄)은 무시"""
+    if not log_path.exists():
+        return
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                yield offset, json.loads(line)
+
+def iter_records(log_path: Path):
+    """로그 전체를 스트리밍으로 읽기 (중복 포함, 기록 순서)"""
+    for _, rec in _iter_lines(log_path):
+        yield rec
+
+def iter_latest(log_path: Path, key="file"):
+    """key별 마지막 레코드만 (처음 등장한 순서 유지)"""
+    latest = {}
+    for rec in iter_records(log_path):
+        latest[rec.get(key)] = rec
+    return iter(latest.values())
+
+def read_tail(log_path: Path, checkpoint=None):
+    """
+    체크포인트 이후에 추가된 레코드만 읽기 → (records, new_checkpoint, full)
+    full=True면 압축 등으로 처음부터 다시 읽은 것 (호출 측 병합이 멱등이면 그대로 사용 가능)
+    """
+    meta = read_meta(log_path)
+    checkpoint = checkpoint or {}
+    full = checkpoint.get("generation") != meta["generation"]
+    offset = 0 if full else checkpoint.get("offset", 0)
+    records = []
+    for offset, rec in _iter_lines(log_path, offset):
+        records.append(rec)
+    return records, {"generation": meta["generation"], "offset": offset}, full
+
+def compact(log_path: Path, key="file"):
+    """key별 마지막 레코드만 남겨서 로그를 다시 씀 (임시파일 → 교체)"""
+    records = list(iter_latest(log_path, key))
+    tmp = log_path.with_name(log_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp, log_path)
+    meta = read_meta(log_path)
+    _write_meta(log_path, {"generation": meta["generation"] + 1,
+                           "lines": len(records), "compacted_lines": len(records)})
+    return len(records)
+
+def maybe_compact(log_path: Path, key="file", ratio=2.0, min_lines=1000):
+    """마지막 압축 이후 줄 수가 ratio배를 넘으면 압축"""
+    meta = read_meta(log_path)
+    if meta["lines"] >= min_lines and meta["lines"] > ratio * max(meta["compacted_lines"], 1):
+        return compact(log_path, key)
+    return None
@@ -0,0 +1,240 @@
+# reverse_geocode.py
+# 목적:
+#  - 네트워크 없이 좌표 → 나라 / 행정구역(도·주) / 도시 이름 (오프라인 역지오코딩)
+#  - 경계 데이터: 저장소 루트의 data/geo/ 아래 Natural Earth GeoJSON (공개 데이터, 용량이 커서 저장소에는 없음)
+#      ne_10m_admin_0_countries.geojson          나라 (폴리곤)
+#      ne_10m_admin_1_states_provinces.geojson   행정구역 (폴리곤, 없으면 생략)
+#      ne_10m_populated_places.geojson           도시 (점, 없으면 생략)
+#    처음 한 번 받기: python scripts/reverse_geocode.py   (없는 파일만 GEO_URL에서 받음, --force면 다시 받음)
+#    데이터가 없으면 이름 없이 진행 (히트맵은 그대로 생성)
+#  - 폴리곤 조각마다 bbox → STR-tree(정렬 후 묶음 패킹)로 인덱스
+#    좌표 배열 전체를 트리 레벨마다 한 번에 내려보내서 (좌표, 후보 조각) 쌍만 만들고,
+#    후보 조각별로 점-다각형 판정(ray casting)을 NumPy로 일괄 처리
+#  - 도시는 place_index(격자 인덱스)로 CITY_RADIUS_KM 안 가장 가까운 도시
+#  - 같은 셀을 반복해서 계산하지 않도록 결과 캐시는 heat_store(cell_labels)에서 관리
+
+import argparse, json, os, urllib.request
+from pathlib import Path
+import numpy as np
+from place_index import build_place_index, assign_nearest
+
+# === 설정 ===
+GEO_DIR = Path(__file__).resolve().parent.parent / "data" / "geo"  # 실행 위치와 상관없이 저장소 루트 기준
+GEO_URL = "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/geojson/"
+COUNTRY_FILE = "ne_10m_admin_0_countries.geojson"
+ADMIN_FILE = "ne_10m_admin_1_states_provinces.geojson"
+CITY_FILE = "ne_10m_populated_places.geojson"
+# 이름 속성 후보 (앞에 있는 것 우선, 대소문자 무시) - 한국어 이름이 있으면 한국어로
+COUNTRY_KEYS = ["NAME_KO", "NAME", "ADMIN"]
+ADMIN_KEYS = ["name_ko", "name"]
+CITY_KEYS = ["NAME_KO", "NAME"]
+CITY_RADIUS_KM = 30.0
+NODE_SIZE = 16          # STR-tree 노드 하나의 자식 수
+PIP_CHUNK = 2_000_000   # 점 × 변 배열 한 번에 만들 최대 크기
+
+def _prop(props, keys):
+    lower = {k.lower(): v for k, v in (props or {}).items()}
+    for k in keys:
+        v = lower.get(k.lower())
+        if v:
+            return str(v)
+    return None
+
+# === STR-tree ===
+def _str_order(boxes, node_size):
+    """bbox 배열 → STR 순서 (x 중심으로 세로 띠를 나누고, 띠 안에서는 y 중심 순)"""
+    n = len(boxes)
+    leaves = -(-n // node_size)
+    slices = max(1, int(np.ceil(np.sqrt(leaves))))
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.argsort(cx, kind="stable")] = np.arange(n)
+    return np.lexsort((cy, rank // (slices * node_size)))
+
+def build_str_tree(boxes, node_size=NODE_SIZE):
+    """
+    boxes: (m, 4) [minx, miny, maxx, maxy] → 트리 dict
+      levels[0] = 항목(조각) 층: {"boxes", "items"(원래 번호)}
+      levels[k] = 노드 층: {"boxes", "start", "end"} (아래 층 [start, end) 를 덮음)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    order = _str_order(boxes, node_size)
+    levels = [{"boxes": boxes[order], "items": order}]
+    while len(levels[-1]["boxes"]) > node_size:
+        below = levels[-1]["boxes"]
+        start = np.arange(0, len(below), node_size)
+        end = np.minimum(start + node_size, len(below))
+        nb = np.stack([np.minimum.reduceat(below[:, 0], start), np.minimum.reduceat(below[:, 1], start),
+                       np.maximum.reduceat(below[:, 2], start), np.maximum.reduceat(below[:, 3], start)], axis=1)
+        o = _str_order(nb, node_size)
+        levels.append({"boxes": nb[o], "start": start[o], "end": end[o]})
+    return levels
+
+def _contains(boxes, xs, ys):
+    return (boxes[:, 0] <= xs) & (xs <= boxes[:, 2]) & (boxes[:, 1] <= ys) & (ys <= boxes[:, 3])
+
+def query_points(tree, xs, ys):
+    """점 배열 → bbox가 점을 포함하는 (점 번호, 항목 번호) 쌍 배열. 레벨마다 한 번에 처리"""
+    top = tree[-1]
+    n_top = len(top["boxes"])
+    pt = np.repeat(np.arange(len(xs)), n_top)
+    node = np.tile(np.arange(n_top), len(xs))
+    for level in range(len(tree) - 1, -1, -1):
+        boxes = tree[level]["boxes"]
+        ok = _contains(boxes[node], xs[pt], ys[pt])
+        pt, node = pt[ok], node[ok]
+        if level == 0:
+            return pt, tree[0]["items"][node]
+        # 자식 펼치기: 쌍마다 [start, end) 범위를 이어 붙임
+        s, e = tree[level]["start"][node], tree[level]["end"][node]
+        cnt = e - s
+        pt = np.repeat(pt, cnt)
+        first = np.repeat(np.cumsum(cnt) - cnt, cnt)
+        node = np.repeat(s, cnt) + (np.arange(len(pt)) - first)
+    return pt, node
+
+# === 폴리곤 레이어 ===
+def load_polygon_layer(path, name_keys):
+    """
+    GeoJSON(Polygon/MultiPolygon) → 레이어 dict
+      names: 피처 이름, part_feature: 조각 → 피처 번호
+      조각별 변: x1, y1, x2, y2 를 이어 붙이고 edge_start[조각]..edge_start[조각+1]
+    조각 = 폴리곤 하나(바깥 고리 + 구멍). 구멍은 홀짝 판정으로 자연스럽게 빠짐
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    names, part_feature, boxes, edges, edge_start = [], [], [], [], [0]
+    for feat in data.get("features", []):
+        geom = feat.get("geometry") or {}
+        if geom.get("type") == "Polygon":
+            polys = [geom["coordinates"]]
+        elif geom.get("type") == "MultiPolygon":
+            polys = geom["coordinates"]
+        else:
+            continue
+        fid = len(names)
+        names.append(_prop(feat.get("properties"), name_keys))
+        for poly in polys:
+            rings = [np.asarray(r, dtype=np.float64)[:, :2] for r in poly if len(r) >= 3]
+            if not rings:
+                continue
+            seg = np.concatenate([np.hstack([r, np.roll(r, -1, axis=0)]) for r in rings])
+            outer = rings[0]
+            boxes.append([outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max()])
+            edges.append(seg)
+            edge_start.append(edge_start[-1] + len(seg))
+            part_feature.append(fid)
+    edges = np.concatenate(edges) if edges else np.zeros((0, 4))
+    return {"names": names, "part_feature": np.asarray(part_feature, dtype=np.int64),
+            "edges": edges, "edge_start": np.asarray(edge_start, dtype=np.int64),
+            "tree": build_str_tree(np.asarray(boxes).reshape(-1, 4))}
+
+def locate(layer, lats, lngs):
+    """점 배열 → 점이 들어 있는 피처 번호 배열 (-1 = 없음). 여러 개면 번호가 작은 피처"""
+    xs = np.asarray(lngs, dtype=np.float64)
+    ys = np.asarray(lats, dtype=np.float64)
+    out = np.full(len(xs), np.iinfo(np.int64).max)
+    if len(xs) == 0 or len(layer["part_feature"]) == 0:
+        return np.full(len(xs), -1, dtype=np.int64)
+    pt, part = query_points(layer["tree"], xs, ys)
+    order = np.argsort(part, kind="stable")
+    pt, part = pt[order], part[order]
+    bounds = np.flatnonzero(np.diff(np.concatenate([[-1], part, [-1]])))
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        p = part[a]
+        e = layer["edges"][layer["edge_start"][p]:layer["edge_start"][p + 1]]
+        x1, y1, x2, y2 = e[:, 0], e[:, 1], e[:, 2], e[:, 3]
+        step = max(1, PIP_CHUNK // max(1, len(e)))
+        for c in range(a, b, step):
+            idx = pt[c:min(b, c + step)]
+            px, py = xs[idx][:, None], ys[idx][:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cross = ((y1 > py) != (y2 > py)) & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+            inside = (cross.sum(axis=1) % 2) == 1
+            np.minimum.at(out, idx[inside], layer["part_feature"][p])
+    out[out == np.iinfo(np.int64).max] = -1
+    return out
+
+# === 도시 ===
+def load_city_layer(path, name_keys, radius_km=CITY_RADIUS_KM):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    names, lats, lngs = [], [], []
+    for feat in data.get("features", []):
+        geom = feat.get("geometry") or {}
+        if geom.get("type") != "Point":
+            continue
+        lng, lat = geom["coordinates"][:2]
+        names.append(_prop(feat.get("properties"), name_keys))
+        lats.append(lat)
+        lngs.append(lng)
+    return {"names": names, "index": build_place_index(lats, lngs, radius_km)}
+
+# === 전체 ===
+def load_geocoder(geo_dir=GEO_DIR):
+    """data/geo/ 의 경계 데이터 → geocoder dict / 나라 파일이 없으면 None"""
+    geo_dir = Path(geo_dir)
+    if not (geo_dir / COUNTRY_FILE).exists():
+        print(f"⚠ {geo_dir / COUNTRY_FILE} 없음 → 나라/도시 이름 생략 "
+              f"(python scripts/reverse_geocode.py 로 Natural Earth 데이터를 받아 주세요)")
+        return None
+    geocoder = {"country": load_polygon_layer(geo_dir / COUNTRY_FILE, COUNTRY_KEYS), "admin": None, "city": None}
+    if (geo_dir / ADMIN_FILE).exists():
+        geocoder["admin"] = load_polygon_layer(geo_dir / ADMIN_FILE, ADMIN_KEYS)
+    if (geo_dir / CITY_FILE).exists():
+        geocoder["city"] = load_city_layer(geo_dir / CITY_FILE, CITY_KEYS)
+    return geocoder
+
+def label_points(geocoder, lats, lngs):
+    """좌표 배열 → (나라 리스트, 행정구역 리스트, 도시 리스트). 모르면 None"""
+    def names(layer, ids):
+        return [layer["names"][i] if i >= 0 else None for i in ids.tolist()]
+    n = len(lats)
+    country = names(geocoder["country"], locate(geocoder["country"], lats, lngs))
+    admin = names(geocoder["admin"], locate(geocoder["admin"], lats, lngs)) if geocoder["admin"] else [None] * n
+    city = [None] * n
+    if geocoder["city"]:
+        ids, _ = assign_nearest(geocoder["city"]["index"], lats, lngs)
+        city = names(geocoder["city"], ids)
+    return country, admin, city
+
+def geo_fingerprint(geo_dir=GEO_DIR):
+    """경계 데이터 파일 크기/수정 시각 → 바뀌면 캐시를 버리기 위한 값"""
+    geo_dir = Path(geo_dir)
+    parts = []
+    for name in (COUNTRY_FILE, ADMIN_FILE, CITY_FILE):
+        p = geo_dir / name
+        if p.exists():
+            st = p.stat()
+            parts.append(f"{name}:{st.st_size}:{int(st.st_mtime)}")
+    return "|".join(parts)
+
+def fetch_geo_data(geo_dir=GEO_DIR, force=False, base_url=GEO_URL):
+    """Natural Earth GeoJSON 받기 (임시 파일 → 교체). 반환: 새로 받은 파일 이름 목록"""
+    geo_dir = Path(geo_dir)
+    geo_dir.mkdir(parents=True, exist_ok=True)
+    fetched = []
+    for name in (COUNTRY_FILE, ADMIN_FILE, CITY_FILE):
+        path = geo_dir / name
+        if path.exists() and not force:
+            continue
+        print(f"받는 중: {base_url}{name}")
+        tmp = path.with_name(name + ".tmp")
+        with urllib.request.urlopen(base_url + name) as r, open(tmp, "wb") as f:
+            while True:
+                chunk = r.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+        os.replace(tmp, path)
+        fetched.append(name)
+    return fetched
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="역지오코딩용 Natural Earth 경계 데이터 받기")
+    ap.add_argument("--dir", type=Path, default=GEO_DIR)
+    ap.add_argument("--force", action="store_true", help="이미 있는 파일도 다시 받기")
+    args = ap.parse_args()
+    names = fetch_geo_data(args.dir, args.force)
+    print(f"✅ {args.dir}: 새로 받은 파일 {len(names)}개" + (f" ({', '.join(names)})" if names else " (모두 있음)"))
@@ -0,0 +1,212 @@
+# scan_store.py
+# 목적:
+#  - 사진 스캐너의 증분 인덱스를 SQLite(WAL) 단일 파일에 저장
+#  - 키: 정규화 경로(as_posix().lower()) → size/mtime + 추출한 lat/lng/time
+#  - need_process()는 인덱스 조회 1회, 저장은 변경된 파일만 upsert
+#  - with/without JSON, CSV 보고서를 재스캔 없이 저장소에서 다시 만들 수 있음
+#  - 폴더별 mtime/파일 수/하위폴더도 기록 → 항목 구성이 그대로인 폴더는 통째로 건너뜀
+#  - 다시 읽은 폴더에서 사라진 파일/하위폴더는 저장소에서도 지움 (remove_missing)
+#    파일마다 폴더 key(dir, 인덱스)를 같이 저장 → 다시 읽은 폴더의 파일만 조회 (저장소 전체를 읽지 않음)
+#  - meta: 마지막 전체 탐색 시각 등 (JSON 값)
+
+import csv, json, sqlite3
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key     TEXT PRIMARY KEY,   -- 정규화 경로 (소문자 posix)
+    rel     TEXT NOT NULL,      -- ROOT 기준 상대경로 (원래 대소문자)
+    dir     TEXT,               -- 폴더 key (key에서 마지막 '/' 앞)
+    size    INTEGER,
+    mtime   REAL,
+    lat     REAL,               -- 유효 좌표가 없으면 NULL
+    lng     REAL,
+    time    TEXT                -- 'YYYY-MM-DD HH:MM:SS' 또는 NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    key     TEXT PRIMARY KEY,   -- 정규화 폴더 경로
+    mtime   REAL,               -- 폴더 mtime (항목 추가/삭제/이름변경 시 바뀜)
+    nfiles  INTEGER,            -- 대상 확장자 파일 수
+    subdirs TEXT                -- 하위 폴더 이름 JSON 목록
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CSV_FIELDS = ["path", "has_gps", "lat", "lng", "has_time", "time"]
+
+def path_key(p: Path):
+    return p.as_posix().lower()
+
+def dir_of(key):
+    return key.rsplit("/", 1)[0]
+
+def open_store(db_path: Path):
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    if "dir" not in cols:  # 폴더 key 도입 전에 만든 저장소
+        with conn:
+            conn.execute("ALTER TABLE files ADD COLUMN dir TEXT")
+            conn.executemany("UPDATE files SET dir = ? WHERE key = ?",
+                             [(dir_of(key), key) for (key,) in conn.execute("SELECT key FROM files").fetchall()])
+    conn.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+    return conn
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+def set_meta(conn, key, value):
+    with conn:
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+def lookup_sig(conn, key):
+    """저장된 (size, mtime) 반환, 없으면 None"""
+    row = conn.execute("SELECT size, mtime FROM files WHERE key = ?", (key,)).fetchone()
+    return {"size": row[0], "mtime": row[1]} if row else None
+
+def upsert_files(conn, rows):
+    """
+    rows: (key, rel, size, mtime, lat, lng, time) 튜플 목록
+    기존 행은 rowid(=최초 등록 순서)를 유지한 채 갱신
+    """
+    with conn:
+        conn.executemany("""
+            INSERT INTO files (key, rel, dir, size, mtime, lat, lng, time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                rel = excluded.rel, size = excluded.size, mtime = excluded.mtime,
+                lat = excluded.lat, lng = excluded.lng, time = excluded.time
+        """, [(r[0], r[1], dir_of(r[0])) + tuple(r[2:]) for r in rows])
+
+def load_dirs(conn):
+    """{폴더 key: {"mtime", "nfiles", "subdirs"}} 전체 로드 (폴더 수만큼이라 작음)"""
+    return {key: {"mtime": mtime, "nfiles": nfiles, "subdirs": json.loads(subdirs or "[]")}
+            for key, mtime, nfiles, subdirs in conn.execute("SELECT key, mtime, nfiles, subdirs FROM dirs")}
+
+def upsert_dirs(conn, rows):
+    """rows: (key, mtime, nfiles, subdirs 리스트) 튜플 목록"""
+    with conn:
+        conn.executemany("""
+            INSERT INTO dirs (key, mtime, nfiles, subdirs) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                mtime = excluded.mtime, nfiles = excluded.nfiles, subdirs = excluded.subdirs
+        """, [(k, m, n, json.dumps(sub, ensure_ascii=False)) for k, m, n, sub in rows])
+
+def remove_missing(conn, scanned_dirs, present, gone_dirs):
+    """
+    이번에 항목을 다시 읽은 폴더(scanned_dirs)에 없는 파일, 사라진 폴더(gone_dirs) 아래 파일/폴더를 지움
+    present: 다시 읽은 폴더에서 찾은 파일 key 집합
+    반환: 지운 파일의 상대경로(rel) 목록 (등록 순서)
+    폴더별 인덱스 조회(dir) / key 범위 조회(사라진 폴더 아래 = "폴더/" 이상 "폴더0" 미만)만 하므로
+    다시 읽은 폴더가 없으면 아무것도 읽지 않음
+    """
+    if not scanned_dirs and not gone_dirs:
+        return []
+    found = {}  # key → (rowid, rel)
+    for d in scanned_dirs:
+        for rowid, key, rel in conn.execute("SELECT rowid, key, rel FROM files WHERE dir = ?", (d,)):
+            if key not in present:
+                found[key] = (rowid, rel)
+    dir_keys = set()
+    for g in gone_dirs:
+        for rowid, key, rel in conn.execute("SELECT rowid, key, rel FROM files WHERE key >= ? AND key < ?",
+                                            (g + "/", g + "0")):
+            found[key] = (rowid, rel)
+        dir_keys.update(key for (key,) in conn.execute(
+            "SELECT key FROM dirs WHERE key = ? OR (key >= ? AND key < ?)", (g, g + "/", g + "0")))
+    with conn:
+        conn.executemany("DELETE FROM files WHERE key = ?", [(key,) for key in found])
+        conn.executemany("DELETE FROM dirs WHERE key = ?", [(key,) for key in dir_keys])
+    return [rel for _, rel in sorted(found.values())]
+
+def count_files(conn):
+    return conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+def count_with_without(conn):
+    """(GPS 있는 파일 수, GPS 없는 파일 수)"""
+    total, with_gps = conn.execute("SELECT COUNT(*), COUNT(lat) FROM files").fetchone()
+    return with_gps, total - with_gps
+
+# === 저장소 → 출력물 ===
+def to_log_record(rel, lat, lng, t):
+    """레코드 로그(record_log) 한 줄 형식. GPS 없으면 lat/lng = None"""
+    return {"file": rel,
+            "lat": round(lat, 7) if lat is not None else None,
+            "lng": round(lng, 7) if lng is not None else None,
+            "time": t}
+
+def iter_log_records(conn):
+    for row in conn.execute("SELECT rel, lat, lng, time FROM files ORDER BY rowid"):
+        yield to_log_record(*row)
+
+def log_record(conn, key):
+    """key 하나의 레코드 로그 형식, 저장소에 없으면 None"""
+    row = conn.execute("SELECT rel, lat, lng, time FROM files WHERE key = ?", (key,)).fetchone()
+    return to_log_record(*row) if row else None
+
+def iter_with(conn):
+    for rel, lat, lng, t in conn.execute(
+            "SELECT rel, lat, lng, time FROM files WHERE lat IS NOT NULL ORDER BY rowid"):
+        yield {"file": rel, "lat": round(lat, 7), "lng": round(lng, 7), "time": t}
+
+def iter_without(conn):
+    for (rel,) in conn.execute("SELECT rel FROM files WHERE lat IS NULL ORDER BY rowid"):
+        yield {"file": rel}
+
+def write_csv_report(conn, csv_path: Path):
+    """CSV 보고서 전체를 저장소에서 재생성"""
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for rel, lat, lng, t in conn.execute("SELECT rel, lat, lng, time FROM files ORDER BY rowid"):
+            has_gps = lat is not None
+            writer.writerow({
+                "path": rel,
+                "has_gps": "Y" if has_gps else "N",
+                "lat": lat if has_gps else "",
+                "lng": lng if has_gps else "",
+                "has_time": "Y" if t else "N",
+                "time": t or ""
+            })
+
+# === 기존 JSON 인덱스 이전 ===
+def migrate_json_index(conn, index_json: Path, root: Path, with_json: Path, without_json: Path):
+    """
+    예전 newphotos_index.json({path: {size, mtime}})을 저장소로 옮김
+    좌표/시각은 with/without JSON에서 상대경로로 찾아 채움 (저장소가 비어 있을 때만)
+    """
+    if count_files(conn) or not index_json.exists():
+        return 0
+    try:
+        index = json.loads(index_json.read_text(encoding="utf-8"))
+    except Exception:
+        return 0
+
+    results = {}
+    for src in (without_json, with_json):
+        if src.exists():
+            try:
+                for rec in json.loads(src.read_text(encoding="utf-8")):
+                    results[rec["file"].lower()] = rec
+            except Exception:
+                pass
+
+    prefix = path_key(root).rstrip("/") + "/"
+    rows = []
+    for key, sig in index.items():
+        if not sig:
+            continue
+        rel_lower = key[len(prefix):] if key.startswith(prefix) else key
+        rec = results.get(rel_lower, {})
+        rows.append((key, rec.get("file", rel_lower), sig.get("size"), sig.get("mtime"),
+                     rec.get("lat"), rec.get("lng"), rec.get("time")))
+    upsert_files(conn, rows)
+    return len(rows)
@@ -0,0 +1,185 @@
+# timestamps.py
+# 목적:
+#  - heat_data_gen.py / new_photos_to_heat.py 에 중복돼 있던 parse_timestamp() 통합
+#  - 소스(컬럼) 하나는 보통 형식이 한 가지이므로, 첫 값으로 형식을 판별해서
+#    나머지는 strptime 없이 고정 위치 슬라이싱/분할로 바로 파싱 (parse_many)
+#  - EXIF 형식("YYYY-MM-DD HH:MM:SS")으로 판별되면 전체를 NumPy로 한 번에 파싱
+#    (문자열 배열 → 코드포인트 배열 → 자리별 숫자 → datetime64, 범위/날짜 검사도 배열 연산)
+#    Takeout/epoch/ISO 형식은 값마다 빠른 파서 (길이가 제각각이거나 현지 시간대 변환이 필요)
+#  - 빠른 경로가 실패한 값만 일반 파서로 처리하고, 그때 맞은 형식을 다시 기억
+#  - 파싱 실패는 개별 출력 대신 형식별/실패 건수로 모아서 보고
+
+from collections import Counter
+from datetime import datetime
+import numpy as np
+
+_MONTHS = {}
+for _i, _name in enumerate(["January", "February", "March", "April", "May", "June", "July",
+                            "August", "September", "October", "November", "December"], 1):
+    _MONTHS[_name.lower()] = _i
+    _MONTHS[_name[:3].lower()] = _i
+
+GENERAL_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%b %d, %Y, %I:%M:%S %p",  # Google Takeout 형식 (UTC 제거된 후)
+    "%B %d, %Y, %I:%M:%S %p",  # 전체 월 이름
+    "%m/%d/%Y %I:%M:%S %p",
+    "%d/%m/%Y %H:%M:%S",
+]
+
+def _clean(s):
+    # 보이지 않는 특수 문자들 제거 (Google Takeout 형식)
+    return str(s).replace('\u202f', ' ').replace('\u00a0', ' ').strip()
+
+# === 형식별 빠른 파서 (맞지 않으면 예외) ===
+def _fast_takeout(s):
+    """"May 1, 2025, 2:27:42 AM UTC" """
+    if s.endswith(" UTC"):
+        s = s[:-4]
+    md, year, rest = s.split(", ")
+    mon, day = md.split(" ")
+    hms, ampm = rest.split(" ")
+    h, mi, se = hms.split(":")
+    h = int(h)
+    if not 1 <= h <= 12:
+        raise ValueError(s)
+    ampm = ampm.upper()
+    if ampm not in ("AM", "PM"):
+        raise ValueError(s)
+    h = h % 12 + (12 if ampm == "PM" else 0)
+    return datetime(int(year), _MONTHS[mon.lower()], int(day), h, int(mi), int(se))
+
+def _fast_ymd_hms(s):
+    """"YYYY-MM-DD HH:MM:SS" (EXIF 추출 결과) 또는 "YYYY/MM/DD HH:MM:SS" """
+    if len(s) != 19 or s[4] != s[7] or s[4] not in "-/" or s[10] != " " or s[13] != ":" or s[16] != ":":
+        raise ValueError(s)
+    return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                    int(s[11:13]), int(s[14:16]), int(s[17:19]))
+
+def _fast_epoch(s):
+    """Unix timestamp (초 / 13자리 밀리초)"""
+    if not s.isdigit():
+        raise ValueError(s)
+    if len(s) == 13:
+        return datetime.fromtimestamp(int(s) / 1000)
+    return datetime.fromtimestamp(int(s))
+
+def _fast_iso(s):
+    if 'T' not in s:
+        raise ValueError(s)
+    return datetime.fromisoformat(s.replace('Z', '+00:00'))
+
+_YMD_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+
+def _bulk_ymd_hms(strs):
+    """
+    문자열 목록 → (datetime64[s] 배열, 성공 마스크)
+    "YYYY-MM-DD HH:MM:SS" / "YYYY/MM/DD HH:MM:SS" 에 정확히 맞고 날짜가 유효한 값만 성공 (_fast_ymd_hms와 같은 결과)
+    """
+    a = np.asarray(strs, dtype=str)
+    n = len(a)
+    if n == 0 or a.dtype.itemsize < 19 * 4:
+        return np.zeros(n, dtype="datetime64[s]"), np.zeros(n, dtype=bool)
+    ok = np.char.str_len(a) == 19
+    c = a.astype("U19").view(np.uint32).reshape(n, 19).astype(np.int64)
+    d = c[:, _YMD_DIGITS] - ord("0")
+    ok &= ((d >= 0) & (d <= 9)).all(axis=1)
+    ok &= (c[:, 4] == c[:, 7]) & ((c[:, 4] == ord("-")) | (c[:, 4] == ord("/")))
+    ok &= (c[:, 10] == ord(" ")) & (c[:, 13] == ord(":")) & (c[:, 16] == ord(":"))
+    y = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    mo, dd, h, mi, se = (d[:, k] * 10 + d[:, k + 1] for k in (4, 6, 8, 10, 12))
+    ok &= (y >= 1) & (mo >= 1) & (mo <= 12) & (dd >= 1) & (h <= 23) & (mi <= 59) & (se <= 59)
+    y, mo, dd = np.where(ok, y, 1970), np.where(ok, mo, 1), np.where(ok, dd, 1)
+    month = ((y - 1970) * 12 + mo - 1).astype("datetime64[M]")
+    day = month.astype("datetime64[D]") + (dd - 1)
+    ok &= day.astype("datetime64[M]") == month  # 2월 30일 등
+    return day.astype("datetime64[s]") + (h * 3600 + mi * 60 + se), ok
+
+FAST_PARSERS = {
+    "takeout": _fast_takeout,
+    "ymd_hms": _fast_ymd_hms,
+    "epoch": _fast_epoch,
+    "iso": _fast_iso,
+}
+
+def detect_format(value):
+    """값 하나로 형식 판별 → (형식 이름, datetime) / 실패 시 (None, None)"""
+    s = _clean(value)
+    for name, fn in FAST_PARSERS.items():
+        try:
+            return name, fn(s)
+        except Exception:
+            continue
+    if s.endswith(" UTC"):
+        s = s[:-4].strip()
+    for fmt in GENERAL_FORMATS:
+        try:
+            return fmt, datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None, None
+
+def _parse_as(fmt, value):
+    """기억해 둔 형식 하나로만 파싱 (실패 시 None)"""
+    s = _clean(value)
+    try:
+        if fmt in FAST_PARSERS:
+            return FAST_PARSERS[fmt](s)
+        if s.endswith(" UTC"):
+            s = s[:-4].strip()
+        return datetime.strptime(s, fmt)
+    except Exception:
+        return None
+
+def parse_timestamp(timestamp_str):
+    """다양한 형식의 타임스탬프를 파싱 (실패 시 None)"""
+    if timestamp_str is None:
+        return None
+    return detect_format(timestamp_str)[1]
+
+def parse_many(values):
+    """
+    같은 소스의 값 목록을 한 번에 파싱 → (datetime/None 리스트, 통계 Counter)
+    첫 값이 EXIF 형식이면 그 형식에 맞는 값 전체를 배열로 한 번에 파싱 (_bulk_ymd_hms)
+    나머지는 마지막으로 맞았던 형식을 먼저 시도하고, 틀리면 형식을 다시 판별
+    통계: {"<형식>": 건수, "empty": 빈 값, "failed": 파싱 실패}
+    """
+    values = list(values)
+    out = [None] * len(values)
+    stats = Counter()
+    todo = [i for i, v in enumerate(values) if v is not None and v != ""]
+    stats["empty"] = len(values) - len(todo)
+    if todo and detect_format(values[todo[0]])[0] == "ymd_hms":
+        secs, ok = _bulk_ymd_hms([values[i] if isinstance(values[i], str) else str(values[i]) for i in todo])
+        hit = np.flatnonzero(ok)
+        for i, dt in zip(np.asarray(todo)[hit].tolist(), secs[hit].astype(object).tolist()):
+            out[i] = dt
+        stats["ymd_hms"] += len(hit)
+        todo = np.asarray(todo)[~ok].tolist()
+
+    current = None  # 현재 기억하고 있는 형식
+    for i in todo:
+        v = values[i]
+        dt = _parse_as(current, v) if current is not None else None
+        if dt is None:
+            fmt, dt = detect_format(v)
+            if fmt is None:
+                stats["failed"] += 1
+                continue
+            current = fmt
+        out[i] = dt
+        stats[current] += 1
+    return out, +stats
+
+_EPOCH = datetime(1970, 1, 1)
+
+def epoch_seconds(times):
+    """datetime 목록(None 없음) → 정수 초 리스트. 시간대 정보는 떼고 찍힌 현지 시각 그대로 사용"""
+    return [int((t.replace(tzinfo=None) - _EPOCH).total_seconds()) for t in times]
+
+def format_stats(stats):
+    """parse_many 통계를 한 줄 요약으로"""
+    return ", ".join(f"{k}: {v}" for k, v in stats.most_common())
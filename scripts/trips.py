@@ -0,0 +1,156 @@
+# trips.py
+# 목적:
+#  - 사진 전체(시간 + 좌표)에서 여행 구간을 자동으로 찾기
+#  - 집(가장 사진이 많은 지역)에서 HOME_RADIUS_KM 밖에서 찍은 사진만 대상
+#  - 시공간 DBSCAN 방식: (날짜, 3차원 공간 격자 칸)으로 묶은 노드를 정렬된 키에 넣고
+#    이웃(±GAP_DAYS일 × 주변 27칸)은 searchsorted로 찾음 → 전체 O(n log n)
+#    · 이웃 사진 수가 MIN_POINTS 이상인 노드 = core, core끼리 이어진 묶음 = 여행 후보
+#    · core에 붙은 노드는 그 여행에 포함, 외톨이(GPS 오류 등)는 버림
+#  - 시간순으로 이어지는 여행 후보 사이에 집 사진이 없고 간격이 GAP_DAYS 이내면 한 여행으로 합침
+#    (도쿄 → 오사카처럼 여러 도시를 도는 여행)
+#  - 결과: 여행마다 시작/끝, 범위(bbox), 나라, 사진 수
+
+import numpy as np
+from geo import unit_xyz, chord, haversine_km
+from timestamps import epoch_seconds
+
+# === 설정 ===
+HOME = None             # (lat, lng) / None이면 사진이 가장 많은 0.1° 칸을 집으로
+HOME_RADIUS_KM = 80.0   # 집에서 이 거리 안은 여행이 아님
+CELL_KM = 150.0         # 공간 이웃 격자 크기
+GAP_DAYS = 3            # 이 날짜 수 이내면 같은 여행으로 이어질 수 있음
+MIN_POINTS = 5          # core 노드가 되려면 시공간 이웃 사진 수가 이 이상
+
+def find_home(lats, lngs):
+    """사진이 가장 많이 찍힌 0.1° 칸의 평균 좌표"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    keys = np.round(lats * 10).astype(np.int64) * 4000 + np.round(lngs * 10).astype(np.int64)
+    uniq, inv, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    sel = inv == counts.argmax()
+    return float(lats[sel].mean()), float(lngs[sel].mean())
+
+def _format(sec):
+    return str(np.datetime64(int(sec), "s")).replace("T", " ")
+
+def _components(n, a, b):
+    """노드 n개, 간선 (a[i], b[i]) → 연결 요소 라벨 (가장 작은 노드 번호). 라벨 전파 + 포인터 점프"""
+    label = np.arange(n)
+    while True:
+        prev = label.copy()
+        np.minimum.at(label, a, label[b])
+        np.minimum.at(label, b, label[a])
+        label = label[label]
+        if np.array_equal(label, prev):
+            return label
+
+def cluster_away(days, xyz, cell, gap_days=GAP_DAYS, min_points=MIN_POINTS):
+    """
+    집 밖 사진들의 (날짜 번호, 단위 구 좌표) → 사진별 묶음 라벨 (-1 = 외톨이)
+    노드 = (날짜, 격자 칸), 가중치 = 사진 수
+    """
+    if len(days) == 0:
+        return np.zeros(0, dtype=np.int64)
+    half = int(np.ceil(1.0 / cell)) + 2
+    side = 2 * half + 1
+    q = np.floor(xyz / cell).astype(np.int64) + half
+    d = days - days.min() + gap_days
+    keys = ((d * side + q[:, 0]) * side + q[:, 1]) * side + q[:, 2]
+    uniq, inv, weight = np.unique(keys, return_inverse=True, return_counts=True)
+    m = len(uniq)
+
+    # 이웃 찾기: 키가 (날짜, x, y, z) 선형 결합이므로 이웃 키 = 키 + 오프셋
+    offsets = [((dt * side + dx) * side + dy) * side + dz
+               for dt in range(-gap_days, gap_days + 1)
+               for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    nsum = np.zeros(m, dtype=np.int64)
+    ea, eb = [], []
+    for off in offsets:
+        k = uniq + off
+        j = np.searchsorted(uniq, k)
+        j[j == m] = m - 1
+        hit = np.flatnonzero(uniq[j] == k)
+        nsum[hit] += weight[j[hit]]
+        if off > 0:  # 간선은 한 방향만 저장
+            ea.append(hit)
+            eb.append(j[hit])
+    ea = np.concatenate(ea) if ea else np.zeros(0, dtype=np.int64)
+    eb = np.concatenate(eb) if eb else np.zeros(0, dtype=np.int64)
+
+    core = nsum >= min_points
+    both = core[ea] & core[eb]
+    label = _components(m, ea[both], eb[both])
+    node_label = np.where(core, label, -1)
+    # core가 아닌 노드: 이웃 core가 있으면 그 묶음에 붙임 (border)
+    for x, y in ((ea, eb), (eb, ea)):
+        att = (~core[x]) & core[y] & (node_label[x] < 0)
+        node_label[x[att]] = label[y[att]]
+    return node_label[inv]
+
+def segment_trips(lats, lngs, times, home=HOME, home_radius_km=HOME_RADIUS_KM,
+                  cell_km=CELL_KM, gap_days=GAP_DAYS, min_points=MIN_POINTS, country_of=None):
+    """
+    사진 좌표/시간(None 포함) → (여행 목록, 집 좌표)
+    여행: {"start", "end", "days", "bbox": [남, 서, 북, 동], "center", "countries", "points"}
+    country_of: (lats, lngs) 배열 → 나라 이름 배열을 돌려주는 함수 (없으면 countries는 빈 목록)
+    """
+    has_t = np.array([t is not None for t in times], dtype=bool)
+    lats = np.asarray(lats, dtype=np.float64)[has_t]
+    lngs = np.asarray(lngs, dtype=np.float64)[has_t]
+    if len(lats) == 0:
+        return [], home
+    secs = np.asarray(epoch_seconds([t for t in times if t is not None]), dtype=np.int64)
+    order = np.argsort(secs, kind="stable")
+    lats, lngs, secs = lats[order], lngs[order], secs[order]
+
+    if home is None:
+        home = find_home(lats, lngs)
+    away = haversine_km(home[0], home[1], lats, lngs) > home_radius_km
+    home_secs = secs[~away]
+    lats, lngs, secs = lats[away], lngs[away], secs[away]
+
+    days = secs // 86400
+    label = cluster_away(days, unit_xyz(lats, lngs), float(chord(cell_km)), gap_days, min_points)
+    keep = label >= 0
+    if not keep.any():
+        return [], home
+    lats, lngs, secs, label = lats[keep], lngs[keep], secs[keep], label[keep]
+
+    # 묶음별 시작/끝 (사진은 시간순이므로 라벨별 첫/마지막 위치)
+    uniq, first = np.unique(label, return_index=True)
+    last = len(label) - 1 - np.unique(label[::-1], return_index=True)[1]
+    order = np.argsort(secs[first], kind="stable")
+    uniq, start, end = uniq[order], secs[first][order], secs[last][order]
+
+    # 시간순으로 이어지는 묶음: 사이에 집 사진이 없고 간격이 짧으면 한 여행
+    trip_of = np.zeros(len(uniq), dtype=np.int64)
+    cur_end = end[0]
+    for i in range(1, len(uniq)):
+        home_between = np.searchsorted(home_secs, start[i]) > np.searchsorted(home_secs, cur_end, "right")
+        merge = start[i] - cur_end <= gap_days * 86400 and not home_between
+        trip_of[i] = trip_of[i - 1] + (0 if merge else 1)
+        cur_end = max(cur_end, end[i]) if merge else end[i]
+    point_trip = trip_of[np.searchsorted(uniq, label)]
+
+    countries = country_of(lats, lngs) if country_of else None
+    trips = []
+    by_trip = np.argsort(point_trip, kind="stable")
+    bounds = np.searchsorted(point_trip[by_trip], np.arange(int(trip_of.max()) + 2))
+    for t in range(len(bounds) - 1):
+        sel = by_trip[bounds[t]:bounds[t + 1]]
+        s, e = int(secs[sel].min()), int(secs[sel].max())
+        c_lat, c_lng = np.median(lats[sel]), np.median(lngs[sel])
+        names = []
+        if countries is not None:
+            names = sorted({c for c in (countries[i] for i in sel) if c})
+        trips.append({
+            "start": _format(s),
+            "end": _format(e),
+            "days": (e // 86400) - (s // 86400) + 1,
+            "bbox": [round(float(lats[sel].min()), 4), round(float(lngs[sel].min()), 4),
+                     round(float(lats[sel].max()), 4), round(float(lngs[sel].max()), 4)],
+            "center": [round(float(c_lat), 4), round(float(c_lng), 4)],
+            "countries": names,
+            "points": int(len(sel)),
+        })
+    return trips, home
@@ -0,0 +1,56 @@
+# trips_gen.py
+# 목적:
+#  - 사진 전체(photo_sources)에서 여행 구간을 자동으로 찾아 trips.js 로 저장 (trips.py)
+#  - 지도에서 여행을 고르면 그 기간 히트맵 + 여행 범위로 이동
+#
+# trips.js:
+#   var trips = [{"id", "start", "end", "days", "bbox": [남, 서, 북, 동], "center", "countries", "points"}, ...]
+#   var tripHome = [lat, lng]
+
+import json, os, time
+from pathlib import Path
+from photo_sources import load_all
+from trips import HOME, segment_trips
+from heat_store import open_store, label_points
+
+# 작업 디렉토리(사진 JSON들이 있는 scripts 폴더)로 변경
+home = os.path.expanduser("~")
+os.chdir(os.path.join(home, "My_Drive", "github", "travel_map", "scripts"))
+
+# === 설정 ===
+OUT_PATH = Path("trips.js")
+
+def write_trips_js(trips, home_pt, path=OUT_PATH):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("var trips = [\n")
+        f.write(",\n".join("  " + json.dumps(t, ensure_ascii=False) for t in trips))
+        f.write("\n];\n")
+        f.write(f"var tripHome = [{home_pt[0]:.4f}, {home_pt[1]:.4f}];\n")
+    os.replace(tmp, path)
+
+def main():
+    print("사진 로드:")
+    lats, lngs, times, _ = load_all()
+
+    t0 = time.perf_counter()
+    conn = open_store()  # 나라 이름은 히트맵 저장소의 셀 이름 캐시(역지오코딩)를 거침
+    trips, home_pt = segment_trips(lats, lngs, times, home=HOME,
+                                   country_of=lambda la, ln: label_points(conn, la, ln)[0])
+    print(f"여행 찾기: 사진 {len(lats)}개 → 여행 {len(trips)}개 ({time.perf_counter() - t0:.2f}초)")
+    if home_pt is None:
+        print("❌ 시간 정보가 있는 사진이 없습니다.")
+        return
+    print(f"  집: {home_pt[0]:.4f}, {home_pt[1]:.4f}")
+
+    trips = [{"id": i, **t} for i, t in enumerate(trips, 1)]
+    write_trips_js(trips, home_pt)
+
+    for t in trips[-10:]:
+        print(f"  • #{t['id']} {t['start'][:10]} ~ {t['end'][:10]} ({t['days']}일, {t['points']}장)"
+              f"{' ' + ', '.join(t['countries']) if t['countries'] else ''}")
+    print(f"✅ {OUT_PATH} 저장 완료")
+
+if __name__ == "__main__":
+    main()
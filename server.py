@@ -0,0 +1,313 @@
+# server.py
+# 목적:
+#  - python -m http.server 대신 쓰는 정적 파일 서버 (표준 라이브러리만 사용)
+#  - 스레드 서버(ThreadingHTTPServer) → 큰 파일 전송 중에도 다른 요청 처리
+#  - 미리 압축해 둔 .br / .gz 파일이 있으면 Accept-Encoding에 맞춰 그대로 전송
+#  - 내용 해시 ETag + If-None-Match/If-Modified-Since → 304
+#  - 파일 이름에 해시가 있는 파일(heat_years/2019.1a2b3c4d5e.json 등)이나 이름에 해시가 있는 폴더 아래 파일
+#    (heat_tiles/2019.1a2b3c4d5e/5/27/12.json 등)은 1년 캐시(immutable), 나머지는 매번 ETag로 재검증(no-cache)
+#  - Range 요청(부분 전송, 206) 지원
+#  - 자주 받는 작은 파일은 메모리에 캐시 (수정 시각/크기가 바뀌면 다시 읽음)
+#  - 지도에 필요한 파일(ALLOW_PATTERNS)만 제공, 폴더 목록은 보여주지 않음
+#    (사진 인덱스 JSON, 스캔 리포트 CSV, 자격 증명 등이 같은 폴더에 있으므로 막는 목록 대신 허용 목록)
+#
+# 사용:
+#   python server.py                   # 현재 폴더를 4000번 포트로
+#   python server.py --precompress     # .gz/.br 먼저 만들고 실행
+#   python server.py --precompress-only
+#   (.br은 brotli 패키지가 설치되어 있을 때만 생성)
+
+import argparse, email.utils, fnmatch, gzip, hashlib, os, re, threading
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# === 설정 ===
+PORT = 4000
+BIND = "0.0.0.0"
+COMPRESS_EXTS = {".html", ".js", ".json", ".css", ".csv", ".svg", ".txt", ".bin", ".md"}
+COMPRESS_MIN_SIZE = 1024                     # 이보다 작은 파일은 압축하지 않음
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv"}
+# 제공하는 파일 (루트 기준 posix 경로, fnmatch 패턴 → *는 하위 폴더까지)
+# 확장자만 보는 패턴("*.jpg" 등)은 쓰지 않음: 사진 폴더 전체가 공개됨 → 지도용 이미지는 assets/ 아래에 둠
+ALLOW_PATTERNS = [
+    "index.html", "my_travel_map.html", "favicon.ico", "assets/*",
+    "scripts/markers.js", "scripts/place_stats.js", "scripts/trips.js",
+    "scripts/heat_data.js", "scripts/heat_data.bin", "scripts/heat_months.json", "scripts/heat_labels.json",
+    "scripts/heat_tiles/*.json", "scripts/heat_years/*.json",
+]
+DENY_NAMES = {"credentials.json"}            # 패턴에 걸려도 내보내면 안 되는 파일
+DENY_EXTS = {".sqlite", ".sqlite-wal", ".sqlite-shm", ".py", ".pyc"}
+HASHED_RE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")  # 이름에 내용 해시가 있는 파일
+HASHED_DIR_RE = re.compile(r"\.[0-9a-f]{8,}$")             # 이름에 내용 해시가 있는 폴더 (안의 파일도 불변)
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DEFAULT_CACHE = "no-cache"
+MEM_CACHE_MAX_FILE = 4 * 1024 * 1024         # 이보다 큰 파일은 메모리에 두지 않음
+MEM_CACHE_MAX_TOTAL = 64 * 1024 * 1024
+
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]  # 우선순위 순
+
+def is_hashed(rel):
+    """내용이 바뀌면 URL도 바뀌는 파일인지 (파일 이름 또는 상위 폴더 이름에 해시)"""
+    p = Path(rel)
+    return bool(HASHED_RE.search(p.name)) or any(HASHED_DIR_RE.search(part) for part in p.parts[:-1])
+
+def is_allowed(rel):
+    """제공해도 되는 파일인지 (ALLOW_PATTERNS에 맞고 DENY_* / SKIP_DIRS에 걸리지 않음)"""
+    p = Path(rel)
+    if p.name in DENY_NAMES or p.suffix.lower() in DENY_EXTS or any(part in SKIP_DIRS for part in p.parts):
+        return False
+    rel = p.as_posix()
+    return not rel.startswith("../") and any(fnmatch.fnmatchcase(rel, pat) for pat in ALLOW_PATTERNS)
+
+# === 미리 압축 ===
+def precompress_tree(root, min_size=COMPRESS_MIN_SIZE):
+    """root 아래 제공하는 텍스트/데이터 파일마다 .gz (+ brotli 있으면 .br) 생성. 원본보다 오래된 것만 다시 만듦"""
+    made = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            src = Path(dirpath) / name
+            if src.suffix.lower() not in COMPRESS_EXTS or not is_allowed(os.path.relpath(src, root)):
+                continue
+            st = src.stat()
+            if st.st_size < min_size:
+                continue
+            data = None
+            for enc, ext in ENCODINGS:
+                if enc == "br" and brotli is None:
+                    continue
+                dst = src.with_name(name + ext)
+                if dst.exists() and dst.stat().st_mtime >= st.st_mtime:
+                    continue
+                if data is None:
+                    data = src.read_bytes()
+                body = brotli.compress(data, quality=11) if enc == "br" else gzip.compress(data, 9, mtime=0)
+                if len(body) >= len(data):
+                    continue
+                tmp = dst.with_name(dst.name + ".tmp")
+                tmp.write_bytes(body)
+                os.replace(tmp, dst)
+                made += 1
+    return made
+
+# === 파일 캐시 / ETag ===
+class FileCache:
+    """(경로, 크기, mtime) → (ETag, 내용 또는 None). 내용은 작은 파일만 보관"""
+    def __init__(self, max_file=MEM_CACHE_MAX_FILE, max_total=MEM_CACHE_MAX_TOTAL):
+        self.max_file, self.max_total = max_file, max_total
+        self.entries = {}
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, st):
+        sig = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            hit = self.entries.get(path)
+            if hit and hit[0] == sig:
+                return hit[1], hit[2]
+        h = hashlib.sha1()
+        keep = st.st_size <= self.max_file
+        chunks = []
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+                if keep:
+                    chunks.append(chunk)
+        etag = f'"{h.hexdigest()[:20]}"'
+        data = b"".join(chunks) if keep else None
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old and old[2] is not None:
+                self.total -= len(old[2])
+            if data is not None and self.total + len(data) > self.max_total:
+                data = None  # 메모리 한도 초과 → ETag만 기억
+            self.entries[path] = (sig, etag, data)
+            if data is not None:
+                self.total += len(data)
+        return etag, data
+
+FILE_CACHE = FileCache()
+
+def parse_range(header, size):
+    """'bytes=a-b' 하나만 지원 → (start, end) / 형식이 다르면 None / 범위 밖이면 False"""
+    m = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        start = max(0, size - int(m.group(2)))
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return False
+    return start, end
+
+def etag_matches(header, etag):
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or ("W/" + etag) in tags
+
+class Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map,
+                      ".js": "text/javascript; charset=utf-8",
+                      ".json": "application/json; charset=utf-8",
+                      ".html": "text/html; charset=utf-8",
+                      ".csv": "text/csv; charset=utf-8",
+                      ".bin": "application/octet-stream"}
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def list_directory(self, path):
+        """기본 폴더 목록 끔"""
+        self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+        return None
+
+    def _pick_encoding(self, path):
+        """Accept-Encoding과 미리 압축된 파일을 보고 (인코딩, 실제 경로) 결정"""
+        accept = {a.split(";")[0].strip().lower() for a in self.headers.get("Accept-Encoding", "").split(",")}
+        src_mtime = os.stat(path).st_mtime
+        for enc, ext in ENCODINGS:
+            alt = path + ext
+            if enc in accept and os.path.isfile(alt) and os.stat(alt).st_mtime >= src_mtime:
+                return enc, alt
+        return None, path
+
+    def _serve(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # 폴더: 제공하는 index.html이 있을 때만 그걸로 (목록은 보여주지 않음)
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index) or not is_allowed(os.path.relpath(index, self.directory)):
+                self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+                return
+            url, _, query = self.path.partition("?")
+            if not url.endswith("/"):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url + "/" + ("?" + query if query else ""))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            path = index
+        if not is_allowed(os.path.relpath(path, self.directory)) or not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        ctype = self.guess_type(path)
+        compressible = Path(path).suffix.lower() in COMPRESS_EXTS
+        range_header = self.headers.get("Range")
+        # Range는 원본(무압축) 바이트 기준으로만 처리
+        enc, real = (None, path) if range_header or not compressible else self._pick_encoding(path)
+        st = os.stat(real)
+        etag, data = FILE_CACHE.get(real, st)
+        if enc:
+            etag = etag[:-1] + "-" + enc + '"'
+        last_modified = email.utils.formatdate(os.stat(path).st_mtime, usegmt=True)
+        cache_control = IMMUTABLE_CACHE if is_hashed(os.path.relpath(path, self.directory)) else DEFAULT_CACHE
+
+        def common_headers():
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Accept-Ranges", "bytes")
+            if compressible:
+                self.send_header("Vary", "Accept-Encoding")
+
+        # 조건부 요청 → 304
+        inm = self.headers.get("If-None-Match")
+        ims = self.headers.get("If-Modified-Since")
+        not_modified = False
+        if inm is not None:
+            not_modified = etag_matches(inm, etag)
+        elif ims:
+            try:
+                not_modified = int(os.stat(path).st_mtime) <= email.utils.parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                pass
+        if not_modified:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            common_headers()
+            self.end_headers()
+            return
+
+        size = st.st_size
+        start, end, status = 0, size - 1, HTTPStatus.OK
+        if range_header:
+            if_range = self.headers.get("If-Range")
+            if if_range is None or if_range.strip() == etag:
+                rng = parse_range(range_header, size)
+                if rng is False:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if rng:
+                    start, end = rng
+                    status = HTTPStatus.PARTIAL_CONTENT
+
+        length = end - start + 1 if size else 0
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(length))
+        if enc:
+            self.send_header("Content-Encoding", enc)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        common_headers()
+        self.end_headers()
+        if head or not length:
+            return
+        if data is not None:
+            self.wfile.write(data[start:end + 1])
+            return
+        with open(real, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(1 << 20, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+def main():
+    ap = argparse.ArgumentParser(description="travel_map 정적 파일 서버")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--bind", default=BIND)
+    ap.add_argument("--dir", default=".")
+    ap.add_argument("--precompress", action="store_true", help="시작 전에 .gz/.br 생성")
+    ap.add_argument("--precompress-only", action="store_true", help=".gz/.br만 만들고 종료")
+    args = ap.parse_args()
+
+    root = os.path.abspath(args.dir)
+    if args.precompress or args.precompress_only:
+        n = precompress_tree(root)
+        print(f"미리 압축: {n}개 파일 생성{'' if brotli else ' (brotli 미설치 → .gz만)'}")
+        if args.precompress_only:
+            return
+
+    handler = lambda *a, **kw: Handler(*a, directory=root, **kw)
+    server = ThreadingHTTPServer((args.bind, args.port), handler)
+    server.daemon_threads = True
+    print(f"http://{args.bind}:{args.port}/ 에서 {root} 제공 중 (Ctrl+C 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# conftest.py
+# 목적:
+#  - scripts/ 와 scripts/AI추정/ 의 모듈을 테스트에서 바로 import (스크립트들이 서로 형제 모듈로 import 하므로)
+#  - 테스트용 JPEG(EXIF GPS/촬영시각 포함)을 Pillow로 만드는 도우미
+#
+# 실행: 저장소 루트에서 python -m pytest -q  (numpy, Pillow 필요)
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for p in (ROOT / "scripts", ROOT / "scripts" / "AI추정"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import numpy as np
+from PIL import Image
+
+def _dms(deg):
+    deg = abs(deg)
+    d = int(deg)
+    m = int((deg - d) * 60)
+    s = round((deg - d - m / 60) * 3600, 4)
+    return (float(d), float(m), s)
+
+def make_jpeg(path, lat=None, lng=None, time=None, time_tag="original", size=(64, 48), seed=0, fmt="JPEG"):
+    """
+    노이즈 이미지를 저장 (seed가 다르면 내용도 다름)
+    lat/lng: GPS IFD로 저장, time: "YYYY:MM:DD HH:MM:SS"
+    time_tag: "original"(ExifIFD DateTimeOriginal) / "ifd0"(IFD0 DateTime)
+    """
+    rng = np.random.default_rng(seed)
+    im = Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+    exif = Image.Exif()
+    if time is not None:
+        if time_tag == "ifd0":
+            exif[0x0132] = time
+        else:
+            exif.get_ifd(0x8769)[0x9003] = time
+    if lat is not None:
+        exif.get_ifd(0x8825).update({1: "N" if lat >= 0 else "S", 2: _dms(lat),
+                                     3: "E" if lng >= 0 else "W", 4: _dms(lng)})
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    im.save(path, fmt, exif=exif.tobytes()) if len(exif) or time or lat is not None else im.save(path, fmt)
+    return path
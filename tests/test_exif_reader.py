@@ -0,0 +1,59 @@
+# test_exif_reader.py
+# 목적:
+#  - 헤더만 읽는 exif_reader.read_exif_basic이 Pillow 경로(extract_exif_pillow)와 같은 결과인지
+#  - 깨진 파일은 예외 없이 (None, None, None)
+
+import pytest
+from conftest import make_jpeg
+from exif_reader import read_exif_basic
+from photo_scanner import extract_exif_basic, extract_exif_pillow
+
+CASES = [
+    dict(lat=37.5665, lng=126.978, time="2019:01:23 18:30:22"),
+    dict(lat=-33.8568, lng=-70.6483, time="2020:12:31 23:59:59"),
+    dict(lat=35.0, lng=139.0),
+    dict(time="2018:05:05 05:05:05"),
+    dict(time="2018:05:05 05:05:05", time_tag="ifd0"),
+    dict(),
+]
+
+def _same(a, b):
+    assert (a[0] is None) == (b[0] is None) and (a[1] is None) == (b[1] is None)
+    if a[0] is not None:
+        assert a[0] == pytest.approx(b[0], abs=1e-9) and a[1] == pytest.approx(b[1], abs=1e-9)
+    assert a[2] == b[2]
+
+@pytest.mark.parametrize("case", CASES)
+def test_matches_pillow(tmp_path, case):
+    path = make_jpeg(tmp_path / "p.jpg", **case)
+    fast = read_exif_basic(path)
+    assert fast is not None
+    _same(fast, extract_exif_pillow(path))
+    if "lat" in case:
+        assert fast[0] == pytest.approx(case["lat"], abs=1e-6)
+        assert fast[1] == pytest.approx(case["lng"], abs=1e-6)
+
+@pytest.mark.parametrize("case", CASES)
+def test_tiff_matches_jpeg(tmp_path, case):
+    # Pillow의 TIFF는 _getexif가 없어서 같은 EXIF를 담은 JPEG 결과와 비교
+    tif = read_exif_basic(make_jpeg(tmp_path / "p.tif", fmt="TIFF", **case))
+    assert tif is not None
+    _same(tif, read_exif_basic(make_jpeg(tmp_path / "p.jpg", **case)))
+
+def test_other_formats_fall_back(tmp_path):
+    path = make_jpeg(tmp_path / "p.png", fmt="PNG")
+    assert read_exif_basic(path) is None
+    assert extract_exif_basic(path) == (None, None, None)
+
+def test_broken_file(tmp_path):
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xe1\x00\x10Exif\x00\x00MM\x00*")
+    assert read_exif_basic(path) == (None, None, None)
+
+@pytest.mark.parametrize("seg_len", [b"\x00\x00", b"\x00\x01"])
+def test_bad_segment_length(tmp_path, seg_len):
+    # 길이가 0/1인 세그먼트 뒤에 EXIF처럼 보이는 바이트가 있어도 읽지 않음
+    path = make_jpeg(tmp_path / "p.jpg", lat=37.5, lng=127.0, time="2019:01:23 18:30:22")
+    data = path.read_bytes()
+    path.write_bytes(data[:2] + b"\xff\xe0" + seg_len + data[2:])
+    assert read_exif_basic(path) == (None, None, None)
@@ -0,0 +1,59 @@
+# test_flight_detect.py
+# 목적:
+#  - 기내 사진만 비행으로 분류 (출발/도착 사진은 남음), 혼자 튄 점은 글리치
+#  - 경유지에서 오래 머물면 비행을 나누고, 짧은 환승은 한 비행
+
+from datetime import datetime, timedelta
+import numpy as np
+from flight_detect import detect_flights, CRUISE_KMH
+from geo import haversine_km
+
+BASE = datetime(2019, 3, 1)
+
+def _track(points, start=BASE):
+    """[(lat, lng, 앞 점에서 순항 속도로 날아온 뒤 땅에서 보낸 시간), ...] → (lats, lngs, times)"""
+    lats, lngs, times = [], [], []
+    t = start
+    for lat, lng, ground_h in points:
+        if lats:
+            t += timedelta(hours=float(haversine_km(lats[-1], lngs[-1], lat, lng)) / CRUISE_KMH + ground_h)
+        lats.append(lat)
+        lngs.append(lng)
+        times.append(t)
+    return lats, lngs, times
+
+SEOUL = [(37.5665 + 0.01 * k, 126.978, 1.0) for k in range(4)]
+PARIS = [(48.8566 + 0.01 * k, 2.3522, 1.0) for k in range(4)]
+
+def test_detects_flight_and_keeps_airport_photos():
+    lats, lngs, times = _track(SEOUL + [(37.46, 126.44, 1.0), (36.0, 133.0, 0.0), (35.77, 140.39, 0.2)]
+                               + [(35.68 + 0.01 * k, 139.76, 1.0) for k in range(3)])
+    perm = np.random.default_rng(1).permutation(len(times))  # 입력 순서는 상관없음
+    lats, lngs, times = [lats[i] for i in perm], [lngs[i] for i in perm], [times[i] for i in perm]
+    res = detect_flights(lats + [37.0], lngs + [127.0], times + [None])
+    where = {int(np.flatnonzero(perm == k)[0]): k for k in range(len(perm))}
+    [leg] = res["legs"]
+    assert [where[i] for i in leg["points"]] == [5]
+    assert (where[leg["dep"]], where[leg["arr"]]) == (4, 6)
+    assert [where[i] for i, name in enumerate(res["flight"]) if name] == [5]
+    assert not res["glitch"].any()
+
+def test_glitch_is_not_a_flight():
+    lats, lngs, times = _track(SEOUL + SEOUL)
+    times[3] = times[2] + timedelta(minutes=5)
+    lats[3], lngs[3] = 48.8566, 2.3522  # 5분 동안 파리에 갔다 옴
+    res = detect_flights(lats, lngs, times)
+    assert np.flatnonzero(res["glitch"]).tolist() == [3]
+    assert res["legs"] == [] and not any(res["flight"])
+
+def test_long_stopover_splits_flight():
+    via = [(37.46, 126.44, 1.0), (35.0, 90.0, 0.0), (25.25, 55.36, 3.0), (38.0, 28.0, 3.0), (49.0, 2.55, 0.2)]
+    lats, lngs, times = _track(SEOUL + via + PARIS)
+    legs = detect_flights(lats, lngs, times)["legs"]
+    assert [(leg["dep"], leg["points"], leg["arr"]) for leg in legs] == [(4, [5], 6), (6, [7], 8)]
+
+def test_short_connection_stays_one_flight():
+    via = [(37.46, 126.44, 1.0), (35.0, 90.0, 0.0), (25.25, 55.36, 0.5), (38.0, 28.0, 0.5), (49.0, 2.55, 0.2)]
+    lats, lngs, times = _track(SEOUL + via + PARIS)
+    legs = detect_flights(lats, lngs, times)["legs"]
+    assert [(leg["dep"], leg["points"], leg["arr"]) for leg in legs] == [(4, [5, 6, 7], 8)]
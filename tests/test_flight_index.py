@@ -0,0 +1,34 @@
+# test_flight_index.py
+# 목적:
+#  - 병합/이분탐색 조회가 flight_periods 선형 탐색(목록에서 먼저 나온 비행 우선)과 같은지
+#    (겹치는 구간, 버퍼, 형식 오류, None)
+
+import random
+from datetime import datetime, timedelta
+from flight_index import TIME_FMT, compile_flights, is_during_flight, classify
+
+BASE = datetime(2019, 3, 1)
+
+def _linear(t, spans):
+    for start, end, name in spans:
+        if start <= t <= end:
+            return name
+    return None
+
+def test_index_matches_linear_scan():
+    rng = random.Random(0)
+    periods = []
+    for k in range(60):  # 겹치는 구간이 많도록 좁은 범위에
+        s = BASE + timedelta(minutes=rng.randint(0, 20000))
+        e = s + timedelta(minutes=rng.randint(0, 600))
+        periods.append({"name": f"F{k}", "start": s.strftime(TIME_FMT), "end": e.strftime(TIME_FMT)})
+    periods.append({"name": "bad", "start": "2019/03/01", "end": "?"})  # 형식 오류는 건너뜀
+    times = [BASE + timedelta(minutes=rng.randint(-100, 21000)) for _ in range(3000)] + [None]
+    for buffer in (timedelta(0), timedelta(minutes=30)):
+        index = compile_flights(periods, buffer)
+        spans = [(datetime.strptime(f["start"], TIME_FMT) - buffer, datetime.strptime(f["end"], TIME_FMT) + buffer,
+                  f["name"]) for f in periods[:-1]]
+        expected = [_linear(t, spans) if t else None for t in times]
+        assert classify(times, index) == expected
+        assert [is_during_flight(t, index)[1] for t in times] == expected
+    assert is_during_flight(None, compile_flights(periods)) == (False, None)
@@ -0,0 +1,89 @@
+# test_heat_store.py
+# 목적:
+#  - 파일 단위 증분 병합(merge_files)이 같은 최종 상태를 통째로 다시 넣은 것(replace_source)과 같은지
+#    (이동/삭제/추가/같은 파일 여러 번, 칸이 0이 되면 지워지는지)
+#  - export_all 기본값: 타일과 연도별 파일(heat_years/)을 함께 만드는지
+
+import json, random
+import heat_store
+from heat_agg import heat_by_year
+
+def _points(rng, files):
+    return {f: (rng.uniform(30, 40), rng.uniform(120, 130), rng.choice([2019, 2020]), rng.choice([201901, 202005, 0]))
+            for f in files}
+
+def _replace(conn, pts):
+    files = list(pts)
+    heat_store.replace_source(conn, "s", [pts[f][0] for f in files], [pts[f][1] for f in files],
+                              [pts[f][2] for f in files], months=[pts[f][3] for f in files], files=files)
+
+def _tables(conn):
+    out = {t: sorted(conn.execute(f"SELECT * FROM {t}").fetchall()) for t in ("cells", "month_cells", "file_points")}
+    out["sources"] = [r[:2] for r in conn.execute("SELECT * FROM sources ORDER BY source")]
+    return out
+
+def test_merge_equals_replace(tmp_path):
+    rng = random.Random(1)
+    before = _points(rng, [f"f{i}" for i in range(300)])
+    inc = heat_store.open_store(tmp_path / "inc.sqlite")
+    _replace(inc, before)
+
+    after = dict(before)
+    for i in range(50):                       # 이동
+        after[f"f{i}"] = (rng.uniform(30, 40), rng.uniform(120, 130), 2021, 202103)
+    for i in range(50, 80):                   # 삭제 (좌표 없는 레코드)
+        del after[f"f{i}"]
+    for i in range(300, 320):                 # 추가 (같은 칸에 여러 장)
+        after[f"f{i}"] = (35.0, 125.0, 2021, 202103)
+    changed = [f"f{i}" for i in list(range(80)) + list(range(300, 320))]
+    changed = ["f300", "f0"] + changed        # 같은 파일이 여러 번 → 마지막 것만
+    vals = [after.get(f) for f in changed]
+    added, removed = heat_store.merge_files(
+        inc, "s", changed, [v[0] if v else None for v in vals], [v[1] if v else None for v in vals],
+        [v[2] if v else 0 for v in vals], [v[3] if v else 0 for v in vals])
+    assert (added, removed) == (70, 80)
+
+    full = heat_store.open_store(tmp_path / "full.sqlite")
+    _replace(full, after)
+    assert _tables(inc) == _tables(full)
+
+def test_merge_removes_emptied_cells(tmp_path):
+    conn = heat_store.open_store(tmp_path / "s.sqlite")
+    _replace(conn, {"a": (37.5, 127.0, 2020, 202001)})
+    heat_store.merge_files(conn, "s", ["a"], [None], [None], [0], [0])
+    assert conn.execute("SELECT COUNT(*) FROM cells").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM month_cells").fetchone()[0] == 0
+    assert conn.execute("SELECT photos FROM sources WHERE source = 's'").fetchone()[0] == 0
+
+def test_merge_is_idempotent(tmp_path):
+    rng = random.Random(2)
+    pts = _points(rng, [f"f{i}" for i in range(50)])
+    conn = heat_store.open_store(tmp_path / "s.sqlite")
+    _replace(conn, pts)
+    expected = _tables(conn)
+    files = list(pts)
+    for _ in range(2):  # 같은 꼬리를 다시 읽어도 (체크포인트 저장 전 중단 등) 결과 그대로
+        heat_store.merge_files(conn, "s", files, [pts[f][0] for f in files], [pts[f][1] for f in files],
+                               [pts[f][2] for f in files], [pts[f][3] for f in files])
+        assert _tables(conn) == expected
+
+def test_source_cell_counts_match_heat_by_year(tmp_path):
+    rng = random.Random(3)
+    pts = _points(rng, [f"f{i}" for i in range(500)])
+    pts.update({f"g{i}": (37.5, 127.0, 0, 0) for i in range(5)})  # 시간 없는 사진은 all에만
+    conn = heat_store.open_store(tmp_path / "s.sqlite")
+    _replace(conn, pts)
+    heat_store.replace_source(conn, "other", [10.0], [10.0], [2019])  # 다른 출처는 세지 않음
+    v = list(pts.values())
+    grouped = heat_by_year([p[0] for p in v], [p[1] for p in v], [p[2] for p in v])
+    assert heat_store.source_cell_counts(conn, "s") == {k: len(cells) for k, cells in grouped.items()}
+
+def test_export_writes_tiles_and_year_files(tmp_path):
+    conn = heat_store.open_store(tmp_path / "heat_store.sqlite")
+    _replace(conn, _points(random.Random(2), [f"f{i}" for i in range(50)]))
+    heat = heat_store.export_all(conn, tmp_path, labels=False)
+    assert (tmp_path / "heat_tiles" / "index.json").exists()
+    manifest = json.loads((tmp_path / "heat_years" / "manifest.json").read_text(encoding="utf-8"))
+    assert set(manifest) == set(heat)
+    heat_store.export_all(conn, tmp_path, split=False, labels=False)
+    assert not (tmp_path / "heat_years").exists()
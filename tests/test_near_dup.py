@@ -0,0 +1,54 @@
+# test_near_dup.py
+# 목적:
+#  - multi-index 해시 검색으로 묶은 결과가 대표 전체를 직접 비교한 것과 같은지
+#  - 축소/재압축한 사진은 dHash가 가깝고, 다른 사진은 멀리 떨어지는지
+
+import io, random
+import numpy as np
+import pytest
+from PIL import Image
+from near_dup import MIN_BITS, dhash, group_near_duplicates
+
+def _brute(hashes, radius):
+    reps, rep_of = [], list(range(len(hashes)))
+    for i, h in enumerate(hashes):
+        if h is None or not MIN_BITS <= bin(h).count("1") <= 64 - MIN_BITS:
+            continue
+        near = [(bin(h ^ hashes[j]).count("1"), j) for j in reps]
+        near = [x for x in near if x[0] <= radius]
+        if near:
+            rep_of[i] = min(near)[1]
+        else:
+            reps.append(i)
+    return rep_of
+
+@pytest.mark.parametrize("radius", [0, 2, 4, 10])
+def test_matches_brute_force(radius):
+    rng = random.Random(radius)
+    bases = [rng.getrandbits(64) for _ in range(40)]
+    hashes = []
+    for _ in range(800):
+        h = rng.choice(bases)
+        for _ in range(rng.randint(0, 8)):
+            h ^= 1 << rng.randrange(64)
+        hashes.append(h)
+    hashes += [None, 0, (1 << 64) - 1]  # 없음 / 단색 사진은 묶지 않음
+    assert group_near_duplicates(hashes, radius) == _brute(hashes, radius)
+
+def test_bad_radius():
+    with pytest.raises(ValueError):
+        group_near_duplicates([1], 64)
+
+def _jpeg(im, quality=90):
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+def test_dhash_resized_copy_is_near():
+    rng = np.random.default_rng(0)
+    big = Image.fromarray(rng.integers(0, 256, (8, 9, 3), dtype=np.uint8)).resize((900, 800), Image.BILINEAR)
+    other = Image.fromarray(rng.integers(0, 256, (8, 9, 3), dtype=np.uint8)).resize((900, 800), Image.BILINEAR)
+    h = dhash(_jpeg(big))
+    assert bin(h ^ dhash(_jpeg(big.resize((300, 266)), quality=60))).count("1") <= 4
+    assert bin(h ^ dhash(_jpeg(other))).count("1") > 10
+    assert dhash(b"not an image") is None
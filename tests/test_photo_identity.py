@@ -0,0 +1,102 @@
+# test_photo_identity.py
+# 목적:
+#  - 실행 순서와 상관없이 우선순위(PRIORITY)가 높은 소스가 주인이 되는지 (UTC ↔ 현지 시각, 좌표 반올림 차이)
+#  - 판정이 바뀐 파일만 changed, 삭제된 사진(좌표 없는 레코드)은 서명이 빠져서 다음 소스가 주인이 되는지
+#  - 인덱스를 다시 열어도 같은 상태인지
+#  - 서명이 바뀐 사진 주변의 우선순위가 낮은 소스에 stale 표시 → 그 파일만 다시 판정하면 전체 판정과 같은지
+
+import pytest
+import photo_identity as pid
+
+SEOUL = (37.566500, 126.978000)
+
+def _rows(index):
+    return sorted(index["conn"].execute("SELECT source, file, basis, bucket, lat, lng, sec, dup_of FROM photos"))
+
+def _rec(file, time, lat=SEOUL[0], lng=SEOUL[1]):
+    return {"file": file, "lat": lat, "lng": lng, "time": time}
+
+@pytest.fixture
+def index(tmp_path):
+    idx = pid.open_index(tmp_path / "photo_identity.sqlite")
+    yield idx
+    pid.close_index(idx)
+
+def test_priority_owner_and_tombstone(index):
+    takeout = [_rec("IMG_1.jpg", "2019-05-01 03:00:00")]                     # UTC
+    new = [_rec("DCIM/IMG_1.jpg", "2019-05-01 12:00:00", SEOUL[0] + 4e-6)]  # 현지(+9), 반올림 차이
+    old = [_rec("backup/IMG_1.jpg", "2019-05-01 12:00:00")]
+
+    # 우선순위가 낮은 소스를 먼저 가져와도
+    assert pid.reclaim(index, "takeout", takeout, basis="utc") == ([None], [False])
+    assert pid.reclaim(index, "oldphotos", old) == (["takeout:IMG_1.jpg"], [True])
+    assert pid.reclaim(index, "newphotos", new) == ([None], [False])
+    # 다음 실행에서 아래 소스들의 판정이 바뀜
+    assert pid.reclaim(index, "takeout", takeout, basis="utc") == (["newphotos:DCIM/IMG_1.jpg"], [True])
+    assert pid.reclaim(index, "takeout", takeout, basis="utc") == (["newphotos:DCIM/IMG_1.jpg"], [False])
+    assert pid.reclaim(index, "oldphotos", old) == (["newphotos:DCIM/IMG_1.jpg"], [True])
+
+    # newphotos에서 삭제 → 서명이 빠지고 takeout이 다시 주인
+    assert pid.reclaim(index, "newphotos", [_rec("DCIM/IMG_1.jpg", None, None, None)]) == ([None], [False])
+    assert not pid.has_source(index, "newphotos")
+    assert pid.reclaim(index, "takeout", takeout, basis="utc") == ([None], [True])
+    assert pid.reclaim(index, "oldphotos", old) == (["takeout:IMG_1.jpg"], [True])
+
+def test_different_photos_are_kept(index):
+    pid.claim(index, "newphotos", [_rec("a.jpg", "2019-05-01 12:00:00")])
+    recs = [
+        _rec("b.jpg", "2019-05-01 12:00:01"),                    # 같은 시간 기준인데 1초 다름
+        _rec("c.jpg", "2019-05-01 12:00:00", SEOUL[0] + 1e-3),  # 100m 떨어짐
+        _rec("d.jpg", None),                                     # 시각 없음 → 판별 불가, 통과
+        {"file": "e.jpg", "time": "2019-05-01 12:00:00"},        # 좌표 없음
+        _rec("f.jpg", "2019-05-01 12:00:00"),                    # 같은 사진
+    ]
+    kept, dropped = pid.drop_duplicates(index, "oldphotos", recs)
+    assert [r["file"] for r in kept] == ["b.jpg", "c.jpg", "d.jpg", "e.jpg"] and dropped == 1
+
+def test_utc_offset_must_match_longitude(index):
+    pid.claim(index, "newphotos", [_rec("a.jpg", "2019-05-01 12:00:00")])
+    # 서울에서 UTC 03:00 = 현지 12:00 → 같은 사진 / UTC 12:00 이면 시차 0 → 다른 사진
+    assert pid.claim(index, "takeout", [_rec("x.jpg", "2019-05-01 03:00:00")], basis="utc") == ["newphotos:a.jpg"]
+    assert pid.claim(index, "takeout", [_rec("y.jpg", "2019-05-01 12:00:00")], basis="utc") == [None]
+
+def test_reopen_keeps_state(tmp_path):
+    path = tmp_path / "photo_identity.sqlite"
+    idx = pid.open_index(path)
+    pid.claim(idx, "newphotos", [_rec("a.jpg", "2019-05-01 12:00:00")])
+    pid.claim(idx, "oldphotos", [_rec("b.jpg", "2019-05-01 12:00:00"), _rec("c.jpg", "2019-05-02 12:00:00")])
+    rows = _rows(idx)
+    pid.close_index(idx)
+
+    idx = pid.open_index(path)
+    assert _rows(idx) == rows and len(rows) == 3
+    assert pid.has_source(idx, "oldphotos") and not pid.has_source(idx, "takeout")
+    # 저장된 판정 그대로 → changed 없음
+    assert pid.reclaim(idx, "oldphotos", [_rec("b.jpg", "2019-05-01 12:00:00")]) == (["newphotos:a.jpg"], [False])
+    pid.close_index(idx)
+
+def test_stale_marks_lower_sources(index):
+    takeout = [_rec("IMG_1.jpg", "2019-05-01 03:00:00"), _rec("IMG_2.jpg", "2019-06-01 03:00:00")]
+    old = [_rec("backup/IMG_1.jpg", "2019-05-01 12:00:00"), _rec("backup/IMG_3.jpg", "2019-07-01 12:00:00")]
+    pid.reclaim(index, "takeout", takeout, basis="utc")
+    pid.reclaim(index, "oldphotos", old)
+    assert pid.dup_files(index, "oldphotos") == {"backup/IMG_1.jpg"}
+    assert pid.stale_files(index, "takeout") == [] and pid.stale_files(index, "oldphotos") == []
+
+    # 최우선 소스에 IMG_1이 생김 → 같은 사진을 가진 아래 소스만 stale (다른 사진은 그대로)
+    pid.reclaim(index, "newphotos", [_rec("DCIM/IMG_1.jpg", "2019-05-01 12:00:00")])
+    assert pid.stale_files(index, "takeout") == ["IMG_1.jpg"]
+    assert pid.stale_files(index, "oldphotos") == ["backup/IMG_1.jpg"]
+    # 다시 판정하면 표시가 지워짐 (판정은 저장소 전체로 다시 한 것과 같음)
+    assert pid.reclaim(index, "takeout", takeout[:1], basis="utc") == (["newphotos:DCIM/IMG_1.jpg"], [True])
+    assert pid.stale_files(index, "takeout") == []
+    assert pid.reclaim(index, "oldphotos", old) == (["newphotos:DCIM/IMG_1.jpg", None], [True, False])
+    assert pid.stale_files(index, "oldphotos") == []
+    assert pid.dup_files(index, "takeout") == {"IMG_1.jpg"}
+
+    # 판정만 같고 서명이 그대로면 stale 표시 없음
+    pid.reclaim(index, "newphotos", [_rec("DCIM/IMG_1.jpg", "2019-05-01 12:00:00")])
+    assert pid.stale_files(index, "takeout") == []
+    # 삭제되면 다시 stale
+    pid.reclaim(index, "newphotos", [_rec("DCIM/IMG_1.jpg", None, None, None)])
+    assert pid.stale_files(index, "takeout") == ["IMG_1.jpg"]
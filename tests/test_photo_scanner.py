@@ -0,0 +1,89 @@
+# test_photo_scanner.py
+# 목적:
+#  - 프로세스 풀 스캔이 순차 실행과 같은 결과인지 (scan_exif 순서, run의 JSON/CSV/로그 출력)
+#  - 증분 실행: 바뀐 파일만 다시 처리, 사라진 파일은 삭제 레코드
+#  - identity=True 증분 실행: 바뀐 게 없으면 로그에 아무것도 안 씀, 우선순위가 높은 소스가 바뀐 사진만 다시 기록
+
+import json
+import pytest
+from conftest import make_jpeg
+import photo_identity
+import photo_scanner
+import record_log
+
+EXTS = {".jpg", ".jpeg", ".png"}
+
+def _library(root, n=30):
+    for i in range(n):
+        kw = {}
+        if i % 3:
+            kw.update(lat=37.5 + i * 0.01, lng=127.0 - i * 0.01)
+        if i % 4:
+            kw.update(time=f"2019:0{1 + i % 9}:1{i % 10} 12:00:{i:02d}")
+        make_jpeg(root / f"d{i % 4}" / f"sub{i % 2}" / f"{i:03d}.jpg", seed=i, **kw)
+    make_jpeg(root / "d0" / "skip" / "x.jpg", lat=1.0, lng=1.0)  # 제외 폴더
+    make_jpeg(root / "d1" / "plain.png", fmt="PNG")
+
+def _outputs(out):
+    return {name: (out / name).read_text(encoding="utf-8")
+            for name in ("p_with.json", "p_without.json", "p_exif_scan_report.csv", "p.ndjson")}
+
+def _run(root, out, workers, **kw):
+    photo_scanner.run(root, out, "p", EXTS, {"skip"}, workers=workers, chunksize=4, rebuild_csv=True, **kw)
+
+def test_scan_exif_parallel_matches_serial(tmp_path):
+    _library(tmp_path)
+    paths = sorted(tmp_path.rglob("*.*"))
+    serial = photo_scanner.scan_exif(paths, workers=1)
+    assert photo_scanner.scan_exif(paths, workers=3, chunksize=3) == serial
+    assert serial == [photo_scanner.extract_exif_basic(p) for p in paths]
+
+@pytest.mark.parametrize("dedup_position", [False, True])
+def test_run_parallel_matches_serial(tmp_path, dedup_position):
+    root = tmp_path / "photos"
+    _library(root)
+    _run(root, tmp_path / "serial", 1, dedup_position=dedup_position)
+    _run(root, tmp_path / "pool", 3, dedup_position=dedup_position)
+    serial = _outputs(tmp_path / "serial")
+    assert _outputs(tmp_path / "pool") == serial
+    with_gps = json.loads(serial["p_with.json"])
+    assert len(with_gps) == 20 and all(not r["file"].startswith("d0/skip") for r in with_gps)
+
+def test_incremental_rerun(tmp_path):
+    root, out = tmp_path / "photos", tmp_path / "out"
+    _library(root)
+    _run(root, out, 2)
+    _, cp, _ = record_log.read_tail(out / "p.ndjson")
+    make_jpeg(root / "d2" / "sub0" / "new.jpg", lat=35.0, lng=139.0, time="2020:01:01 00:00:00", seed=99)
+    (root / "d3" / "sub1" / "003.jpg").unlink()
+    _run(root, out, 2)
+    tail, _, full = record_log.read_tail(out / "p.ndjson", cp)
+    assert not full
+    assert sorted((r["file"], r.get("lat")) for r in tail) == [("d2/sub0/new.jpg", 35.0), ("d3/sub1/003.jpg", None)]
+    files = {r["file"] for r in json.loads((out / "p_with.json").read_text(encoding="utf-8"))}
+    assert "d2/sub0/new.jpg" in files and "d3/sub1/003.jpg" not in files
+
+def test_identity_reclaims_only_changes(tmp_path):
+    root, out = tmp_path / "photos", tmp_path / "out"
+    _library(root)
+    run = lambda: photo_scanner.run(root, out, "oldphotos", EXTS, {"skip"}, workers=1, identity=True)
+    run()
+    log = out / "oldphotos.ndjson"
+    _, cp, _ = record_log.read_tail(log)
+    run()  # 바뀐 게 없음
+    tail, cp, _ = record_log.read_tail(log, cp)
+    assert tail == []
+
+    # 최우선 소스에 같은 사진이 생김 → 그 사진만 다시 기록되고 with JSON에서 빠짐
+    ident = photo_identity.open_index(out / photo_identity.STORE_PATH.name)
+    same = {"file": "DCIM/a.jpg", "lat": 37.51, "lng": 126.99, "time": "2019-02-11 12:00:01"}
+    photo_identity.reclaim(ident, "newphotos", [same])
+    photo_identity.close_index(ident)
+    run()
+    tail, cp, _ = record_log.read_tail(log, cp)
+    assert tail == [{"file": "d1/sub1/001.jpg", "lat": None, "lng": None, "time": "2019-02-11 12:00:01",
+                     "dup_of": "newphotos:DCIM/a.jpg"}]
+    files = {r["file"] for r in json.loads((out / "oldphotos_with.json").read_text(encoding="utf-8"))}
+    assert "d1/sub1/001.jpg" not in files and len(files) == 19
+    run()
+    assert record_log.read_tail(log, cp)[0] == []
@@ -0,0 +1,41 @@
+# test_place_index.py
+# 목적:
+#  - assign_nearest가 모든 장소를 직접 비교한 결과(반경 안 가장 가까운 장소)와 같은지
+#    (반경이 제각각인 장소, 날짜변경선 근처, 한 점에 몰린 장소)
+
+import numpy as np
+import pytest
+from geo import haversine_km
+from place_index import build_place_index, assign_nearest
+
+def _brute(plat, plng, rad, lat, lng):
+    d = haversine_km(lat[:, None], lng[:, None], plat[None, :], plng[None, :])
+    d = np.where(d <= rad[None, :] * (1 + 1e-9), d, np.inf)
+    j = d.argmin(axis=1)
+    dist = d[np.arange(len(lat)), j]
+    j[~np.isfinite(dist)] = -1
+    return j, dist
+
+@pytest.mark.parametrize("case", ["same_radius", "mixed_radius", "antimeridian", "dense"])
+def test_assign_matches_brute_force(case):
+    rng = np.random.default_rng(0)
+    m, n = 300, 3000
+    plat, plng = rng.uniform(37, 37.5, m), rng.uniform(127, 127.5, m)
+    rad = np.full(m, 3.0) if case == "same_radius" else rng.choice([0.001, 0.3, 3.0, 30.0], m)
+    if case == "antimeridian":
+        plat[:100] = rng.uniform(-10, 10, 100)
+        plng[:50], plng[50:100] = rng.uniform(179.9, 180, 50), rng.uniform(-180, -179.9, 50)
+    if case == "dense":
+        plat[:250] = 37.2 + rng.normal(0, 1e-3, 250)
+        plng[:250] = 127.2 + rng.normal(0, 1e-3, 250)
+        rad[:250] = 0.01
+    lat = np.r_[rng.uniform(36.9, 37.6, n), plat[:100] + 1e-6]
+    lng = np.r_[rng.uniform(126.9, 127.6, n), plng[:100]]
+    j, d = assign_nearest(build_place_index(plat, plng, rad), lat, lng)
+    bj, bd = _brute(plat, plng, rad, lat, lng)
+    found = j >= 0
+    assert found.sum() > 0
+    assert np.array_equal(found, bj >= 0)
+    assert np.allclose(d[found], bd[found])
+    # 거리가 같은 장소가 여러 개면 번호가 다를 수 있으므로 거리로 비교
+    assert np.allclose(haversine_km(lat[found], lng[found], plat[j[found]], plng[j[found]]), bd[found])
@@ -0,0 +1,63 @@
+# test_record_log.py
+# 목적:
+#  - read_tail 체크포인트가 새로 추가된 줄만 돌려주는지
+#  - compact / 로그 재생성 후에는 generation이 바뀌어 처음부터 다시 읽는지
+#  - 새 로그의 compacted_lines 기준 (바로 압축되지 않음)
+
+import record_log
+
+def _recs(*pairs):
+    return [{"file": f, "v": v} for f, v in pairs]
+
+def test_tail_reads_only_new_lines(tmp_path):
+    log = tmp_path / "s.ndjson"
+    record_log.append(log, _recs(("a", 1), ("b", 1)))
+    recs, cp, full = record_log.read_tail(log)
+    assert full and [r["file"] for r in recs] == ["a", "b"]
+    record_log.append(log, _recs(("a", 2)))
+    recs, cp2, full = record_log.read_tail(log, cp)
+    assert not full and recs == _recs(("a", 2))
+    assert record_log.read_tail(log, cp2)[0] == []
+
+def test_incomplete_last_line_is_skipped(tmp_path):
+    log = tmp_path / "s.ndjson"
+    record_log.append(log, _recs(("a", 1)))
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"file": "b"')  # 쓰다 중단된 줄
+    recs, cp, _ = record_log.read_tail(log)
+    assert recs == _recs(("a", 1))
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(', "v": 1}\n')
+    assert record_log.read_tail(log, cp)[0] == [{"file": "b", "v": 1}]
+
+def test_compact_bumps_generation(tmp_path):
+    log = tmp_path / "s.ndjson"
+    record_log.append(log, _recs(("a", 1), ("b", 1)))
+    _, cp, _ = record_log.read_tail(log)
+    record_log.append(log, _recs(("a", 2), ("a", 3)))
+    assert record_log.compact(log) == 2
+    assert list(record_log.iter_records(log)) == _recs(("a", 3), ("b", 1))
+    meta = record_log.read_meta(log)
+    assert meta == {"generation": 1, "lines": 2, "compacted_lines": 2}
+    recs, _, full = record_log.read_tail(log, cp)
+    assert full and recs == _recs(("a", 3), ("b", 1))
+
+def test_recreated_log_starts_new_generation(tmp_path):
+    log = tmp_path / "s.ndjson"
+    record_log.append(log, _recs(("a", 1), ("b", 1)))
+    _, cp, _ = record_log.read_tail(log)
+    log.unlink()  # 스캐너가 로그를 새로 씀 (meta는 남아 있음)
+    record_log.append(log, _recs(("c", 1)))
+    meta = record_log.read_meta(log)
+    assert meta == {"generation": 1, "lines": 1, "compacted_lines": 1}
+    recs, _, full = record_log.read_tail(log, cp)
+    assert full and recs == _recs(("c", 1))
+
+def test_new_log_is_not_compacted_right_away(tmp_path):
+    log = tmp_path / "s.ndjson"
+    record_log.append(log, _recs(*((f"f{i}", 0) for i in range(1500))))
+    assert record_log.read_meta(log) == {"generation": 0, "lines": 1500, "compacted_lines": 1500}
+    assert record_log.maybe_compact(log) is None
+    record_log.append(log, _recs(*((f"f{i}", 1) for i in range(1501))))
+    assert record_log.maybe_compact(log) == 1501
+    assert record_log.read_meta(log)["generation"] == 1
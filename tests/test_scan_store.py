@@ -0,0 +1,47 @@
+# test_scan_store.py
+# 목적:
+#  - remove_missing: 다시 읽은 폴더에서 없어진 파일, 사라진 폴더 아래 파일/폴더만 지우고 등록 순서대로 반환
+#    (다른 폴더, 이름이 같은 접두사로 시작하는 형제 폴더는 그대로)
+#  - 다시 읽은 폴더가 없으면 files 테이블을 읽지 않음
+#  - dir 컬럼 도입 전 저장소도 열림
+
+import sqlite3
+import scan_store
+
+def _store(tmp_path):
+    conn = scan_store.open_store(tmp_path / "idx.sqlite")
+    keys = ["r/a/1.jpg", "r/a/2.jpg", "r/a/sub/3.jpg", "r/ab/4.jpg", "r/b/5.jpg", "r/b/deep/6.jpg", "r/7.jpg"]
+    scan_store.upsert_files(conn, [(k, k.upper(), 1, 1.0, None, None, None) for k in keys])
+    scan_store.upsert_dirs(conn, [(d, 1.0, 1, []) for d in ("r", "r/a", "r/a/sub", "r/ab", "r/b", "r/b/deep")])
+    return conn
+
+def _keys(conn, table):
+    return sorted(k for (k,) in conn.execute(f"SELECT key FROM {table}"))
+
+def test_remove_missing(tmp_path):
+    conn = _store(tmp_path)
+    removed = scan_store.remove_missing(conn, {"r/a"}, {"r/a/2.jpg"}, ["r/b"])
+    assert removed == ["R/A/1.JPG", "R/B/5.JPG", "R/B/DEEP/6.JPG"]
+    assert _keys(conn, "files") == ["r/7.jpg", "r/a/2.jpg", "r/a/sub/3.jpg", "r/ab/4.jpg"]
+    assert _keys(conn, "dirs") == ["r", "r/a", "r/a/sub", "r/ab"]
+
+def test_nothing_rescanned_reads_nothing(tmp_path):
+    conn = _store(tmp_path)
+    sql = []
+    conn.set_trace_callback(sql.append)
+    assert scan_store.remove_missing(conn, set(), set(), []) == []
+    assert sql == []
+    conn.set_trace_callback(None)
+    conn.set_trace_callback(sql.append)
+    scan_store.remove_missing(conn, {"r/ab"}, {"r/ab/4.jpg"}, [])
+    assert not any("FROM files" in q and "WHERE" not in q for q in sql)
+
+def test_old_store_gets_dir_column(tmp_path):
+    path = tmp_path / "idx.sqlite"
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE files (key TEXT PRIMARY KEY, rel TEXT NOT NULL, size INTEGER, mtime REAL, "
+                     "lat REAL, lng REAL, time TEXT)")
+        conn.execute("INSERT INTO files VALUES ('r/a/1.jpg', 'r/a/1.jpg', 1, 1.0, NULL, NULL, NULL)")
+    conn = scan_store.open_store(path)
+    assert conn.execute("SELECT dir FROM files").fetchall() == [("r/a",)]
+    assert scan_store.remove_missing(conn, {"r/a"}, set(), []) == ["r/a/1.jpg"]
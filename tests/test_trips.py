@@ -0,0 +1,48 @@
+# test_trips.py
+# 목적:
+#  - segment_trips: 집 근처는 제외, 여러 도시 여행은 하나로, 도시 사이에 집 사진이 있으면 나눔, 외톨이는 버림
+
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from trips import segment_trips
+
+def _day(k, hour=12):
+    return datetime(2019, 1, 1) + timedelta(days=k, hours=hour)
+
+def _photos(spec):
+    """[(lat, lng, 날짜 목록, 하루 사진 수)] → lats, lngs, times"""
+    lats, lngs, times = [], [], []
+    for lat, lng, days, per_day in spec:
+        for k in days:
+            for h in range(per_day):
+                lats.append(lat + 0.001 * h)
+                lngs.append(lng)
+                times.append(_day(k, 8 + h))
+    return lats, lngs, times
+
+def test_segment_trips():
+    trip_days = set(range(10, 15)) | {30, 31, 32, 34, 35}
+    lats, lngs, times = _photos([
+        (37.5665, 126.978, [k for k in range(60) if k not in trip_days], 4),  # 집 (서울)
+        (35.68, 139.76, [10, 11, 12], 6),                                     # 도쿄 → 오사카 (한 여행)
+        (34.69, 135.50, [13, 14], 6),
+        (48.86, 2.35, [30, 31, 32], 6),                                       # 파리, 하루 집에 왔다가
+        (45.76, 4.84, [34, 35], 6),                                           # 리옹 (다른 여행)
+        (-33.86, 151.21, [20], 1),                                            # 외톨이 (GPS 오류)
+    ])
+    lats.append(0.0)
+    lngs.append(0.0)
+    times.append(None)  # 시간 없는 사진은 무시
+
+    def country_of(la, ln):
+        return np.where(ln > 137, "JP-east", np.where(ln > 100, "JP-west", "FR"))
+
+    trips, home = segment_trips(lats, lngs, times, country_of=country_of)
+    assert home == pytest.approx((37.5665, 126.978), abs=0.01)
+    assert [(t["start"][:10], t["end"][:10], t["points"]) for t in trips] == [
+        ("2019-01-11", "2019-01-15", 30), ("2019-01-31", "2019-02-02", 18), ("2019-02-04", "2019-02-05", 12)]
+    assert trips[0]["countries"] == ["JP-east", "JP-west"]
+    assert trips[0]["days"] == 5
+    south, west, north, east = trips[0]["bbox"]
+    assert south <= 34.69 and north >= 35.68 and west <= 135.5 and east >= 139.76
@@ -0,0 +1,42 @@
+# test_vision_cache.py
+# 목적:
+#  - 결과 캐시: 랜드마크 있음 / 없음(False) / 아직 없음(None) 구분, 설정(params)별로 따로
+#  - 파일 캐시: size/mtime이 같을 때만 재사용, dhash 없는 예전 캐시도 열림
+#  - 업로드 축소: 긴 변 max_edge 이하로, 작은 사진/못 읽는 파일/0은 원본 그대로
+
+import io, sqlite3
+import numpy as np
+from PIL import Image
+import vision_cache
+from google_vision_api import shrink_for_upload
+
+def test_results_and_files(tmp_path):
+    conn = vision_cache.open_cache(tmp_path / "c" / "cache.sqlite")
+    best = ("Tokyo Tower", 0.9, 35.65, 139.74)
+    vision_cache.save(conn, [("a.jpg", 10, 1.0, "h1", None, -5)], [("h1", best), ("h2", None)], "p1")
+    assert vision_cache.lookup_result(conn, "h1", "p1") == best
+    assert vision_cache.lookup_result(conn, "h2", "p1") is False
+    assert vision_cache.lookup_result(conn, "h1", "p2") is None
+    assert vision_cache.count_results(conn, "p1") == (2, 1)
+    assert vision_cache.lookup_file(conn, "a.jpg", 10, 1.0) == ("h1", None, -5)
+    assert vision_cache.lookup_file(conn, "a.jpg", 11, 1.0) is None
+
+def test_old_cache_without_dhash(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE files (key TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT NOT NULL, time TEXT)")
+        conn.execute("INSERT INTO files VALUES ('a.jpg', 10, 1.0, 'h1', NULL)")
+    conn = vision_cache.open_cache(path)
+    assert vision_cache.lookup_file(conn, "a.jpg", 10, 1.0) == ("h1", None, None)
+
+def test_shrink_for_upload():
+    rng = np.random.default_rng(0)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)).resize((1600, 1200)).save(buf, "JPEG")
+    content = buf.getvalue()
+    small = shrink_for_upload(content, 400)
+    with Image.open(io.BytesIO(small)) as im:
+        assert max(im.size) <= 400 and im.size[0] > im.size[1]
+    assert shrink_for_upload(content, 0) is content
+    assert shrink_for_upload(content, 4000) is content
+    assert shrink_for_upload(b"not an image", 400) == b"not an image"
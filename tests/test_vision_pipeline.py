@@ -0,0 +1,77 @@
+# test_vision_pipeline.py
+# 목적:
+#  - google_vision_api.py 전체 경로를 가짜 Vision 서버(fake_vision_server.py)에 돌려보기
+#    · 초당 한도를 지키는지 (429 없음), 요청 하나에 한도 이하 이미지만 보내는지
+#    · 완전히 같은 파일 / 축소본은 대표 한 장만 업로드하고 CSV에 dup_of로 남는지
+#    · 결과가 서버가 사진 내용으로 정한 랜드마크와 같은지
+#    · 다시 실행하면 캐시만 쓰고 업로드하지 않는지
+
+import csv, json, sys, threading
+import numpy as np
+import pytest
+from PIL import Image
+import fake_vision_server
+import google_vision_api
+from vision_client import pick_best_landmark
+
+LANDMARK_RATIO = 0.5
+
+def _save(path, pattern, size):
+    # 작은 무늬를 부드럽게 키운 사진 → 축소해도 dHash가 그대로
+    Image.fromarray(pattern).resize(size, Image.BILINEAR).save(path, "JPEG", quality=95)
+
+@pytest.fixture
+def server():
+    srv = fake_vision_server.serve(port=0, latency=0.05, qps=6, landmark_ratio=LANDMARK_RATIO)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+def _run(monkeypatch, root, out, server, *extra):
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1/images:annotate"
+    monkeypatch.setattr(sys, "argv", ["google_vision_api.py", "--root", str(root), "--out", str(out),
+                                      "--endpoint", endpoint, "--workers", "4", "--max-edge", "0", *extra])
+    google_vision_api.main()
+    with open(out / "oldphotos_ai_landmarks.csv", encoding="utf-8") as f:
+        return {r["path"]: r for r in csv.DictReader(f)}
+
+def test_pipeline_against_fake_server(tmp_path, monkeypatch, server):
+    root, out = tmp_path / "photos", tmp_path / "out"
+    rng = np.random.default_rng(0)
+    (root / "a").mkdir(parents=True)
+    (root / "외장하드 백업").mkdir()
+    for k in range(14):
+        _save(root / "a" / f"p{k:02d}.jpg", rng.integers(0, 256, (8, 9, 3), dtype=np.uint8), (180, 160))
+    (root / "a" / "p00_copy.jpg").write_bytes((root / "a" / "p00.jpg").read_bytes())
+    with Image.open(root / "a" / "p01.jpg") as im:
+        im.resize((90, 80), Image.BILINEAR).save(root / "a" / "p01_small.jpg", "JPEG", quality=80)
+    _save(root / "외장하드 백업" / "skip.jpg", rng.integers(0, 256, (8, 9, 3), dtype=np.uint8), (180, 160))
+
+    rows = _run(monkeypatch, root, out, server, "--qps", "6")
+    assert server.counters["throttled"] == 0
+    assert server.counters["images"] == 14  # 대표 사진만
+    assert server.counters["requests"] >= 3  # 요청 하나에 초당 한도(6장) 이하
+    assert set(rows) == {f"a/p{k:02d}.jpg" for k in range(14)} | {"a/p00_copy.jpg", "a/p01_small.jpg"}
+    # 대표는 폴더를 읽은 순서에서 앞선 쪽
+    for a, b in (("a/p00.jpg", "a/p00_copy.jpg"), ("a/p01.jpg", "a/p01_small.jpg")):
+        assert (rows[a]["dup_of"], rows[b]["dup_of"]) in (("", a), (b, ""))
+
+    for rel, row in rows.items():
+        rep = row["dup_of"] or rel
+        best = pick_best_landmark(fake_vision_server.fake_response((root / rep).read_bytes(), LANDMARK_RATIO))
+        assert row["landmark"] == (best[0] if best else "")
+
+    with_loc = json.loads((out / "oldphotos_ai_with.json").read_text(encoding="utf-8"))
+    no_landmark = json.loads((out / "oldphotos_ai_nolandmark.json").read_text(encoding="utf-8"))
+    reps = [row for row in rows.values() if not row["dup_of"]]
+    assert sorted(r["file"] for r in no_landmark) == sorted(row["path"] for row in reps if not row["landmark"])
+    # with JSON은 대표 사진만, (좌표, 시각)이 같으면 한 번만
+    assert {r["file"] for r in with_loc} <= {row["path"] for row in reps if row["landmark"]}
+    assert sorted((r["lat"], r["lng"]) for r in with_loc) == sorted(
+        {(round(float(row["lat"]), 7), round(float(row["lng"]), 7)) for row in reps if row["landmark"]})
+    assert with_loc and no_landmark
+
+    # 다시 실행 → 전부 캐시
+    assert _run(monkeypatch, root, out, server, "--qps", "6") == rows
+    assert server.counters["images"] == 14